@@ -0,0 +1,163 @@
+"""
+Agent pool for Local Guide AI.
+Bounded, thread-safe pool of reusable Strands agents keyed per city prompt,
+with LRU eviction of the least recently used keys.
+"""
+import os
+import sys
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Iterator, List
+
+from strands.telemetry.metrics import EventLoopMetrics
+
+# Add current directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+
+def reset_conversation(agent: Any) -> None:
+    """
+    Drop the conversation history of a Strands agent so it answers statelessly.
+    
+    Per-invocation metrics are dropped too, so a long-lived agent does not
+    accumulate traces.
+    
+    Args:
+        agent: Agent to reset
+    """
+    agent.messages.clear()
+    if hasattr(agent, 'event_loop_metrics'):
+        agent.event_loop_metrics = EventLoopMetrics()
+
+
+class AgentPool:
+    """
+    Pool of idle agents per key.
+    
+    A leased agent is used by one caller at a time, since a Strands agent
+    rejects concurrent invocations. Concurrent callers for the same key get
+    separate agents; at most max_idle_per_key of them are kept afterwards.
+    """
+    
+    def __init__(self, max_keys: int = 8, max_idle_per_key: int = 4,
+                 reset: Callable[[Any], None] = reset_conversation):
+        """
+        Initialize the pool.
+        
+        Args:
+            max_keys: Maximum number of keys kept before LRU eviction
+            max_idle_per_key: Maximum idle agents kept per key
+            reset: Called on an agent before it is handed out again
+        """
+        self.max_keys = max_keys
+        self.max_idle_per_key = max_idle_per_key
+        self.reset = reset
+        self._idle: "OrderedDict[Hashable, List[Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def acquire(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """
+        Take an idle agent for a key, or build one.
+        
+        Args:
+            key: Pool key, e.g. city and system prompt hash
+            factory: Builds a new agent for the key on a miss
+            
+        Returns:
+            Agent leased to the caller until release()
+        """
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle is None:
+                self._idle[key] = []
+                while len(self._idle) > self.max_keys:
+                    self._idle.popitem(last=False)
+                    self.evictions += 1
+            else:
+                self._idle.move_to_end(key)
+                if idle:
+                    self.hits += 1
+                    return idle.pop()
+            self.misses += 1
+        
+        # Build outside the lock so a slow client setup does not block other keys
+        return factory()
+    
+    def release(self, key: Hashable, agent: Any) -> None:
+        """
+        Return a leased agent to the pool.
+        
+        The agent is dropped if its key was evicted meanwhile or the key
+        already has enough idle agents.
+        
+        Args:
+            key: Key the agent was acquired for
+            agent: Agent to return
+        """
+        self.reset(agent)
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle is not None and len(idle) < self.max_idle_per_key:
+                idle.append(agent)
+    
+    @contextmanager
+    def lease(self, key: Hashable, factory: Callable[[], Any]) -> Iterator[Any]:
+        """
+        Lease an agent for the duration of a with block.
+        
+        Args:
+            key: Pool key
+            factory: Builds a new agent for the key on a miss
+            
+        Yields:
+            Agent for exclusive use inside the block
+        """
+        agent = self.acquire(key, factory)
+        try:
+            yield agent
+        finally:
+            self.release(key, agent)
+    
+    def invalidate(self, predicate: Callable[[Hashable], bool]) -> int:
+        """
+        Drop the idle agents of every key that matches a predicate.
+        
+        Agents leased under a dropped key are discarded on release.
+        
+        Args:
+            predicate: Called with each key; True drops the key
+            
+        Returns:
+            Number of keys dropped
+        """
+        with self._lock:
+            stale = [key for key in self._idle if predicate(key)]
+            for key in stale:
+                del self._idle[key]
+            return len(stale)
+    
+    def clear(self) -> None:
+        """Drop all idle agents. Counters are kept."""
+        with self._lock:
+            self._idle.clear()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get pool statistics.
+        
+        Returns:
+            Dictionary with key and idle agent counts and hit/miss counters
+        """
+        with self._lock:
+            return {
+                'keys': len(self._idle),
+                'idle_agents': sum(len(idle) for idle in self._idle.values()),
+                'max_keys': self.max_keys,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
@@ -4,7 +4,9 @@ Migrates from Strands Agents to Bedrock AgentCore runtime.
 """
 import os
 import sys
-from typing import Dict, Any
+import uuid
+import asyncio
+from typing import Dict, Any, AsyncIterator, Optional
 
 # Add current directory to path for imports
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -24,6 +26,9 @@ app = BedrockAgentCoreApp()
 # Initialize the existing Local Guide system
 guide_system = None
 
+# Prefix of the throwaway sessions of requests with no session id at all
+ANONYMOUS_SESSION_PREFIX = "anonymous-"
+
 def initialize_system():
     """Initialize the Local Guide system once."""
     global guide_system
@@ -32,21 +37,100 @@ def initialize_system():
         guide_system.initialize()
         print("✅ Local Guide system initialized for AgentCore")
 
+def describe_cities(conjunction: str = "and") -> str:
+    """
+    Name the available cities for user-facing messages.
+    
+    Args:
+        conjunction: Word joining the last two names, e.g. "and" or "or"
+    
+    Returns:
+        The city names as a phrase, e.g. "Madurai and Dindigul"
+    """
+    cities = guide_system.get_available_cities()
+    if not cities:
+        return "the supported cities"
+    if len(cities) == 1:
+        return cities[0]
+    return f"{', '.join(cities[:-1])} {conjunction} {cities[-1]}"
+
+def resolve_session_id(request: Dict[str, Any], context: Any = None) -> Optional[str]:
+    """
+    Find the session a request belongs to.
+    
+    Args:
+        request: AgentCore request payload
+        context: AgentCore RequestContext of the invocation, if any
+    
+    Returns:
+        The payload's "session_id", else the runtime session id of the
+        context, else None for an anonymous request
+    """
+    session_id = request.get("session_id") or getattr(context, "session_id", None)
+    return str(session_id) if session_id else None
+
+async def stream_local_guide_response(prompt: str, session_id: str,
+                                      anonymous: bool = False) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Stream a Local Guide response as AgentCore events.
+    
+    Args:
+        prompt: User question
+        session_id: Session the question belongs to
+        anonymous: The session is a throwaway one, ended after the response
+    
+    Yields:
+        {"type": "delta", "text": ...} events while the answer is generated,
+        then one {"type": "final", ...} event with the validated response
+    """
+    try:
+        stream = guide_system.process_query_stream(prompt, session_id)
+        async for chunk in stream:
+            yield {"type": "delta", "text": chunk}
+        
+        response = stream.response
+        status = guide_system.get_system_status(session_id)
+        yield {
+            "type": "final",
+            "response": response.text,
+            "is_refusal": response.is_refusal,
+            "refusal_reason": response.refusal_reason if response.is_refusal else None,
+            "city": status.get('selected_city'),
+            "session_id": None if anonymous else session_id,
+            "status": "success",
+            "conversation_length": status.get('conversation_length', 0),
+            "timestamp": str(response.timestamp) if hasattr(response, 'timestamp') else None
+        }
+    finally:
+        if anonymous:
+            guide_system.end_session(session_id)
+
 @app.entrypoint
-async def handle_local_guide_request(request: Dict[str, Any]) -> Dict[str, Any]:
+async def handle_local_guide_request(request: Dict[str, Any], context: Any = None) -> Dict[str, Any]:
     """
     AgentCore entrypoint for Local Guide AI.
     
     Handles requests in AgentCore format and returns structured responses.
-    Maintains compatibility with existing Strands-based system.
+    Maintains compatibility with existing Strands-based system. With
+    "stream": true the answer is streamed as server-sent events instead.
+    Each session keeps its own city and conversation. Without a
+    "session_id" in the payload the runtime session id of the context is
+    used; a request with neither gets a private throwaway session that is
+    ended once it has been answered.
     
     Args:
         request: AgentCore request format
-                Expected: {"prompt": "user question", "city": "optional city"}
+                Expected: {"prompt": "user question", "city": "optional city",
+                           "session_id": "optional session id", "stream": false}
+        context: AgentCore RequestContext, passed by the runtime
     
     Returns:
-        Dict with response, metadata, and system status
+        Dict with response, metadata, and system status, or an async
+        iterator of events for streaming requests
     """
+    anonymous = False
+    streaming = False
+    session_id = None
     try:
         # Initialize system if not already done
         initialize_system()
@@ -54,11 +138,15 @@ async def handle_local_guide_request(request: Dict[str, Any]) -> Dict[str, Any]:
         # Extract request data
         prompt = request.get("prompt", "").strip()
         requested_city = request.get("city", None)
+        session_id = resolve_session_id(request, context)
+        if session_id is None:
+            anonymous = True
+            session_id = ANONYMOUS_SESSION_PREFIX + uuid.uuid4().hex
         
         # Validate input
         if not prompt:
             return {
-                "response": "Please provide a question about Madurai or Dindigul.",
+                "response": f"Please provide a question about {describe_cities('or')}.",
                 "is_refusal": True,
                 "refusal_reason": "Empty query",
                 "city": None,
@@ -67,21 +155,29 @@ async def handle_local_guide_request(request: Dict[str, Any]) -> Dict[str, Any]:
         
         # Handle city selection if provided
         if requested_city:
-            success, message = guide_system.select_city(requested_city)
+            # Context loading reads files; keep it off the event loop
+            success, message = await asyncio.get_running_loop().run_in_executor(
+                guide_system.cpu_executor, guide_system.select_city, requested_city, session_id
+            )
             if not success:
                 return {
-                    "response": f"Sorry, I can only help with Madurai and Dindigul. {message}",
+                    "response": f"Sorry, I can only help with {describe_cities()}. {message}",
                     "is_refusal": True,
                     "refusal_reason": "Unsupported city",
                     "city": None,
                     "status": "error"
                 }
         
-        # Process the query using existing system
-        response = guide_system.process_query(prompt)
+        # Stream the answer if requested
+        if request.get("stream"):
+            streaming = True
+            return stream_local_guide_response(prompt, session_id, anonymous)
+        
+        # Process the query without blocking other requests
+        response = await guide_system.process_query_async(prompt, session_id)
         
         # Get current system status
-        status = guide_system.get_system_status()
+        status = guide_system.get_system_status(session_id)
         
         # Return structured response for AgentCore
         return {
@@ -89,6 +185,7 @@ async def handle_local_guide_request(request: Dict[str, Any]) -> Dict[str, Any]:
             "is_refusal": response.is_refusal,
             "refusal_reason": response.refusal_reason if response.is_refusal else None,
             "city": status.get('selected_city'),
+            "session_id": None if anonymous else session_id,
             "model_info": status.get('model_info'),
             "status": "success",
             "conversation_length": status.get('conversation_length', 0),
@@ -107,6 +204,11 @@ async def handle_local_guide_request(request: Dict[str, Any]) -> Dict[str, Any]:
             "status": "error",
             "error_details": str(e) if os.getenv("DEBUG_MODE") else None
         }
+    
+    finally:
+        # The stream ends a throwaway session itself once it has finished
+        if anonymous and not streaming and guide_system is not None:
+            guide_system.end_session(session_id)
 
 # Health check function (not a decorator)
 async def health_check() -> Dict[str, Any]:
@@ -126,6 +228,7 @@ async def health_check() -> Dict[str, Any]:
             "components": health.get('components', {}),
             "issues": health.get('issues', []),
             "cities_available": guide_system.get_available_cities(),
+            "sessions": guide_system.sessions.get_stats(),
             "model_connected": health.get('components', {}).get('local_guide') == 'healthy'
         }
         
@@ -151,4 +254,6 @@ if __name__ == "__main__":
     # For local development testing
     print("🏛️ Local Guide AI - AgentCore Version")
     print("Run with: agentcore dev")
-    print("Test with: agentcore invoke --dev '{\"prompt\": \"What food is Madurai famous for?\"}'")
\ No newline at end of file
+    print("Test with: agentcore invoke --dev '{\"prompt\": \"What food is Madurai famous for?\"}'")
+    print("Stream with: agentcore invoke --dev '{\"prompt\": \"What food is Madurai famous for?\", \"stream\": true}'")
+    print("Per user: agentcore invoke --dev '{\"prompt\": \"What food is Madurai famous for?\", \"session_id\": \"user-1\"}'")
\ No newline at end of file
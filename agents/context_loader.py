@@ -12,6 +12,7 @@ from strands import Agent
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from models import CityContext
+from city_catalog import CityCatalog, get_catalog
 
 
 class ContextLoaderAgent:
@@ -25,17 +26,31 @@ class ContextLoaderAgent:
             context_dir: Directory containing context files
         """
         self.context_dir = context_dir
-        self.available_cities = ['madurai', 'dindigul']
         self.current_context: Optional[CityContext] = None
     
+    @property
+    def context_dir(self) -> str:
+        """Directory containing context files."""
+        return self._context_dir
+    
+    @context_dir.setter
+    def context_dir(self, context_dir: str) -> None:
+        self._context_dir = context_dir
+        self.catalog: CityCatalog = get_catalog(context_dir)
+    
+    @property
+    def available_cities(self) -> List[str]:
+        """Lowercase names of the cities that have a context file."""
+        return self.catalog.names()
+    
     def get_available_cities(self) -> List[str]:
         """
         Get list of available cities.
         
         Returns:
-            List of available city names
+            List of available city names, sorted
         """
-        return [city.title() for city in self.available_cities]
+        return [entry.display_name for entry in self.catalog.get_manifest()]
     
     def validate_city_selection(self, city: str) -> bool:
         """
@@ -47,11 +62,11 @@ class ContextLoaderAgent:
         Returns:
             True if city is supported, False otherwise
         """
-        return city.lower() in self.available_cities
+        return city in self.catalog
     
     def load_city_context(self, city: str) -> CityContext:
         """
-        Load context file for the specified city.
+        Load context file for the specified city and make it the current context.
         
         Args:
             city: Name of the city to load context for
@@ -60,18 +75,40 @@ class ContextLoaderAgent:
             CityContext object with loaded content
             
         Raises:
-            ValueError: If city is not supported
-            FileNotFoundError: If context file doesn't exist
+            ValueError: If city has no context file
+            FileNotFoundError: If the context directory doesn't exist
             IOError: If context file cannot be read
         """
-        if not self.validate_city_selection(city):
-            raise ValueError(f"City '{city}' is not supported. Available cities: {self.get_available_cities()}")
+        context = self.read_city_context(city)
         
-        city_lower = city.lower()
-        file_path = os.path.join(self.context_dir, f"{city_lower}_context.md")
+        # Store current context and ensure isolation
+        self.current_context = context
         
-        if not os.path.exists(file_path):
-            raise FileNotFoundError(f"Context file not found: {file_path}")
+        return context
+    
+    def read_city_context(self, city: str) -> CityContext:
+        """
+        Read context file for the specified city without changing the current context.
+        
+        Args:
+            city: Name of the city to read context for
+            
+        Returns:
+            CityContext object with loaded content
+            
+        Raises:
+            ValueError: If city has no context file
+            FileNotFoundError: If the context directory doesn't exist
+            IOError: If context file cannot be read
+        """
+        entry = self.catalog.get(city)
+        if entry is None:
+            if not os.path.isdir(self.context_dir):
+                raise FileNotFoundError(f"Context directory not found: {self.context_dir}")
+            raise ValueError(f"City '{city}' is not supported. Available cities: {self.get_available_cities()}")
+        
+        city_lower = entry.name
+        file_path = entry.file_path
         
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
@@ -86,15 +123,22 @@ class ContextLoaderAgent:
                 file_path=file_path,
                 last_loaded=datetime.now()
             )
-            
-            # Store current context and ensure isolation
-            self.current_context = context
+            self.catalog.record_load(city_lower, len(content.encode('utf-8')), context.get_content_hash())
             
             return context
             
         except Exception as e:
             raise IOError(f"Failed to read context file {file_path}: {str(e)}")
     
+    def use_context(self, context: CityContext) -> None:
+        """
+        Make an already loaded context the current one without reading the file again.
+        
+        Args:
+            context: Previously loaded CityContext
+        """
+        self.current_context = context
+    
     def get_current_context(self) -> Optional[CityContext]:
         """
         Get the currently loaded context.
@@ -169,16 +213,18 @@ class ContextLoaderAgent:
         if context.city_name != city_lower:
             return False
         
+        # Whole-word mentions of every catalog city, found in one pass
+        mentions = self.catalog.count_cities(context.context_content)
+        
         # Check that context contains city-specific information
-        content_lower = context.context_content.lower()
-        if city_lower not in content_lower:
+        own_mentions = mentions.get(city_lower, 0)
+        if not own_mentions:
             return False
         
         # Check that context doesn't contain other city information
-        other_cities = [c for c in self.available_cities if c != city_lower]
-        for other_city in other_cities:
+        for other_city, count in mentions.items():
             # Allow mentions in comparative context but not as primary content
-            if content_lower.count(other_city) > content_lower.count(city_lower) / 10:
+            if other_city != city_lower and count > own_mentions / 10:
                 return False
         
         return True
\ No newline at end of file
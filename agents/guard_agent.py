@@ -5,19 +5,83 @@ Responsible for post-processing validation to prevent hallucinations.
 import re
 import os
 import sys
-from typing import List, Tuple, Optional, Set
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from typing import FrozenSet, Iterable, List, Tuple, Optional, Set
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from models import Response
+from rag_retriever import ContextChunk, shingle_terms, text_shingles
+
+WORD_PATTERN = re.compile(r'\b[a-zA-Z]+\b')
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+|\n+')
+
+
+@dataclass
+class SentenceSupport:
+    """How well the retrieved chunks support one sentence of a response."""
+    sentence: str
+    score: float  # Share of the sentence's shingles found in the chunks
+    chunk_ids: List[str] = field(default_factory=list)  # Supporting chunks, most shared shingles first
+
+
+@dataclass
+class GuardVerdict:
+    """
+    Result of one guard evaluation.
+    
+    A short-circuited evaluation stops at the first failed check, so fields
+    of later checks keep their defaults; a full evaluation fills them all.
+    """
+    is_valid: bool
+    reason: Optional[str] = None  # First failed check, None if valid
+    is_refusal: bool = False
+    has_suspicious_patterns: bool = False
+    response_words: Set[str] = field(default_factory=set)
+    overlap_words: Set[str] = field(default_factory=set)
+    external_words: Set[str] = field(default_factory=set)
+    context_word_count: int = 0
+    sentence_support: List[SentenceSupport] = field(default_factory=list)  # Grounded mode only
+    
+    @property
+    def overlap_ratio(self) -> float:
+        """Share of response content words found in the context."""
+        return len(self.overlap_words) / len(self.response_words) if self.response_words else 0
+    
+    @property
+    def external_ratio(self) -> float:
+        """Share of response content words not found in the context."""
+        return len(self.external_words) / len(self.response_words) if self.response_words else 0
 
 
 class GuardAgent:
     """Agent responsible for validating responses and preventing hallucinations."""
     
-    def __init__(self):
-        """Initialize the Guard Agent."""
+    GUARD_MODES = ('context', 'grounded')
+    
+    def __init__(self, max_cached_contexts: int = 32, mode: str = 'context'):
+        """
+        Initialize the Guard Agent.
+        
+        Args:
+            max_cached_contexts: Number of contexts whose content words are kept cached
+            mode: 'context' checks word overlap with the whole city file;
+                  'grounded' checks each sentence against the retrieved chunks
+                  the model was given, when the response carries them
+            
+        Raises:
+            ValueError: If the mode is unknown
+        """
+        if mode not in self.GUARD_MODES:
+            raise ValueError(f"Unknown guard mode '{mode}'. Available modes: {self.GUARD_MODES}")
+        self.mode = mode
+        
         self.standardized_refusals = [
             "This isn't covered in my local context.",
             "I don't have enough local data to answer that.",
@@ -47,38 +111,104 @@ class GuardAgent:
             r'\b(worldwide|globally|internationally|across india)\b',
             r'\b(modern|contemporary|recent|latest|current)\b'
         ]
+        
+        # All suspicious patterns as one alternation, so a response is scanned once
+        self._suspicious_regex = re.compile('|'.join(f'(?:{pattern})' for pattern in self.suspicious_patterns))
+        
+        # Words that point at sources outside the context file
+        self.external_indicators = {
+            'wikipedia', 'google', 'internet', 'website', 'online', 'research',
+            'study', 'survey', 'report', 'statistics', 'data', 'according',
+            'experts', 'scientists', 'government', 'official', 'ministry'
+        }
+        
+        # Thresholds of the word overlap checks
+        self.min_overlap = 0.3
+        self.max_external_ratio = 0.4
+        
+        # Grounded mode: sentences with enough words must reach this support score
+        self.min_sentence_support = 0.4
+        self.min_sentence_terms = 3
+        
+        # Content words of recently used contexts by content hash, least recently used first
+        self.max_cached_contexts = max_cached_contexts
+        self._context_words: "OrderedDict[str, FrozenSet[str]]" = OrderedDict()
+        self._context_lock = threading.Lock()
+        self._context_hits = 0
+        self._context_misses = 0
     
-    def validate_response(self, response: str, context: str) -> bool:
+    def validate_response(self, response: str, context: str, content_hash: Optional[str] = None) -> bool:
         """
         Validate that response contains only context-based information.
         
         Args:
             response: Generated response text
             context: Source context content
+            content_hash: Hash of the context, computed if not given
             
         Returns:
             True if response is valid, False if hallucination detected
         """
-        if not response or not context:
-            return False
+        return self.evaluate(response, context, content_hash=content_hash).is_valid
+    
+    def evaluate(self, response: str, context: str, full: bool = False,
+                 content_hash: Optional[str] = None) -> GuardVerdict:
+        """
+        Run all guard checks over one response in a single pass.
         
-        # Always allow standardized refusals
-        if self._is_standardized_refusal(response):
-            return True
+        The response is scanned once for suspicious patterns and tokenized
+        once; overlap, external word share and external indicators all come
+        from the same word set. Checks run cheapest first and stop at the
+        first failure unless a full evaluation is requested.
         
-        # Check for suspicious patterns
-        if self._contains_suspicious_patterns(response):
-            return False
+        Args:
+            response: Generated response text
+            context: Source context content
+            full: Compute every field even after a check fails
+            content_hash: Hash of the context, computed if not given
+            
+        Returns:
+            GuardVerdict with the result and the values behind it
+        """
+        verdict = GuardVerdict(is_valid=False)
+        if (not response or not context) and not full:
+            verdict.reason = "empty response or context"
+            return verdict
         
-        # Check content overlap with context
-        if not self._has_sufficient_context_overlap(response, context):
-            return False
+        # Always allow standardized refusals
+        verdict.is_refusal = self._is_standardized_refusal(response)
+        if verdict.is_refusal and not full:
+            verdict.is_valid = True
+            return verdict
         
-        # Check for external knowledge indicators
-        if self._contains_external_knowledge(response, context):
-            return False
+        # Check for suspicious patterns
+        verdict.has_suspicious_patterns = self._contains_suspicious_patterns(response)
+        if verdict.has_suspicious_patterns and not full:
+            verdict.reason = "suspicious pattern"
+            return verdict
+        
+        # Compare the response's content words with the context's
+        context_words = self._get_context_words(context, content_hash)
+        verdict.context_word_count = len(context_words)
+        verdict.response_words = self._extract_content_words(response)
+        verdict.overlap_words = verdict.response_words & context_words
+        verdict.external_words = verdict.response_words - context_words
         
-        return True
+        if not response or not context:
+            verdict.reason = "empty response or context"
+        elif verdict.is_refusal:
+            verdict.is_valid = True
+        elif verdict.has_suspicious_patterns:
+            verdict.reason = "suspicious pattern"
+        elif not verdict.response_words or verdict.overlap_ratio < self.min_overlap:
+            verdict.reason = "insufficient overlap with the context"
+        elif len(verdict.external_words) > len(verdict.response_words) * self.max_external_ratio:
+            verdict.reason = "too many words outside the context"
+        elif verdict.external_words & self.external_indicators:
+            verdict.reason = "external knowledge indicator"
+        else:
+            verdict.is_valid = True
+        return verdict
     
     def detect_hallucination(self, response: str, context: str) -> bool:
         """
@@ -135,28 +265,23 @@ class GuardAgent:
     
     def _contains_suspicious_patterns(self, response: str) -> bool:
         """Check if response contains suspicious patterns indicating external knowledge."""
-        response_lower = response.lower()
-        
-        for pattern in self.suspicious_patterns:
-            if re.search(pattern, response_lower):
-                return True
-        
-        return False
+        return self._suspicious_regex.search(response.lower()) is not None
     
-    def _has_sufficient_context_overlap(self, response: str, context: str, min_overlap: float = 0.3) -> bool:
+    def _has_sufficient_context_overlap(self, response: str, context: str,
+                                        min_overlap: Optional[float] = None) -> bool:
         """
         Check if response has sufficient overlap with context.
         
         Args:
             response: Response text
             context: Context text
-            min_overlap: Minimum overlap ratio required
+            min_overlap: Minimum overlap ratio required, defaults to self.min_overlap
             
         Returns:
             True if sufficient overlap, False otherwise
         """
         response_words = self._extract_content_words(response)
-        context_words = self._extract_content_words(context)
+        context_words = self._get_context_words(context)
         
         if not response_words:
             return False
@@ -164,7 +289,7 @@ class GuardAgent:
         overlap = response_words.intersection(context_words)
         overlap_ratio = len(overlap) / len(response_words)
         
-        return overlap_ratio >= min_overlap
+        return overlap_ratio >= (self.min_overlap if min_overlap is None else min_overlap)
     
     def _extract_content_words(self, text: str) -> Set[str]:
         """
@@ -180,13 +305,61 @@ class GuardAgent:
             return set()
         
         # Extract words and convert to lowercase
-        words = re.findall(r'\b[a-zA-Z]+\b', text.lower())
+        words = WORD_PATTERN.findall(text.lower())
         
         # Remove common words
         content_words = set(word for word in words if word not in self.common_words)
         
         return content_words
     
+    def _get_context_words(self, context: str, content_hash: Optional[str] = None) -> FrozenSet[str]:
+        """
+        Get the content words of a context, extracting them once per context.
+        
+        The cache is keyed by the context's content hash rather than its
+        text, so it holds no context files alive. Callers with a CityContext
+        pass its hash; otherwise the text is hashed here.
+        
+        Args:
+            context: Context text
+            content_hash: MD5 of the context, as CityContext.get_content_hash()
+            
+        Returns:
+            Frozen set of content words in lowercase
+        """
+        key = content_hash or hashlib.md5(context.encode()).hexdigest()
+        with self._context_lock:
+            words = self._context_words.get(key)
+            if words is not None:
+                self._context_words.move_to_end(key)
+                self._context_hits += 1
+                return words
+            self._context_misses += 1
+        
+        words = frozenset(self._extract_content_words(context))
+        
+        with self._context_lock:
+            self._context_words[key] = words
+            self._context_words.move_to_end(key)
+            while len(self._context_words) > self.max_cached_contexts:
+                self._context_words.popitem(last=False)
+        return words
+    
+    def get_context_cache_stats(self) -> dict:
+        """
+        Get statistics of the context word cache.
+        
+        Returns:
+            Dictionary with cached context count, hits and misses
+        """
+        with self._context_lock:
+            return {
+                'contexts': len(self._context_words),
+                'max_contexts': self.max_cached_contexts,
+                'hits': self._context_hits,
+                'misses': self._context_misses
+            }
+    
     def _contains_external_knowledge(self, response: str, context: str) -> bool:
         """
         Check if response contains information not present in context.
@@ -199,73 +372,188 @@ class GuardAgent:
             True if external knowledge detected, False otherwise
         """
         response_words = self._extract_content_words(response)
-        context_words = self._extract_content_words(context)
+        context_words = self._get_context_words(context)
         
         # Check for significant content words not in context
         external_words = response_words - context_words
         
         # Allow some external words (like connecting words, general terms)
         # But flag if too many specific terms are not in context
-        if len(external_words) > len(response_words) * 0.4:  # More than 40% external
+        if len(external_words) > len(response_words) * self.max_external_ratio:
             return True
         
         # Check for specific external knowledge indicators
-        external_indicators = {
-            'wikipedia', 'google', 'internet', 'website', 'online', 'research',
-            'study', 'survey', 'report', 'statistics', 'data', 'according',
-            'experts', 'scientists', 'government', 'official', 'ministry'
-        }
-        
-        if external_words.intersection(external_indicators):
+        if external_words.intersection(self.external_indicators):
             return True
         
         return False
     
-    def get_validation_details(self, response: str, context: str) -> dict:
+    def ground_response(self, response: str, chunks: Tuple[ContextChunk, ...]) -> List[SentenceSupport]:
+        """
+        Score how well the retrieved chunks support each sentence of a response.
+        
+        A sentence's shingles (its words and consecutive word pairs, see
+        rag_retriever.text_shingles) are looked up in each chunk's shingle set,
+        which was built when the chunk was indexed. The cost grows with the
+        response length and the number of chunks, not the size of the city file.
+        
+        Args:
+            response: Response text
+            chunks: Retrieved chunks the model was given
+            
+        Returns:
+            Support of each sentence that has at least one word, in order
+        """
+        supports = []
+        for sentence in SENTENCE_BOUNDARY.split(response or ""):
+            sentence = sentence.strip()
+            shingles = text_shingles(shingle_terms(sentence))
+            if not shingles:
+                continue
+            
+            matched = 0
+            chunk_hits = {}
+            for shingle in shingles:
+                found = False
+                for chunk in chunks:
+                    if shingle in chunk.shingles:
+                        chunk_hits[chunk.chunk_id] = chunk_hits.get(chunk.chunk_id, 0) + 1
+                        found = True
+                matched += found
+            
+            supports.append(SentenceSupport(
+                sentence=sentence,
+                score=matched / len(shingles),
+                chunk_ids=sorted(chunk_hits, key=chunk_hits.get, reverse=True)
+            ))
+        return supports
+    
+    def evaluate_grounded(self, response: str, chunks: Tuple[ContextChunk, ...],
+                          full: bool = False) -> GuardVerdict:
+        """
+        Run the guard checks against the retrieved chunks instead of the whole file.
+        
+        Refusals and suspicious patterns are handled as in evaluate. Then
+        every sentence with at least min_sentence_terms words must reach
+        min_sentence_support; a response with no such sentence is judged as
+        a whole. External knowledge indicators missing from the chunks fail
+        the response.
+        
+        Args:
+            response: Generated response text
+            chunks: Retrieved chunks the model was given
+            full: Compute every field even after a check fails
+            
+        Returns:
+            GuardVerdict with per-sentence support
+        """
+        verdict = GuardVerdict(is_valid=False)
+        if (not response or not chunks) and not full:
+            verdict.reason = "empty response or context"
+            return verdict
+        
+        verdict.is_refusal = self._is_standardized_refusal(response)
+        if verdict.is_refusal and not full:
+            verdict.is_valid = True
+            return verdict
+        
+        verdict.has_suspicious_patterns = self._contains_suspicious_patterns(response)
+        if verdict.has_suspicious_patterns and not full:
+            verdict.reason = "suspicious pattern"
+            return verdict
+        
+        verdict.sentence_support = self.ground_response(response, chunks)
+        judged = [support for support in verdict.sentence_support
+                  if len(shingle_terms(support.sentence)) >= self.min_sentence_terms]
+        if not judged and verdict.sentence_support:
+            judged = self.ground_response(" ".join(s.sentence for s in verdict.sentence_support), chunks)
+        
+        verdict.response_words = self._extract_content_words(response)
+        verdict.external_words = {word for word in verdict.response_words
+                                  if not any(word in chunk.token_set for chunk in chunks)}
+        verdict.overlap_words = verdict.response_words - verdict.external_words
+        
+        if not response or not chunks:
+            verdict.reason = "empty response or context"
+        elif verdict.is_refusal:
+            verdict.is_valid = True
+        elif verdict.has_suspicious_patterns:
+            verdict.reason = "suspicious pattern"
+        elif not judged or any(support.score < self.min_sentence_support for support in judged):
+            verdict.reason = "sentence not supported by the retrieved context"
+        elif verdict.external_words & self.external_indicators:
+            verdict.reason = "external knowledge indicator"
+        else:
+            verdict.is_valid = True
+        return verdict
+    
+    def create_stream_guard(self, context: str, content_hash: Optional[str] = None,
+                            chunks: Tuple[ContextChunk, ...] = ()) -> "StreamingGuard":
+        """
+        Create a guard that checks a response while it is being generated.
+        
+        In grounded mode a stream with retrieved chunks is checked against
+        those chunks, as validate_response_object checks the finished response.
+        
+        Args:
+            context: Source context content
+            content_hash: Hash of the context, computed if not given
+            chunks: Retrieved chunks the model was given
+            
+        Returns:
+            StreamingGuard for one response
+        """
+        return StreamingGuard(self, context, content_hash=content_hash, chunks=chunks)
+    
+    def get_validation_details(self, response: str, context: str, content_hash: Optional[str] = None) -> dict:
         """
         Get detailed validation information for debugging.
         
         Args:
             response: Response text
             context: Context text
+            content_hash: Hash of the context, computed if not given
             
         Returns:
             Dictionary with validation details
         """
-        is_valid = self.validate_response(response, context)
-        
-        response_words = self._extract_content_words(response)
-        context_words = self._extract_content_words(context)
-        overlap = response_words.intersection(context_words)
-        external_words = response_words - context_words
-        
-        overlap_ratio = len(overlap) / len(response_words) if response_words else 0
+        verdict = self.evaluate(response, context, full=True, content_hash=content_hash)
         
         return {
-            'is_valid': is_valid,
-            'is_refusal': self._is_standardized_refusal(response),
-            'has_suspicious_patterns': self._contains_suspicious_patterns(response),
-            'overlap_ratio': overlap_ratio,
-            'response_word_count': len(response_words),
-            'context_word_count': len(context_words),
-            'overlap_word_count': len(overlap),
-            'external_word_count': len(external_words),
-            'external_words': list(external_words)[:10],  # First 10 external words
-            'overlap_words': list(overlap)[:10]  # First 10 overlap words
+            'is_valid': verdict.is_valid,
+            'reason': verdict.reason,
+            'is_refusal': verdict.is_refusal,
+            'has_suspicious_patterns': verdict.has_suspicious_patterns,
+            'overlap_ratio': verdict.overlap_ratio,
+            'response_word_count': len(verdict.response_words),
+            'context_word_count': verdict.context_word_count,
+            'overlap_word_count': len(verdict.overlap_words),
+            'external_word_count': len(verdict.external_words),
+            'external_words': list(verdict.external_words)[:10],  # First 10 external words
+            'overlap_words': list(verdict.overlap_words)[:10]  # First 10 overlap words
         }
     
-    def validate_response_object(self, response_obj: Response, context: str) -> Response:
+    def validate_response_object(self, response_obj: Response, context: str,
+                                 content_hash: Optional[str] = None) -> Response:
         """
         Validate a Response object and update its validation status.
         
+        In grounded mode a response that carries the retrieved chunks it was
+        generated from is checked against those chunks; otherwise it is
+        checked against the whole context.
+        
         Args:
             response_obj: Response object to validate
             context: Source context content
+            content_hash: Hash of the context, computed if not given
             
         Returns:
             Updated Response object
         """
-        is_valid = self.validate_response(response_obj.text, context)
+        if self.mode == 'grounded' and response_obj.source_chunks:
+            is_valid = self.evaluate_grounded(response_obj.text, response_obj.source_chunks).is_valid
+        else:
+            is_valid = self.validate_response(response_obj.text, context, content_hash)
         
         if not is_valid:
             # Force refusal and update response object
@@ -279,6 +567,26 @@ class GuardAgent:
         
         return response_obj
     
+    async def validate_response_object_async(self, response_obj: Response, context: str,
+                                             executor: Optional[Executor] = None,
+                                             content_hash: Optional[str] = None) -> Response:
+        """
+        Validate a Response object without blocking the event loop.
+        
+        Args:
+            response_obj: Response object to validate
+            context: Source context content
+            executor: Executor for the validation work, or None for the loop default
+            content_hash: Hash of the context, computed if not given
+            
+        Returns:
+            Updated Response object
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            executor, self.validate_response_object, response_obj, context, content_hash
+        )
+    
     def batch_validate_responses(self, responses: List[str], context: str) -> List[Tuple[str, bool]]:
         """
         Validate multiple responses in batch.
@@ -290,34 +598,210 @@ class GuardAgent:
         Returns:
             List of tuples (response_text, is_valid)
         """
+        content_hash = hashlib.md5(context.encode()).hexdigest()
         results = []
         for response in responses:
-            is_valid = self.validate_response(response, context)
+            is_valid = self.validate_response(response, context, content_hash)
             results.append((response, is_valid))
         
         return results
     
-    def get_refusal_statistics(self, responses: List[str]) -> dict:
+    def get_refusal_statistics(self, responses: Iterable[str]) -> dict:
         """
-        Get statistics about refusal responses.
+        Get statistics about refusal responses in one pass.
+        
+        For logs too large for memory, see batch_guard.BatchGuardValidator.
         
         Args:
-            responses: List of response texts
+            responses: Response texts, e.g. a list or a generator
             
         Returns:
             Dictionary with refusal statistics
         """
-        total_responses = len(responses)
-        refusal_count = sum(1 for response in responses if self._is_standardized_refusal(response))
-        
-        refusal_breakdown = {}
-        for refusal in self.standardized_refusals:
-            count = sum(1 for response in responses if refusal in response)
-            refusal_breakdown[refusal] = count
+        total_responses = 0
+        refusal_count = 0
+        refusal_breakdown = {refusal: 0 for refusal in self.standardized_refusals}
+        for response in responses:
+            total_responses += 1
+            matched = False
+            for refusal in self.standardized_refusals:
+                if refusal in response:
+                    refusal_breakdown[refusal] += 1
+                    matched = True
+            refusal_count += matched
         
         return {
             'total_responses': total_responses,
             'refusal_count': refusal_count,
             'refusal_rate': refusal_count / total_responses if total_responses > 0 else 0,
             'refusal_breakdown': refusal_breakdown
-        }
\ No newline at end of file
+        }
+
+class StreamingGuard:
+    """
+    Incremental guard for one streamed response.
+    
+    Text is checked one sentence-sized window at a time as chunks arrive.
+    Suspicious patterns and external-knowledge indicators are tracked in
+    running state, together with the running share of content words that
+    are not in the context. In grounded mode with retrieved chunks, each
+    sentence must instead be supported by the chunks, as in
+    GuardAgent.evaluate_grounded. Only text that has passed the checks is
+    released to the caller, and once the running verdict crosses the
+    refusal threshold the stream is rejected so generation can be cancelled.
+    
+    The full-response check in GuardAgent.validate_response_object still
+    decides the final verdict of streams that are not rejected. Released
+    text has already reached the caller by then, so if that check fails the
+    stream's final Response is the refusal, which callers show in place of
+    the streamed text.
+    """
+    
+    # Characters that end a sentence-sized window
+    WINDOW_END = re.compile(r'[.!?\n]')
+    
+    def __init__(self, guard: GuardAgent, context: str, min_words: int = 12,
+                 max_external_ratio: float = 0.4, content_hash: Optional[str] = None,
+                 chunks: Tuple[ContextChunk, ...] = ()):
+        """
+        Initialize the streaming guard.
+        
+        Args:
+            guard: Guard agent providing patterns and word lists
+            context: Source context content
+            min_words: Content words needed before the external word ratio is judged
+            max_external_ratio: Share of content words not in the context that rejects the stream
+            content_hash: Hash of the context, computed if not given
+            chunks: Retrieved chunks the model was given, used in grounded mode
+        """
+        self.guard = guard
+        self.chunks = tuple(chunks) if guard.mode == 'grounded' else ()
+        self.context_words = (frozenset() if self.chunks
+                              else guard._get_context_words(context, content_hash))
+        self.min_words = min_words
+        self.max_external_ratio = max_external_ratio
+        
+        self._pending = ""
+        self.response_words: Set[str] = set()
+        self.external_words: Set[str] = set()
+        self.is_refusal = False
+        self.rejected = False
+        self.reason: Optional[str] = None
+        
+        # Grounded mode: whether a long enough sentence was judged, and the short ones
+        self._judged_sentence = False
+        self._short_sentences: List[str] = []
+    
+    def feed(self, chunk: str) -> str:
+        """
+        Add a streamed chunk and check every completed window.
+        
+        Args:
+            chunk: Newly generated text
+            
+        Returns:
+            Text that passed the checks and may be shown; empty once rejected
+        """
+        if self.rejected:
+            return ""
+        
+        self._pending += chunk
+        last_end = None
+        for last_end in self.WINDOW_END.finditer(self._pending):
+            pass
+        if last_end is None:
+            return ""
+        
+        window = self._pending[:last_end.end()]
+        self._pending = self._pending[last_end.end():]
+        return self._check_window(window)
+    
+    def flush(self) -> str:
+        """
+        Check the text after the last window end, once the stream has ended.
+        
+        Returns:
+            Remaining text that passed the checks
+        """
+        window, self._pending = self._pending, ""
+        released = self._check_window(window) if window and not self.rejected else ""
+        
+        if (self.chunks and self._short_sentences and not self._judged_sentence
+                and not self.rejected and not self.is_refusal):
+            # No sentence was long enough to judge alone, so judge them together
+            supports = self.guard.ground_response(" ".join(self._short_sentences), self.chunks)
+            if not supports or any(support.score < self.guard.min_sentence_support for support in supports):
+                return self._reject("sentence not supported by the retrieved context")
+        return released
+    
+    def _check_window(self, window: str) -> str:
+        """
+        Update the running state with one window and decide whether to go on.
+        
+        Args:
+            window: Completed sentence-sized text
+            
+        Returns:
+            The window if it passed, otherwise an empty string
+        """
+        if self.is_refusal:
+            return window
+        
+        if self.guard._is_standardized_refusal(window):
+            # Refusals always pass validation, so nothing after them can fail it
+            self.is_refusal = True
+            return window
+        
+        if self.guard._contains_suspicious_patterns(window):
+            return self._reject("suspicious pattern")
+        
+        if self.chunks:
+            return self._check_grounded_window(window)
+        
+        words = self.guard._extract_content_words(window)
+        new_external = words - self.context_words
+        self.response_words |= words
+        self.external_words |= new_external
+        
+        if new_external & self.guard.external_indicators:
+            return self._reject("external knowledge indicator")
+        
+        if (len(self.response_words) >= self.min_words and
+                len(self.external_words) > len(self.response_words) * self.max_external_ratio):
+            return self._reject("too many words outside the context")
+        
+        return window
+    
+    def _check_grounded_window(self, window: str) -> str:
+        """
+        Check one window against the retrieved chunks.
+        
+        Args:
+            window: Completed sentence-sized text
+            
+        Returns:
+            The window if it passed, otherwise an empty string
+        """
+        for support in self.guard.ground_response(window, self.chunks):
+            if len(shingle_terms(support.sentence)) < self.guard.min_sentence_terms:
+                self._short_sentences.append(support.sentence)
+                continue
+            self._judged_sentence = True
+            if support.score < self.guard.min_sentence_support:
+                return self._reject("sentence not supported by the retrieved context")
+        
+        words = self.guard._extract_content_words(window)
+        new_external = {word for word in words
+                        if not any(word in chunk.token_set for chunk in self.chunks)}
+        self.response_words |= words
+        self.external_words |= new_external
+        
+        if new_external & self.guard.external_indicators:
+            return self._reject("external knowledge indicator")
+        return window
+    
+    def _reject(self, reason: str) -> str:
+        """Mark the stream as rejected."""
+        self.rejected = True
+        self.reason = reason
+        return ""
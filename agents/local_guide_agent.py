@@ -4,7 +4,11 @@ Primary agent using Amazon Nova Premier via Bedrock for response generation with
 """
 import os
 import sys
-from typing import Optional
+import hashlib
+import asyncio
+import threading
+from concurrent.futures import Executor
+from typing import AsyncIterator, Callable, List, Optional, Tuple
 from strands import Agent
 from strands.models import BedrockModel
 from datetime import datetime
@@ -13,7 +17,11 @@ from datetime import datetime
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from models import Response, CityContext
-from rag_retriever import RAGRetriever
+from rag_retriever import RAGRetriever, TIME_SENSITIVE_KEYWORDS
+from rag_index_store import RetrievalIndexStore
+from retrieval_cache import RetrievalCache
+from prompt_builder import PromptBuilder, PromptCacheStats
+from agent_pool import AgentPool
 
 
 class LocalGuideAgent:
@@ -22,9 +30,12 @@ class LocalGuideAgent:
     def __init__(self):
         """Initialize the Local Guide Agent with Nova Premier model and RAG."""
         self.model = self._configure_model()
-        self.agent = self._create_agent()
+        self.agent_pool = AgentPool()
         self.system_prompt_template = self._load_system_prompt()
-        self.rag_retriever = RAGRetriever()
+        self.rag_retriever = self._create_retriever()
+        self.prompt_builder = self._create_prompt_builder()
+        self.prompt_caching = os.getenv("PROMPT_CACHING", "true").lower() != "false"
+        self.prompt_cache_stats = PromptCacheStats()
     
     def _configure_model(self) -> BedrockModel:
         """
@@ -53,6 +64,49 @@ class LocalGuideAgent:
                 max_tokens=2048,
             )
     
+    def _create_retriever(self) -> RAGRetriever:
+        """
+        Create the RAG retriever for the configured retrieval mode.
+        
+        RETRIEVAL_MODE selects 'lexical' (default), 'vector' or 'hybrid'.
+        Vector and hybrid retrieval use a local hashing embedder whose
+        concept groups are the supported topic keywords and the time-of-day
+        keywords.
+        
+        Returns:
+            Configured RAGRetriever instance
+        """
+        retrieval_mode = os.getenv("RETRIEVAL_MODE", "lexical").lower()
+        if retrieval_mode == "lexical":
+            return RAGRetriever(index_store=RetrievalIndexStore(), cache=RetrievalCache())
+        
+        from embedding_index import HashingEmbedder
+        from agents.query_validator import QueryValidationAgent
+        
+        concept_groups = dict(QueryValidationAgent().topic_keywords)
+        concept_groups.update(TIME_SENSITIVE_KEYWORDS)
+        
+        return RAGRetriever(
+            index_store=RetrievalIndexStore(),
+            embedder=HashingEmbedder(concept_groups=concept_groups),
+            retrieval_mode=retrieval_mode,
+            cache=RetrievalCache()
+        )
+    
+    def _create_prompt_builder(self) -> PromptBuilder:
+        """
+        Create the prompt builder for the configured prompt mode.
+        
+        PROMPT_MODE selects 'rag-only' (default) or 'full-context', and
+        PROMPT_TOKEN_BUDGET caps the estimated context tokens in rag-only mode.
+        
+        Returns:
+            Configured PromptBuilder instance
+        """
+        prompt_mode = os.getenv("PROMPT_MODE", "rag-only").lower()
+        token_budget = int(os.getenv("PROMPT_TOKEN_BUDGET", "1200"))
+        return PromptBuilder(mode=prompt_mode, token_budget=token_budget)
+    
     def _load_system_prompt(self) -> str:
         """
         Load system prompt from file.
@@ -99,35 +153,98 @@ RESPONSE STYLE:
 
 Remember: Your role is to provide accurate local guidance based solely on the authoritative context provided for the selected city."""
     
-    def _create_agent(self) -> Agent:
+    def _create_agent(self, system_prompt: List[dict]) -> Agent:
         """
         Create Strands agent with configured model.
         
+        Args:
+            system_prompt: System prompt content blocks
+            
         Returns:
             Configured Agent instance
         """
         return Agent(
             model=self.model,
+            system_prompt=system_prompt,
             tools=[],  # No tools needed for this agent
+            callback_handler=None  # Output is returned or streamed to the caller, not printed
         )
     
+    def prepare_city_context(self, city_context: CityContext) -> None:
+        """
+        Load the retrieval index for a city ahead of its first query.
+        
+        When the city was loaded before from other content, the new index
+        replaces the old one and pooled agents built for the city are dropped.
+        
+        Args:
+            city_context: Loaded city context
+        """
+        city_lower = city_context.city_name.lower()
+        previous = self.rag_retriever.indexes.get(city_lower)
+        
+        self.rag_retriever.load_city_context(city_context)
+        
+        if previous is not None and previous.content_hash != city_context.get_content_hash():
+            # Their system prompts may embed the old content
+            self.agent_pool.invalidate(lambda key: key[0] == city_lower)
+    
+    def release_city_context(self, city_context: CityContext) -> None:
+        """
+        Drop the retrieval index and pooled agents of an unloaded city.
+        
+        Nothing is dropped if the city has since been loaded from other content.
+        
+        Args:
+            city_context: City context that was unloaded
+        """
+        city_lower = city_context.city_name.lower()
+        if self.rag_retriever.unload_city(city_lower, city_context.get_content_hash()):
+            self.agent_pool.invalidate(lambda key: key[0] == city_lower)
+    
     def apply_system_prompt(self, context: str) -> str:
         """
         Apply system prompt with city context.
         
         Args:
-            context: City-specific context content
+            context: City-specific context content; empty when the local
+                     information is sent with each question instead
             
         Returns:
             Complete system prompt with context
         """
+        if not context:
+            return self.system_prompt_template + "\n\nRemember: Use ONLY the LOCAL INFORMATION provided with each question. Do not use any external knowledge."
+        
         context_section = f"\n\nCITY CONTEXT:\n{context}\n\nRemember: Use ONLY the information provided in the CITY CONTEXT above. Do not use any external knowledge."
         return self.system_prompt_template + context_section
     
+    def build_system_prompt(self, context: str) -> List[dict]:
+        """
+        Build the system prompt as content blocks ending in a cache checkpoint.
+        
+        The system prompt holds only text shared by every query for a city,
+        so Bedrock can reuse the cached prefix across requests.
+        
+        Args:
+            context: Stable city context for the system prompt
+            
+        Returns:
+            System prompt content blocks
+        """
+        blocks = [{"text": self.apply_system_prompt(context)}]
+        if self.prompt_caching:
+            blocks.append({"cachePoint": {"type": "default"}})
+        return blocks
+    
     def generate_response(self, query: str, context: str, city: str = "") -> str:
         """
         Generate response using Nova Premier with RAG-enhanced context.
         
+        The prompt is laid out for prefix caching: system prompt and stable
+        city context first, followed by a cache checkpoint, then the time
+        context, retrieved chunks and query.
+        
         Args:
             query: User query text
             context: City-specific context content
@@ -136,51 +253,260 @@ Remember: Your role is to provide accurate local guidance based solely on the au
         Returns:
             Generated response text
         """
+        return self._generate(query, context, city)[0]
+    
+    def _generate(self, query: str, context: str, city: str,
+                  content_hash: Optional[str] = None) -> Tuple[str, tuple]:
+        """
+        Generate a response and report the retrieved chunks it was given.
+        
+        Args:
+            query: User query text
+            context: City-specific context content
+            city: City name for RAG retrieval
+            content_hash: Hash of the context, computed if not given
+            
+        Returns:
+            Tuple of (generated response text, retrieved chunks in the prompt)
+        """
         if not query or not query.strip():
-            return "This isn't covered in my local context."
+            return "This isn't covered in my local context.", ()
         
         if not context or not context.strip():
-            return "I don't have enough local data to answer that."
+            return "I don't have enough local data to answer that.", ()
         
         try:
-            # Load context into RAG retriever if not already loaded
-            if city and city.lower() not in self.rag_retriever.context_chunks:
-                self.rag_retriever.load_context_chunks(city, context)
+            pool_key, make_agent, user_message, source_chunks = self._prepare_invocation(
+                query, context, city, content_hash
+            )
+            with self.agent_pool.lease(pool_key, make_agent) as context_agent:
+                # Generate response
+                response = context_agent(user_message)
+                self._record_usage(response)
             
-            # Get RAG-enhanced context
-            if city:
-                rag_context = self.rag_retriever.build_rag_context(query, city)
-                enhanced_context = f"{rag_context}\n\nFULL CONTEXT:\n{context}"
+            # Ensure response is a string
+            if hasattr(response, 'text'):
+                return response.text, source_chunks
+            elif isinstance(response, str):
+                return response, source_chunks
             else:
-                enhanced_context = context
+                return str(response), source_chunks
+                
+        except Exception as e:
+            # Log error and return refusal
+            print(f"Error generating response: {str(e)}")
+            return "My knowledge is limited to what's in the context file.", ()
+    
+    async def generate_response_async(self, query: str, context: str, city: str = "",
+                                      executor: Optional[Executor] = None) -> str:
+        """
+        Generate a response without blocking the event loop.
+        
+        Retrieval and prompt assembly run in an executor; the model call is
+        awaited, so other requests proceed while it is in flight.
+        
+        Args:
+            query: User query text
+            context: City-specific context content
+            city: City name for RAG retrieval
+            executor: Executor for retrieval work, or None for the loop default
             
-            # Apply system prompt with enhanced context
-            full_system_prompt = self.apply_system_prompt(enhanced_context)
+        Returns:
+            Generated response text
+        """
+        return (await self._generate_async(query, context, city, executor))[0]
+    
+    async def _generate_async(self, query: str, context: str, city: str,
+                              executor: Optional[Executor] = None,
+                              content_hash: Optional[str] = None) -> Tuple[str, tuple]:
+        """
+        Generate a response without blocking the event loop and report the
+        retrieved chunks it was given.
+        
+        Args:
+            query: User query text
+            context: City-specific context content
+            city: City name for RAG retrieval
+            executor: Executor for retrieval work, or None for the loop default
+            content_hash: Hash of the context, computed if not given
             
-            # Create a new agent instance with the context-specific system prompt
-            context_agent = Agent(
-                model=self.model,
-                system_prompt=full_system_prompt,
-                tools=[]
+        Returns:
+            Tuple of (generated response text, retrieved chunks in the prompt)
+        """
+        if not query or not query.strip():
+            return "This isn't covered in my local context.", ()
+        
+        if not context or not context.strip():
+            return "I don't have enough local data to answer that.", ()
+        
+        try:
+            loop = asyncio.get_running_loop()
+            pool_key, make_agent, user_message, source_chunks = await loop.run_in_executor(
+                executor, self._prepare_invocation, query, context, city, content_hash
             )
+            with self.agent_pool.lease(pool_key, make_agent) as context_agent:
+                response = await context_agent.invoke_async(user_message)
+                self._record_usage(response)
             
-            # Generate response
-            response = context_agent(query)
+            return str(response), source_chunks
+                
+        except Exception as e:
+            # Log error and return refusal
+            print(f"Error generating response: {str(e)}")
+            return "My knowledge is limited to what's in the context file.", ()
+    
+    async def create_response_object_async(self, query: str, context: str, city: str,
+                                           executor: Optional[Executor] = None,
+                                           content_hash: Optional[str] = None) -> Response:
+        """
+        Create a Response object without blocking the event loop.
+        
+        Args:
+            query: User query text
+            context: City-specific context content
+            city: Selected city name
+            executor: Executor for retrieval work, or None for the loop default
+            content_hash: Hash of the context, computed if not given
             
-            # Ensure response is a string
-            if hasattr(response, 'text'):
-                return response.text
-            elif isinstance(response, str):
-                return response
-            else:
-                return str(response)
+        Returns:
+            Response object with generated content
+        """
+        response_text, source_chunks = await self._generate_async(query, context, city, executor, content_hash)
+        return self.build_response_object(response_text, city, source_chunks)
+    
+    async def stream_response(self, query: str, context: str, city: str = "",
+                              cancel_signal: Optional[threading.Event] = None,
+                              executor: Optional[Executor] = None,
+                              sources: Optional[list] = None,
+                              content_hash: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Stream a response as the model generates it.
+        
+        Uses the same prompt layout and agent pool as generate_response.
+        
+        Args:
+            query: User query text
+            context: City-specific context content
+            city: City name for RAG retrieval
+            cancel_signal: Set to stop generation; the stream then ends early
+            executor: Executor for retrieval work, or None for the loop default
+            sources: List that receives the retrieved chunks given to the model
+            content_hash: Hash of the context, computed if not given
+            
+        Yields:
+            Text chunks of the generated response
+            
+        Raises:
+            Exception: The model's error, if it fails after text was yielded;
+                       the refusal is yielded only when nothing was, so it is
+                       never appended to a partial answer
+        """
+        if not query or not query.strip():
+            yield "This isn't covered in my local context."
+            return
+        
+        if not context or not context.strip():
+            yield "I don't have enough local data to answer that."
+            return
+        
+        streamed = False
+        try:
+            loop = asyncio.get_running_loop()
+            pool_key, make_agent, user_message, source_chunks = await loop.run_in_executor(
+                executor, self._prepare_invocation, query, context, city, content_hash
+            )
+            if sources is not None:
+                sources.extend(source_chunks)
+            context_agent = self.agent_pool.acquire(pool_key, make_agent)
+            events = context_agent.stream_async(user_message, cancel_signal=cancel_signal)
+            try:
+                async for event in events:
+                    if "data" in event:
+                        streamed = True
+                        yield event["data"]
+                    elif "result" in event:
+                        self._record_usage(event["result"])
+            finally:
+                await events.aclose()
+                self.agent_pool.release(pool_key, context_agent)
                 
         except Exception as e:
             # Log error and return refusal
             print(f"Error generating response: {str(e)}")
-            return "My knowledge is limited to what's in the context file."
+            if streamed:
+                raise
+            yield "My knowledge is limited to what's in the context file."
+    
+    def _prepare_invocation(self, query: str, context: str, city: str,
+                            content_hash: Optional[str] = None) -> Tuple[tuple, Callable[[], Agent], str, tuple]:
+        """
+        Build the pool key, agent factory, user message and prompt chunks for a query.
+        
+        Chunks are retrieved from the index built from this context, so a
+        query keeps a consistent snapshot while its city is reloaded.
+        
+        Args:
+            query: User query text
+            context: City-specific context content
+            city: City name for RAG retrieval
+            content_hash: Hash of the context, computed if not given
+            
+        Returns:
+            Tuple of (agent pool key, agent factory, user message, retrieved
+            chunks in the prompt; empty when the whole file is sent)
+        """
+        # Get budgeted RAG context; retrieved text is never sent twice
+        if city:
+            prompt_context = self.prompt_builder.build(query, city, self.rag_retriever, context, content_hash)
+            stable_context = prompt_context.city_context
+            user_message = f"{prompt_context.text}\n\nQUESTION: {query}"
+            source_chunks = prompt_context.chunks
+        else:
+            stable_context = context
+            user_message = query
+            source_chunks = ()
+        
+        # Reuse a pooled agent built for this city's system prompt
+        pool_key = (
+            city.lower(),
+            hashlib.md5(stable_context.encode('utf-8')).hexdigest(),
+            self.prompt_caching
+        )
+        return (pool_key, lambda: self._create_agent(self.build_system_prompt(stable_context)),
+                user_message, source_chunks)
     
-    def create_response_object(self, query: str, context: str, city: str) -> Response:
+    def _record_usage(self, response) -> None:
+        """
+        Record the cached and uncached input tokens of a model response.
+        
+        Args:
+            response: Agent result; responses without usage data are ignored
+        """
+        invocation = getattr(getattr(response, 'metrics', None), 'latest_agent_invocation', None)
+        usage = getattr(invocation, 'usage', None)
+        if isinstance(usage, dict):
+            self.prompt_cache_stats.record(usage)
+    
+    def get_agent_pool_stats(self) -> dict:
+        """
+        Get agent pool statistics.
+        
+        Returns:
+            Dictionary with agent pool statistics
+        """
+        return self.agent_pool.get_stats()
+    
+    def get_prompt_cache_stats(self) -> dict:
+        """
+        Get cached vs uncached input token totals.
+        
+        Returns:
+            Dictionary with prompt cache statistics
+        """
+        return self.prompt_cache_stats.get_stats()
+    
+    def create_response_object(self, query: str, context: str, city: str,
+                               content_hash: Optional[str] = None) -> Response:
         """
         Create a Response object with generated content using RAG.
         
@@ -188,12 +514,26 @@ Remember: Your role is to provide accurate local guidance based solely on the au
             query: User query text
             context: City-specific context content
             city: Selected city name
+            content_hash: Hash of the context, computed if not given
             
         Returns:
             Response object with generated content
         """
-        response_text = self.generate_response(query, context, city)
+        response_text, source_chunks = self._generate(query, context, city, content_hash)
+        return self.build_response_object(response_text, city, source_chunks)
+    
+    def build_response_object(self, response_text: str, city: str, source_chunks: tuple = ()) -> Response:
+        """
+        Wrap generated text in a Response object, detecting refusals.
         
+        Args:
+            response_text: Generated response text
+            city: Selected city name
+            source_chunks: Retrieved chunks the model was given
+            
+        Returns:
+            Response object for the text
+        """
         # Check if response is a refusal
         refusal_phrases = [
             "This isn't covered in my local context.",
@@ -209,7 +549,8 @@ Remember: Your role is to provide accurate local guidance based solely on the au
             is_refusal=is_refusal,
             refusal_reason=refusal_reason,
             source_context=f"{city} context (RAG-enhanced)",
-            validation_passed=True  # Will be validated by Guard Agent
+            validation_passed=True,  # Will be validated by Guard Agent
+            source_chunks=tuple(source_chunks)
         )
     
     def validate_response_against_context(self, response_text: str, context: str) -> bool:
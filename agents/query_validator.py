@@ -5,19 +5,132 @@ Responsible for validating user queries are within supported scope.
 import re
 import os
 import sys
-from typing import List, Optional, Tuple
+import asyncio
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from models import Query
+from city_catalog import CityCatalog, get_catalog
+
+# Phrases that make a query naming a supported city a general question about it
+GENERAL_CITY_PHRASES = (
+    'tell me about', 'what about', 'about', 'describe', 'information',
+    'know about', 'learn about', 'explain', 'overview', 'guide'
+)
+
+
+def _is_word_char(char: str) -> bool:
+    """Check whether a character is a regex word character."""
+    return char.isalnum() or char == '_'
+
+
+class KeywordAutomaton:
+    """
+    Finds every keyword occurring in a text in a single regex scan.
+    
+    The keywords are compiled into one trie-shaped pattern inside a
+    lookahead, so each text position is tried once and yields the longest
+    keyword starting there. Keywords contained in that keyword are known
+    from construction, which recovers overlapping matches such as 'do'
+    inside 'dosa'. The result equals testing each keyword with the 'in'
+    operator, plus whether it also occurs as a whole word.
+    """
+    
+    def __init__(self, keywords: Iterable[str]):
+        """
+        Compile the keywords.
+        
+        Args:
+            keywords: Lowercase keywords, each starting and ending with a word character
+        """
+        self.keywords: Tuple[str, ...] = tuple(dict.fromkeys(keywords))
+        
+        # keyword -> (contained keyword, offset) for every occurrence inside it
+        self._contained: Dict[str, Tuple[Tuple[str, int], ...]] = {}
+        for keyword in self.keywords:
+            occurrences = []
+            for other in self.keywords:
+                start = keyword.find(other)
+                while start != -1:
+                    occurrences.append((other, start))
+                    start = keyword.find(other, start + 1)
+            self._contained[keyword] = tuple(occurrences)
+        
+        trie: dict = {}
+        for keyword in self.keywords:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[''] = True
+        self._pattern = re.compile(f'(?=({self._trie_pattern(trie)}))') if self.keywords else None
+    
+    @classmethod
+    def _trie_pattern(cls, node: dict) -> str:
+        """Build a regex from a trie, preferring longer keywords."""
+        branches = [re.escape(char) + cls._trie_pattern(child)
+                    for char, child in sorted(node.items()) if char]
+        if '' in node:
+            branches.append('')  # A keyword ends here; tried after the longer ones
+        if len(branches) == 1:
+            return branches[0]
+        return '(?:' + '|'.join(branches) + ')'
+    
+    def scan(self, text: str) -> Dict[str, bool]:
+        """
+        Find the keywords in a text.
+        
+        Args:
+            text: Lowercase text
+            
+        Returns:
+            Mapping of each keyword found to whether it occurs as a whole word
+        """
+        found: Dict[str, bool] = {}
+        if self._pattern is None:
+            return found
+        
+        length = len(text)
+        for match in self._pattern.finditer(text):
+            position = match.start()
+            for keyword, offset in self._contained[match.group(1)]:
+                if found.get(keyword):
+                    continue
+                start = position + offset
+                end = start + len(keyword)
+                found[keyword] = ((start == 0 or not _is_word_char(text[start - 1])) and
+                                  (end == length or not _is_word_char(text[end])))
+        return found
+
+
+@dataclass(frozen=True)
+class TopicScan:
+    """Keyword matches of one query, shared by the topic checks."""
+    keyword_hits: Dict[str, bool]  # Keyword found -> whether it occurs as a whole word
+    topic_scores: Dict[str, int]  # 2 per whole-word keyword, 1 per partial match
+    has_general_phrase: bool  # Contains a phrase from GENERAL_CITY_PHRASES
+    
+    @property
+    def topics(self) -> List[str]:
+        """Topics with at least one keyword in the query, in topic order."""
+        return [topic for topic, score in self.topic_scores.items() if score > 0]
 
 
 class QueryValidationAgent:
     """Agent responsible for validating user queries against supported topics."""
     
-    def __init__(self):
-        """Initialize the Query Validation Agent."""
+    def __init__(self, city_catalog: Optional[CityCatalog] = None):
+        """
+        Initialize the Query Validation Agent.
+        
+        Args:
+            city_catalog: Catalog of supported cities, the default context directory's if omitted
+        """
+        self.city_catalog = city_catalog or get_catalog()
         self.supported_topics = ['food', 'transport', 'slang', 'safety', 'lifestyle']
         
         # Keywords for each supported topic
@@ -55,6 +168,55 @@ class QueryValidationAgent:
                 'today', 'currently', 'what', 'where', 'when', 'recommend', 'suggest'
             ]
         }
+        
+        self.compile_keywords()
+    
+    def compile_keywords(self) -> None:
+        """
+        Compile the topic keywords and general city phrases into one automaton.
+        
+        Call again after changing topic_keywords.
+        """
+        self._keyword_topics: Dict[str, Tuple[str, ...]] = {}
+        for topic, keywords in self.topic_keywords.items():
+            for keyword in keywords:
+                self._keyword_topics[keyword] = self._keyword_topics.get(keyword, ()) + (topic,)
+        self._general_phrases: FrozenSet[str] = frozenset(GENERAL_CITY_PHRASES)
+        self._automaton = KeywordAutomaton(list(self._keyword_topics) + list(GENERAL_CITY_PHRASES))
+        
+        # Each topic's keywords as one string, for finding query words inside keywords
+        self._topic_keyword_text = {topic: "\n".join(keywords) for topic, keywords in self.topic_keywords.items()}
+        
+        # Validation and rejection both check the topic of the same query
+        self._scan_cached = lru_cache(maxsize=256)(self._scan)
+    
+    def scan_query(self, query: str) -> TopicScan:
+        """
+        Match the topic keywords against a query in one pass.
+        
+        Args:
+            query: User query text
+            
+        Returns:
+            TopicScan shared by is_supported_topic, identify_topic and
+            get_topic_suggestions; do not modify it
+        """
+        return self._scan_cached((query or "").lower())
+    
+    def _scan(self, query_lower: str) -> TopicScan:
+        """Scan a lowercased query."""
+        keyword_hits = self._automaton.scan(query_lower)
+        topic_scores = {topic: 0 for topic in self.supported_topics}
+        for keyword, whole_word in keyword_hits.items():
+            for topic in self._keyword_topics.get(keyword, ()):
+                # Give higher score for exact word matches
+                topic_scores[topic] = topic_scores.get(topic, 0) + (2 if whole_word else 1)
+        
+        return TopicScan(
+            keyword_hits=keyword_hits,
+            topic_scores=topic_scores,
+            has_general_phrase=any(phrase in keyword_hits for phrase in self._general_phrases)
+        )
     
     def get_supported_topics(self) -> List[str]:
         """
@@ -78,29 +240,14 @@ class QueryValidationAgent:
         if not query or not query.strip():
             return False
         
-        query_lower = query.lower()
-        
-        # Allow general queries about the cities themselves
-        city_names = ['madurai', 'dindigul']
-        general_city_queries = [
-            'tell me about', 'what about', 'about', 'describe', 'information',
-            'know about', 'learn about', 'explain', 'overview', 'guide'
-        ]
-        
-        # Check if it's a general query about one of the supported cities
-        for city in city_names:
-            if city in query_lower:
-                for general_phrase in general_city_queries:
-                    if general_phrase in query_lower:
-                        return True
+        scan = self.scan_query(query)
         
         # Check if query contains keywords from any supported topic
-        for topic, keywords in self.topic_keywords.items():
-            for keyword in keywords:
-                if keyword in query_lower:
-                    return True
+        if scan.topics:
+            return True
         
-        return False
+        # Allow general queries about one of the supported cities
+        return scan.has_general_phrase and bool(self.city_catalog.find_cities(query.lower()))
     
     def identify_topic(self, query: str) -> Optional[str]:
         """
@@ -115,18 +262,7 @@ class QueryValidationAgent:
         if not query or not query.strip():
             return None
         
-        query_lower = query.lower()
-        topic_scores = {topic: 0 for topic in self.supported_topics}
-        
-        # Score each topic based on keyword matches
-        for topic, keywords in self.topic_keywords.items():
-            for keyword in keywords:
-                if keyword in query_lower:
-                    # Give higher score for exact word matches
-                    if re.search(r'\b' + re.escape(keyword) + r'\b', query_lower):
-                        topic_scores[topic] += 2
-                    else:
-                        topic_scores[topic] += 1
+        topic_scores = self.scan_query(query).topic_scores
         
         # Return topic with highest score, if any
         max_score = max(topic_scores.values())
@@ -239,15 +375,13 @@ class QueryValidationAgent:
             return self.supported_topics.copy()
         
         query_lower = query.lower()
+        matched_topics = set(self.scan_query(query).topics)
         suggestions = []
         
-        # Look for partial matches or related terms
-        for topic, keywords in self.topic_keywords.items():
-            for keyword in keywords:
-                if any(word in keyword for word in query_lower.split()):
-                    if topic not in suggestions:
-                        suggestions.append(topic)
-                    break
+        # Topics with a keyword in the query, or a query word inside one of their keywords
+        for topic, keyword_text in self._topic_keyword_text.items():
+            if topic in matched_topics or any(word in keyword_text for word in query_lower.split()):
+                suggestions.append(topic)
         
         # If no suggestions found, return all topics
         if not suggestions:
@@ -280,4 +414,20 @@ class QueryValidationAgent:
             timestamp=datetime.now(),
             is_valid=is_valid,
             validation_reason=rejection_reason
-        )
\ No newline at end of file
+        )
+    
+    async def create_validation_response_async(self, query_text: str, city: str,
+                                               executor: Optional[Executor] = None) -> Query:
+        """
+        Create a validated Query object without blocking the event loop.
+        
+        Args:
+            query_text: Raw query text
+            city: Selected city
+            executor: Executor for the validation work, or None for the loop default
+            
+        Returns:
+            Query object with validation results
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, self.create_validation_response, query_text, city)
@@ -86,18 +86,20 @@ def display_query_interface():
         
         # Process query
         if submit_button and query.strip():
-            with st.spinner("Thinking..."):
-                response = st.session_state.system.process_query(query)
-                
-                # Add to conversation history
-                st.session_state.conversation_history.append({
-                    'query': query,
-                    'response': response,
-                    'timestamp': datetime.now()
-                })
-                
-                # Rerun to refresh the interface
-                st.rerun()
+            # Show the answer as it is generated
+            stream = st.session_state.system.process_query_stream(query)
+            st.write_stream(stream)
+            response = stream.response
+            
+            # Add to conversation history
+            st.session_state.conversation_history.append({
+                'query': query,
+                'response': response,
+                'timestamp': datetime.now()
+            })
+            
+            # Rerun to refresh the interface
+            st.rerun()
         
         elif submit_button and not query.strip():
             st.warning("Please enter a question.")
@@ -0,0 +1,265 @@
+"""
+Offline batch guard for Local Guide AI.
+Validates large JSONL logs of generated responses with a pool of worker
+processes. Input is read lazily and verdicts are written as they complete,
+in input order, so memory stays bounded however long the log is.
+
+Each input line is a JSON object with the response text under "response"
+(or "text") and its city under "city"; an "id" is copied to the verdict.
+
+Usage:
+    python batch_guard.py responses.jsonl verdicts.jsonl [--workers N] [--chunk-size N]
+"""
+import os
+import sys
+import json
+import hashlib
+import time
+import argparse
+from collections import Counter, deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Add current directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from agents.guard_agent import GuardAgent
+from agents.context_loader import ContextLoaderAgent
+
+# Per-process state, set up once by _init_worker
+_worker_guard: Optional[GuardAgent] = None
+_worker_loader: Optional[ContextLoaderAgent] = None
+_worker_contexts: Dict[str, Tuple[str, str]] = {}  # city -> (context content, content hash)
+
+
+def iter_jsonl(path: str) -> Iterator[Tuple[int, str]]:
+    """
+    Read a JSONL file lazily.
+    
+    Args:
+        path: Path of the JSONL file
+        
+    Yields:
+        Tuples of (line number, raw line) for every non-blank line
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            if line.strip():
+                yield line_number, line
+
+
+def _init_worker(context_dir: str, contexts: Optional[Dict[str, str]]) -> None:
+    """
+    Set up a worker process: one guard and context cache shared by all its chunks.
+    
+    Args:
+        context_dir: Directory of the city context files
+        contexts: City name -> context content, used instead of the files if given
+    """
+    global _worker_guard, _worker_loader, _worker_contexts
+    _worker_guard = GuardAgent()
+    _worker_loader = ContextLoaderAgent(context_dir=context_dir)
+    _worker_contexts = {city.lower(): (content, hashlib.md5(content.encode()).hexdigest())
+                        for city, content in (contexts or {}).items()}
+
+
+def _context_for(city: str) -> Tuple[str, str]:
+    """Get a city's context and its content hash in a worker, reading its file on first use."""
+    city_lower = (city or "").lower()
+    context = _worker_contexts.get(city_lower)
+    if context is None:
+        city_context = _worker_loader.read_city_context(city_lower)
+        context = (city_context.context_content, city_context.get_content_hash())
+        _worker_contexts[city_lower] = context
+    return context
+
+
+def _validate_lines(lines: List[Tuple[int, str]]) -> List[dict]:
+    """
+    Validate one chunk of input lines in a worker.
+    
+    The guard caches each context's content words, so a worker extracts
+    them once per city for all the chunks it handles.
+    
+    Args:
+        lines: Tuples of (line number, raw JSON line)
+        
+    Returns:
+        One verdict dictionary per line, in order
+    """
+    verdicts = []
+    for line_number, line in lines:
+        verdict = {'line': line_number}
+        try:
+            record = json.loads(line)
+            if 'id' in record:
+                verdict['id'] = record['id']
+            response = record.get('response', record.get('text'))
+            if not isinstance(response, str):
+                raise ValueError("record has no response text")
+            city = record.get('city')
+            verdict['city'] = city
+            
+            context, content_hash = _context_for(city)
+            result = _worker_guard.evaluate(response, context, content_hash=content_hash)
+            verdict['is_valid'] = result.is_valid
+            verdict['is_refusal'] = result.is_refusal
+            verdict['reason'] = result.reason
+            verdict['refusals'] = [refusal for refusal in _worker_guard.standardized_refusals
+                                   if refusal in response]
+        except Exception as e:
+            verdict['error'] = str(e)
+        verdicts.append(verdict)
+    return verdicts
+
+
+class BatchGuardValidator:
+    """Validates JSONL response logs across worker processes with bounded memory."""
+    
+    def __init__(self, context_dir: str = "context", contexts: Optional[Dict[str, str]] = None,
+                 workers: Optional[int] = None, chunk_size: int = 500,
+                 max_pending_chunks: Optional[int] = None):
+        """
+        Initialize the batch validator.
+        
+        Args:
+            context_dir: Directory of the city context files
+            contexts: City name -> context content, used instead of the files if given
+            workers: Worker processes, defaults to the CPU count; 1 validates in this process
+            chunk_size: Lines sent to a worker at a time
+            max_pending_chunks: Chunks read ahead of the writer, defaults to twice the workers
+        """
+        self.context_dir = context_dir
+        self.contexts = contexts
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.max_pending_chunks = max_pending_chunks or self.workers * 2
+        self.standardized_refusals = GuardAgent().standardized_refusals
+    
+    def _chunks(self, lines: Iterable[Tuple[int, str]]) -> Iterator[List[Tuple[int, str]]]:
+        """Group lines into chunks without reading ahead."""
+        iterator = iter(lines)
+        while True:
+            chunk = list(islice(iterator, self.chunk_size))
+            if not chunk:
+                return
+            yield chunk
+    
+    def _verdict_chunks(self, lines: Iterable[Tuple[int, str]],
+                        executor: Optional[Executor]) -> Iterator[List[dict]]:
+        """
+        Validate chunks, keeping at most max_pending_chunks in flight.
+        
+        Args:
+            lines: Tuples of (line number, raw JSON line)
+            executor: Process pool, or None to validate in this process
+            
+        Yields:
+            Verdicts of each chunk, in input order
+        """
+        if executor is None:
+            _init_worker(self.context_dir, self.contexts)
+            for chunk in self._chunks(lines):
+                yield _validate_lines(chunk)
+            return
+        
+        pending = deque()
+        for chunk in self._chunks(lines):
+            pending.append(executor.submit(_validate_lines, chunk))
+            if len(pending) >= self.max_pending_chunks:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    
+    def validate_lines(self, lines: Iterable[Tuple[int, str]], output) -> dict:
+        """
+        Validate JSONL lines and write one verdict line per input line.
+        
+        Args:
+            lines: Tuples of (line number, raw JSON line), e.g. from iter_jsonl
+            output: Text file the verdict lines are written to
+            
+        Returns:
+            Dictionary with validation and refusal statistics
+        """
+        start = time.perf_counter()
+        totals = Counter()
+        reasons = Counter()
+        refusal_breakdown = {refusal: 0 for refusal in self.standardized_refusals}
+        
+        executor = None
+        if self.workers > 1:
+            executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(self.context_dir, self.contexts)
+            )
+        try:
+            for verdicts in self._verdict_chunks(lines, executor):
+                for verdict in verdicts:
+                    totals['total'] += 1
+                    refusals = verdict.pop('refusals', [])
+                    if 'error' in verdict:
+                        totals['errors'] += 1
+                    else:
+                        totals['valid' if verdict['is_valid'] else 'invalid'] += 1
+                        if verdict['is_refusal']:
+                            totals['refusals'] += 1
+                        if verdict['reason']:
+                            reasons[verdict['reason']] += 1
+                        for refusal in refusals:
+                            refusal_breakdown[refusal] += 1
+                    output.write(json.dumps(verdict) + "\n")
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        
+        elapsed = time.perf_counter() - start
+        total = totals['total']
+        return {
+            'total_responses': total,
+            'valid_count': totals['valid'],
+            'invalid_count': totals['invalid'],
+            'error_count': totals['errors'],
+            'invalid_reasons': dict(reasons),
+            'refusal_count': totals['refusals'],
+            'refusal_rate': totals['refusals'] / total if total > 0 else 0,
+            'refusal_breakdown': refusal_breakdown,
+            'elapsed_seconds': elapsed,
+            'responses_per_second': total / elapsed if elapsed > 0 else 0
+        }
+    
+    def validate_file(self, input_path: str, output_path: str) -> dict:
+        """
+        Validate a JSONL log of responses into a JSONL file of verdicts.
+        
+        Args:
+            input_path: JSONL file of logged responses
+            output_path: JSONL file the verdicts are written to
+            
+        Returns:
+            Dictionary with validation and refusal statistics
+        """
+        with open(output_path, 'w', encoding='utf-8') as output:
+            return self.validate_lines(iter_jsonl(input_path), output)
+
+
+def main():
+    """Entry point."""
+    parser = argparse.ArgumentParser(description="Validate a JSONL log of responses with the guard agent.")
+    parser.add_argument("input", help="JSONL file of logged responses")
+    parser.add_argument("output", help="JSONL file for the verdicts")
+    parser.add_argument("--context-dir", default="context", help="Directory of the city context files")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (defaults to the CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=500, help="Lines per worker task")
+    args = parser.parse_args()
+    
+    validator = BatchGuardValidator(context_dir=args.context_dir, workers=args.workers,
+                                    chunk_size=args.chunk_size)
+    stats = validator.validate_file(args.input, args.output)
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
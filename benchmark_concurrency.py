@@ -0,0 +1,99 @@
+"""
+Concurrency benchmark for the query pipeline.
+Runs many queries against a local stub model that simulates generation
+latency, comparing the blocking process_query (as the AgentCore entrypoint
+used to call it) with the native async process_query_async at increasing
+numbers of in-flight requests.
+"""
+import os
+import sys
+import time
+import asyncio
+import statistics
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from local_guide_system import LocalGuideSystem
+from stub_model import StubModel
+
+CONCURRENCY_LEVELS = [1, 2, 4, 8, 16, 32]
+REQUESTS_PER_LEVEL = 64
+DELTA_DELAY = 0.005  # Seconds per streamed word of the stub model
+ANSWER = ("Jigarthanda is a famous cold drink made with milk and almond gum. "
+          "You can find it near Meenakshi Temple, and Murugan Idli Shop serves soft idlis for breakfast.")
+QUERIES = [
+    "What food is Madurai famous for?",
+    "Where can I get breakfast early in the morning?",
+    "How much is the auto rickshaw fare?",
+    "Which areas are safe at night?",
+    "What does enna da mean?",
+    "Where can I find good biryani?",
+]
+
+
+def create_system() -> LocalGuideSystem:
+    """Create a system for Madurai backed by the stub model."""
+    system = LocalGuideSystem()
+    system.local_guide.model = StubModel(response_text=ANSWER, delta_delay=DELTA_DELAY)
+    system.is_initialized = True
+    system.select_city("Madurai")
+    return system
+
+
+async def run_level(system: LocalGuideSystem, concurrency: int, use_async: bool) -> tuple:
+    """
+    Run REQUESTS_PER_LEVEL queries with at most `concurrency` in flight.
+    
+    Returns:
+        Tuple of (throughput in requests/s, median latency in ms)
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    
+    async def handle(i: int) -> None:
+        async with semaphore:
+            query = QUERIES[i % len(QUERIES)]
+            start = time.perf_counter()
+            if use_async:
+                await system.process_query_async(query)
+            else:
+                # What an async entrypoint did before: a blocking call on the event loop
+                system.process_query(query)
+            latencies.append((time.perf_counter() - start) * 1000)
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(handle(i) for i in range(REQUESTS_PER_LEVEL)))
+    elapsed = time.perf_counter() - start
+    
+    return REQUESTS_PER_LEVEL / elapsed, statistics.median(latencies)
+
+
+async def main_async() -> None:
+    """Run the benchmark and print a table."""
+    system = create_system()
+    
+    # Warm up the retrieval index and the agent pool
+    await system.process_query_async(QUERIES[0])
+    
+    print(f"Stub model: {len(ANSWER.split())} words at {DELTA_DELAY * 1000:.0f} ms per word, "
+          f"{REQUESTS_PER_LEVEL} requests per level\n")
+    print(f"{'in flight':>10} {'blocking (req/s)':>17} {'async (req/s)':>14} {'async p50 (ms)':>15} {'speedup':>9}")
+    
+    for concurrency in CONCURRENCY_LEVELS:
+        blocking_rps, _ = await run_level(system, concurrency, use_async=False)
+        async_rps, async_p50 = await run_level(system, concurrency, use_async=True)
+        print(f"{concurrency:>10} {blocking_rps:>17.1f} {async_rps:>14.1f} {async_p50:>15.1f} "
+              f"{async_rps / blocking_rps:>8.1f}x")
+    
+    pool = system.local_guide.get_agent_pool_stats()
+    print(f"\nAgent pool: {pool['misses']} agents built, {pool['hits']} reuses")
+
+
+def main():
+    """Entry point."""
+    asyncio.run(main_async())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Micro-benchmark for RAG retrieval.
+Compares per-query retrieval time of the original full-scan scorer, which
+re-tokenized every chunk on every query, with the pre-tokenized indexed retriever.
+"""
+import os
+import re
+import sys
+import time
+from datetime import datetime
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from rag_retriever import RAGRetriever
+
+CONTEXT_FILE = os.path.join("context", "madurai_context.md")
+REPLICATION_FACTORS = [1, 10, 100]
+BATCH_REPEATS = 500
+QUERIES = [
+    "What food is Madurai famous for?",
+    "Where can I get breakfast early in the morning?",
+    "How much is the auto rickshaw fare?",
+    "Which areas are safe at night?",
+    "When does the temple open?",
+    "What does enna da mean?",
+]
+
+
+def legacy_retrieve(retriever: RAGRetriever, query: str, city: str, top_k: int = 3) -> list:
+    """
+    Reference implementation of the original per-query full scan.
+    
+    Every chunk's content and section title are lowercased and tokenized
+    again for each query, exactly as the scorer used to do.
+    """
+    query_lower = query.lower()
+    query_words = set(re.findall(r'\b\w+\b', query_lower))
+    scored = []
+    
+    for chunk in retriever.context_chunks[city.lower()]:
+        content_lower = chunk.content.lower()
+        content_words = set(re.findall(r'\b\w+\b', content_lower))
+        section_words = set(re.findall(r'\b\w+\b', chunk.section.lower()))
+        
+        score = 0.0
+        if query_words:
+            score += len(query_words & content_words) / len(query_words) * 0.6
+            score += len(query_words & section_words) / len(query_words) * 0.3
+        score += legacy_time_boost(retriever.time_sensitive_keywords, query_lower, content_lower) * 0.1
+        scored.append((min(score, 1.0), chunk))
+    
+    scored.sort(key=lambda item: item[0], reverse=True)
+    return scored[:top_k]
+
+
+def legacy_time_boost(time_sensitive_keywords: dict, query: str, content: str) -> float:
+    """Reference implementation of the original per-chunk keyword scan, clock included."""
+    current_hour = datetime.now().hour
+    if 6 <= current_hour < 12:
+        current_period = 'morning'
+    elif 12 <= current_hour < 17:
+        current_period = 'afternoon'
+    elif 17 <= current_hour < 22:
+        current_period = 'evening'
+    else:
+        current_period = 'night'
+    
+    boost = 0.0
+    for period, keywords in time_sensitive_keywords.items():
+        for keyword in keywords:
+            if keyword in query:
+                if period == current_period:
+                    boost += 0.3
+                if keyword in content or any(kw in content for kw in keywords):
+                    boost += 0.2
+                break
+    
+    if any(kw in query for kw in time_sensitive_keywords['timing']):
+        if any(time_word in content for time_word in ['am', 'pm', 'hour', 'time', 'open', 'close']):
+            boost += 0.4
+    
+    return min(boost, 1.0)
+
+
+def time_per_query(func, iterations: int) -> float:
+    """Return the mean time per query in milliseconds."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for query in QUERIES:
+            func(query)
+    elapsed = time.perf_counter() - start
+    return elapsed * 1000 / (iterations * len(QUERIES))
+
+
+def main():
+    """Run the retrieval benchmark."""
+    print("🏛️ Local Guide AI - RAG Retrieval Benchmark")
+    print("=" * 60)
+    
+    with open(CONTEXT_FILE, 'r', encoding='utf-8') as f:
+        base_content = f.read()
+    
+    print(f"{'replication':>12} {'chunks':>8} {'before (ms)':>13} {'after (ms)':>12} {'speedup':>9}")
+    
+    for factor in REPLICATION_FACTORS:
+        retriever = RAGRetriever()
+        retriever.load_context_chunks("Madurai", "\n".join([base_content] * factor))
+        chunk_count = len(retriever.context_chunks["madurai"])
+        iterations = max(1, 200 // factor)
+        
+        before = time_per_query(lambda q: legacy_retrieve(retriever, q, "Madurai"), iterations)
+        after = time_per_query(lambda q: retriever.retrieve_relevant_context(q, "Madurai", top_k=3), iterations)
+        
+        print(f"{factor:>11}x {chunk_count:>8} {before:>13.3f} {after:>12.3f} {before / after:>8.1f}x")
+    
+    print("\nBatch retrieval (retrieve_batch vs. one query at a time)")
+    print(f"{'replication':>12} {'queries':>8} {'loop (ms)':>13} {'batch (ms)':>12} {'speedup':>9}")
+    
+    batch_queries = QUERIES * BATCH_REPEATS
+    for factor in REPLICATION_FACTORS:
+        retriever = RAGRetriever()
+        retriever.load_context_chunks("Madurai", "\n".join([base_content] * factor))
+        retriever.retrieve_batch(QUERIES, "Madurai", top_k=3)  # Build the term matrix
+        
+        start = time.perf_counter()
+        for query in batch_queries:
+            retriever.retrieve_relevant_context(query, "Madurai", top_k=3)
+        loop_ms = (time.perf_counter() - start) * 1000
+        
+        start = time.perf_counter()
+        retriever.retrieve_batch(batch_queries, "Madurai", top_k=3)
+        batch_ms = (time.perf_counter() - start) * 1000
+        
+        print(f"{factor:>11}x {len(batch_queries):>8} {loop_ms:>13.1f} {batch_ms:>12.1f} {loop_ms / batch_ms:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""
+City catalog for Local Guide AI.
+Discovers supported cities from the context/<city>_context.md files instead
+of a hard-coded list. Discovery only reads directory entries and file
+metadata; a city's file is read when the city is first used.
+"""
+import os
+import re
+import sys
+import threading
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional, Tuple
+
+# Add current directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+CONTEXT_FILE_SUFFIX = "_context.md"
+DEFAULT_CONTEXT_DIR = "context"
+
+# Lowercase letters, digits, '_' and '-'; also keeps user input from escaping the directory
+CITY_NAME_PATTERN = re.compile(r'^[a-z0-9][a-z0-9_-]*$')
+WORD_PATTERN = re.compile(r'[a-z0-9]+')
+
+
+@dataclass(frozen=True)
+class CityManifestEntry:
+    """Catalog entry for one city's context file."""
+    name: str  # Lowercase city name, e.g. 'madurai'
+    file_path: str
+    size: int
+    mtime: float
+    content_hash: Optional[str] = None  # Known once the file has been read
+    
+    @property
+    def display_name(self) -> str:
+        """City name for display, e.g. 'Madurai'."""
+        return self.name.title()
+
+
+class CityCatalog:
+    """
+    Manifest of the city context files in a directory.
+    
+    The manifest is rebuilt whenever the directory's modification time
+    changes, so files added or removed while running are picked up. A name
+    missing from the manifest is checked with a single stat, so validating
+    a city does not need a full rescan.
+    """
+    
+    def __init__(self, context_dir: str = DEFAULT_CONTEXT_DIR):
+        """
+        Initialize the catalog. The directory is scanned on first use.
+        
+        Args:
+            context_dir: Directory containing <city>_context.md files
+        """
+        self.context_dir = context_dir
+        self._entries: Dict[str, CityManifestEntry] = {}
+        self._dir_mtime: Optional[int] = None
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def normalize(city: str) -> Optional[str]:
+        """
+        Turn user input into a catalog name.
+        
+        Args:
+            city: City name, any case
+            
+        Returns:
+            Lowercase name, or None if it cannot name a context file
+        """
+        name = (city or "").strip().lower()
+        return name if CITY_NAME_PATTERN.match(name) else None
+    
+    def context_path(self, name: str) -> str:
+        """
+        Get the context file path for a catalog name.
+        
+        Args:
+            name: Lowercase city name
+            
+        Returns:
+            Path of the city's context file
+        """
+        return os.path.join(self.context_dir, f"{name}{CONTEXT_FILE_SUFFIX}")
+    
+    def _entry_for(self, name: str, stat: os.stat_result) -> CityManifestEntry:
+        """Build an entry, keeping a known hash if the file is unchanged. Caller holds the lock."""
+        previous = self._entries.get(name)
+        content_hash = None
+        if previous is not None and (previous.size, previous.mtime) == (stat.st_size, stat.st_mtime):
+            content_hash = previous.content_hash
+        return CityManifestEntry(name, self.context_path(name), stat.st_size, stat.st_mtime, content_hash)
+    
+    def _refresh_locked(self) -> None:
+        """Rescan the directory if it changed since the last scan. Caller holds the lock."""
+        try:
+            dir_mtime = os.stat(self.context_dir).st_mtime_ns
+        except OSError:
+            self._entries = {}
+            self._dir_mtime = None
+            return
+        
+        if dir_mtime == self._dir_mtime:
+            return
+        
+        entries = {}
+        with os.scandir(self.context_dir) as scan:
+            for item in scan:
+                if not item.name.endswith(CONTEXT_FILE_SUFFIX) or not item.is_file():
+                    continue
+                name = item.name[:-len(CONTEXT_FILE_SUFFIX)].lower()
+                if CITY_NAME_PATTERN.match(name):
+                    entries[name] = self._entry_for(name, item.stat())
+        self._entries = entries
+        self._dir_mtime = dir_mtime
+    
+    def refresh(self) -> None:
+        """Rescan the directory if it changed since the last scan."""
+        with self._lock:
+            self._refresh_locked()
+    
+    def names(self) -> List[str]:
+        """
+        Get the names of all cities with a context file.
+        
+        Returns:
+            Sorted list of lowercase city names
+        """
+        with self._lock:
+            self._refresh_locked()
+            return sorted(self._entries)
+    
+    def get(self, city: str) -> Optional[CityManifestEntry]:
+        """
+        Look up a city's manifest entry.
+        
+        Args:
+            city: City name, any case
+            
+        Returns:
+            Manifest entry, or None if the city has no context file
+        """
+        name = self.normalize(city)
+        if name is None:
+            return None
+        
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None:
+                return entry
+            
+            # Not seen yet: check the one file instead of rescanning everything
+            try:
+                stat = os.stat(self.context_path(name))
+            except OSError:
+                return None
+            entry = self._entry_for(name, stat)
+            self._entries[name] = entry
+            return entry
+    
+    def __contains__(self, city: str) -> bool:
+        return self.get(city) is not None
+    
+    def record_load(self, city: str, size: int, content_hash: str) -> None:
+        """
+        Record the size and hash of a city's file after reading it.
+        
+        Args:
+            city: City name, any case
+            size: Size of the file in bytes
+            content_hash: Hash of the file content
+        """
+        name = self.normalize(city)
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None:
+                self._entries[name] = replace(entry, size=size, content_hash=content_hash)
+    
+    def find_cities(self, text: str) -> List[str]:
+        """
+        Find catalog cities named in a text.
+        
+        Looks up each word and each hyphen- or underscore-joined word pair
+        instead of testing every city, so the cost does not grow with the
+        catalog.
+        
+        Args:
+            text: Any text, e.g. a user query
+            
+        Returns:
+            Names of the cities mentioned, in order of appearance
+        """
+        return list(self.count_cities(text))
+    
+    def count_cities(self, text: str) -> Dict[str, int]:
+        """
+        Count how often each catalog city is named in a text.
+        
+        Names match whole words only, so a city whose name is part of
+        another word is not counted. Like find_cities, this costs one pass
+        over the text however large the catalog is.
+        
+        Args:
+            text: Any text, e.g. a context file
+            
+        Returns:
+            City name -> number of mentions, in order of first appearance
+        """
+        words = WORD_PATTERN.findall(text.lower())
+        candidates: List[str] = []
+        for i, word in enumerate(words):
+            candidates.append(word)
+            if i + 1 < len(words):
+                candidates.append(f"{word}_{words[i + 1]}")
+                candidates.append(f"{word}-{words[i + 1]}")
+        
+        with self._lock:
+            self._refresh_locked()
+            counts: Dict[str, int] = {}
+            for candidate in candidates:
+                if candidate in self._entries:
+                    counts[candidate] = counts.get(candidate, 0) + 1
+            return counts
+    
+    def get_manifest(self) -> List[CityManifestEntry]:
+        """
+        Get the manifest of all cities.
+        
+        Returns:
+            Entries sorted by city name
+        """
+        with self._lock:
+            self._refresh_locked()
+            return [self._entries[name] for name in sorted(self._entries)]
+
+
+_default_catalogs: Dict[str, CityCatalog] = {}
+_default_lock = threading.Lock()
+
+
+def get_catalog(context_dir: str = DEFAULT_CONTEXT_DIR) -> CityCatalog:
+    """
+    Get the catalog shared by everything that reads a context directory.
+    
+    Args:
+        context_dir: Directory containing <city>_context.md files
+        
+    Returns:
+        CityCatalog for the directory
+    """
+    with _default_lock:
+        catalog = _default_catalogs.get(context_dir)
+        if catalog is None:
+            catalog = CityCatalog(context_dir)
+            _default_catalogs[context_dir] = catalog
+        return catalog
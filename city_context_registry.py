@@ -0,0 +1,266 @@
+"""
+City context registry for Local Guide AI.
+Loads each city's context once per process and hands out the same immutable
+CityContext to every session, so selecting or switching a city does not
+touch the disk again. With a memory budget, the least recently used cities
+are unloaded to make room.
+"""
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional
+
+# Add current directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models import CityContext
+from agents.context_loader import ContextLoaderAgent
+
+
+class CityContextRegistry:
+    """
+    Process-wide store of loaded city contexts.
+    
+    Cities load lazily on first use, or all at once with preload(). Loading
+    runs outside the lock, so one slow city does not hold up the others; if
+    two callers load the same city at once, the first result is kept and
+    both get it.
+    
+    When max_context_chars is set, loading a city that takes the total
+    context size over the budget unloads the least recently used cities.
+    Retrieval indexes grow with their context, so the budget bounds them too.
+    """
+    
+    def __init__(self, context_loader: ContextLoaderAgent,
+                 on_load: Optional[Callable[[CityContext], None]] = None,
+                 on_evict: Optional[Callable[[CityContext], None]] = None,
+                 max_context_chars: Optional[int] = None):
+        """
+        Initialize the registry.
+        
+        Args:
+            context_loader: Loader that validates city names and reads context files
+            on_load: Called once with each newly loaded context, e.g. to build its retrieval index
+            on_evict: Called with each context unloaded for the budget, e.g. to drop its index
+            max_context_chars: Budget for the total characters of loaded contexts, unbounded if None
+        """
+        self.context_loader = context_loader
+        self.on_load = on_load
+        self.on_evict = on_evict
+        self.max_context_chars = max_context_chars
+        self._contexts: "OrderedDict[str, CityContext]" = OrderedDict()  # Least recently used first
+        self._total_chars = 0
+        self._lock = threading.Lock()
+        self._loads = 0
+        self._hits = 0
+        self._reloads = 0
+        self._evictions = 0
+    
+    def get(self, city: str) -> CityContext:
+        """
+        Get the shared context of a city, loading it on first use.
+        
+        Args:
+            city: City name, any case
+            
+        Returns:
+            The city's CityContext
+            
+        Raises:
+            ValueError: If city has no context file
+            FileNotFoundError: If the context directory doesn't exist
+            IOError: If context file cannot be read
+        """
+        city_lower = city.lower()
+        with self._lock:
+            context = self._contexts.get(city_lower)
+            if context is not None:
+                self._hits += 1
+                self._contexts.move_to_end(city_lower)
+                return context
+        
+        loaded = self.context_loader.read_city_context(city)
+        if self.on_load is not None:
+            self.on_load(loaded)
+        
+        with self._lock:
+            context = self._contexts.get(city_lower)
+            if context is not None:
+                return context
+            self._store(city_lower, loaded)
+            self._loads += 1
+            evicted = self._evict_over_budget()
+        
+        self._notify_evicted(evicted)
+        return loaded
+    
+    def _store(self, city_lower: str, context: CityContext) -> None:
+        """Store a context as the most recently used one. Caller holds the lock."""
+        previous = self._contexts.pop(city_lower, None)
+        if previous is not None:
+            self._total_chars -= len(previous.context_content)
+        self._contexts[city_lower] = context
+        self._total_chars += len(context.context_content)
+    
+    def _evict_over_budget(self) -> List[CityContext]:
+        """
+        Unload least recently used cities until the budget is met. Caller holds the lock.
+        
+        The most recently used city always stays, even if it alone exceeds the budget.
+        
+        Returns:
+            Evicted contexts
+        """
+        evicted = []
+        if self.max_context_chars is None:
+            return evicted
+        while self._total_chars > self.max_context_chars and len(self._contexts) > 1:
+            _, context = self._contexts.popitem(last=False)
+            self._total_chars -= len(context.context_content)
+            self._evictions += 1
+            evicted.append(context)
+        return evicted
+    
+    def _notify_evicted(self, evicted: List[CityContext]) -> None:
+        """Run the eviction callback outside the lock."""
+        if self.on_evict is not None:
+            for context in evicted:
+                self.on_evict(context)
+    
+    def peek(self, city: str) -> Optional[CityContext]:
+        """
+        Get the shared context of a city without loading it.
+        
+        Args:
+            city: City name, any case
+            
+        Returns:
+            The city's CityContext, or None if it is not loaded
+        """
+        with self._lock:
+            return self._contexts.get(city.lower())
+    
+    def reload(self, city: str) -> Optional[CityContext]:
+        """
+        Read a city's file again and swap in the new context if it changed.
+        
+        The new context and its index are built before the swap, so callers
+        keep getting the old context until the new one is complete. Sessions
+        already holding the old context can keep using it.
+        
+        Args:
+            city: City name, any case
+            
+        Returns:
+            The new CityContext, or None if the content is unchanged
+            
+        Raises:
+            ValueError: If city has no context file
+            FileNotFoundError: If the context directory doesn't exist
+            IOError: If context file cannot be read
+        """
+        city_lower = city.lower()
+        loaded = self.context_loader.read_city_context(city)
+        
+        current = self.peek(city_lower)
+        if current is not None and current.content_hash == loaded.content_hash:
+            return None
+        
+        if self.on_load is not None:
+            self.on_load(loaded)
+        
+        with self._lock:
+            self._store(city_lower, loaded)
+            self._reloads += 1
+            evicted = self._evict_over_budget()
+        
+        self._notify_evicted(evicted)
+        return loaded
+    
+    def loaded_contexts(self) -> List[CityContext]:
+        """
+        Get every loaded context.
+        
+        Returns:
+            List of loaded CityContext objects
+        """
+        with self._lock:
+            return list(self._contexts.values())
+    
+    def preload(self, cities: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        Load several cities ahead of their first use.
+        
+        Args:
+            cities: Cities to load, every available city if omitted
+            
+        Loading stops early once the memory budget is full, so preloading a
+        large catalog never evicts what it just loaded.
+        
+        Returns:
+            Names of the cities that failed to load
+        """
+        if cities is None:
+            cities = self.context_loader.get_available_cities()
+        
+        failed = []
+        for city in cities:
+            with self._lock:
+                if self.max_context_chars is not None and self._total_chars >= self.max_context_chars:
+                    break
+            try:
+                self.get(city)
+            except (ValueError, IOError):
+                failed.append(city)
+        return failed
+    
+    def is_loaded(self, city: str) -> bool:
+        """
+        Check whether a city's context is already loaded.
+        
+        Args:
+            city: City name, any case
+            
+        Returns:
+            True if the context is in the registry
+        """
+        with self._lock:
+            return city.lower() in self._contexts
+    
+    def invalidate(self, city: Optional[str] = None) -> None:
+        """
+        Forget loaded contexts so they are read again on next use.
+        
+        Sessions holding the old context keep it until they select a city again.
+        
+        Args:
+            city: City to forget, all cities if omitted
+        """
+        with self._lock:
+            if city is None:
+                self._contexts.clear()
+                self._total_chars = 0
+            else:
+                context = self._contexts.pop(city.lower(), None)
+                if context is not None:
+                    self._total_chars -= len(context.context_content)
+    
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Get registry statistics.
+        
+        Returns:
+            Dictionary with loaded cities, context characters against the
+            budget, and load, hit, reload and eviction counters
+        """
+        with self._lock:
+            return {
+                'cities': len(self._contexts),
+                'context_chars': self._total_chars,
+                'max_context_chars': self.max_context_chars,
+                'loads': self._loads,
+                'hits': self._hits,
+                'reloads': self._reloads,
+                'evictions': self._evictions
+            }
@@ -226,13 +226,18 @@ class LocalGuideCLI:
                 elif command_result:
                     continue
                 
-                # Process as query
-                print("🤔 Thinking...")
-                response = self.system.process_query(user_input)
+                # Process as query, printing the answer as it is generated
+                print("\nGuide: ", end="", flush=True)
+                stream = self.system.process_query_stream(user_input)
+                for chunk in stream:
+                    print(chunk, end="", flush=True)
+                print()
+                response = stream.response
                 
-                # Display response
-                formatted_response = self.format_response(response)
-                print(f"\nGuide: {formatted_response}")
+                # The guard may replace a streamed answer after it completes
+                if response.text != stream.text:
+                    formatted_response = self.format_response(response)
+                    print(f"Guide: {formatted_response}")
                 
                 # Add to history
                 self.conversation_history.append((user_input, response, datetime.now()))
@@ -0,0 +1,147 @@
+"""
+Context file watcher for Local Guide AI.
+Polls the files of loaded cities and reloads a city in the background when
+its file changes, so edits to context/*.md reach the running service
+without a restart.
+"""
+import os
+import sys
+import time
+import threading
+from typing import Dict, List, Optional, Tuple
+
+# Add current directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from city_context_registry import CityContextRegistry
+
+
+class ContextWatcher:
+    """
+    Background poller that hot-reloads changed context files.
+    
+    A file counts as changed when its modification time or size differs
+    from the last check. The registry builds the new context and retrieval
+    index before swapping them in, so requests never wait on a reload and
+    requests already in flight finish on the old context.
+    """
+    
+    def __init__(self, registry: CityContextRegistry, interval: float = 2.0):
+        """
+        Initialize the watcher.
+        
+        Args:
+            registry: Registry whose loaded cities are watched
+            interval: Seconds between polls
+        """
+        self.registry = registry
+        self.interval = interval
+        self._signatures: Dict[str, Tuple[int, int]] = {}  # city -> (mtime_ns, size)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._reloads = 0
+        self._errors = 0
+        self._last_reload_ms: Optional[float] = None
+        self._city_reload_ms: Dict[str, float] = {}
+        self._last_error: Optional[str] = None
+    
+    def start(self) -> None:
+        """
+        Start polling in a daemon thread. Does nothing if already running.
+        
+        Raises:
+            ValueError: If the interval is not positive
+        """
+        if self.interval <= 0:
+            raise ValueError("interval must be positive to start the watcher")
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="context-watcher", daemon=True)
+        self._thread.start()
+    
+    def stop(self) -> None:
+        """Stop polling and wait for the thread to finish."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+    
+    def is_running(self) -> bool:
+        """Check whether the polling thread is running."""
+        return self._thread is not None and self._thread.is_alive()
+    
+    def _run(self) -> None:
+        """Poll until stopped."""
+        while not self._stop.wait(self.interval):
+            self.check_once()
+    
+    def check_once(self) -> List[str]:
+        """
+        Check every loaded city once and reload those whose file changed.
+        
+        The first check of a city reloads it only if its file is newer than
+        the loaded context.
+        
+        Returns:
+            Names of the cities that were reloaded
+        """
+        reloaded = []
+        for context in self.registry.loaded_contexts():
+            city = context.city_name
+            try:
+                stat = os.stat(context.file_path)
+            except OSError as e:
+                self._record_error(city, e)
+                continue
+            
+            signature = (stat.st_mtime_ns, stat.st_size)
+            previous = self._signatures.get(city)
+            self._signatures[city] = signature
+            if previous is None:
+                # First sight: only a file written after the context was read is stale
+                if stat.st_mtime <= context.last_loaded.timestamp():
+                    continue
+            elif previous == signature:
+                continue
+            
+            start = time.perf_counter()
+            try:
+                new_context = self.registry.reload(city)
+            except Exception as e:
+                self._record_error(city, e)
+                continue
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            
+            if new_context is not None:
+                with self._lock:
+                    self._reloads += 1
+                    self._last_reload_ms = elapsed_ms
+                    self._city_reload_ms[city] = elapsed_ms
+                reloaded.append(city)
+        return reloaded
+    
+    def _record_error(self, city: str, error: Exception) -> None:
+        """Count a failed check; the city keeps serving its current context."""
+        with self._lock:
+            self._errors += 1
+            self._last_error = f"{city}: {error}"
+    
+    def get_stats(self) -> Dict:
+        """
+        Get watcher statistics.
+        
+        Returns:
+            Dictionary with reload counts, reload latency in milliseconds and errors
+        """
+        with self._lock:
+            return {
+                'running': self.is_running(),
+                'interval': self.interval,
+                'reloads': self._reloads,
+                'last_reload_ms': self._last_reload_ms,
+                'city_reload_ms': dict(self._city_reload_ms),
+                'errors': self._errors,
+                'last_error': self._last_error
+            }
@@ -0,0 +1,354 @@
+"""
+Conversation history for Local Guide AI.
+A bounded ring buffer of compact turn records with running statistics.
+Turns pushed out of the buffer can be spilled to an append-only JSONL file
+or a SQLite database instead of being dropped.
+"""
+import os
+import sys
+import json
+import uuid
+import sqlite3
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Add current directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models import Query, Response
+
+DEFAULT_MAX_TURNS = 200
+
+
+def _intern(text: Optional[str]) -> Optional[str]:
+    """Share one copy of a frequently repeated string."""
+    return sys.intern(text) if text else text
+
+
+class HistoryRecord:
+    """One query/response turn, stored without per-instance dictionaries."""
+    
+    __slots__ = ('query_text', 'city', 'timestamp', 'query_valid', 'validation_reason',
+                 'response_text', 'is_refusal', 'refusal_reason', 'source_context',
+                 'validation_passed')
+    
+    def __init__(self, query: Query, response: Response):
+        """
+        Initialize the record from a query and its response.
+        
+        City names, refusal reasons and standardized refusal texts repeat
+        across turns, so they are interned and shared between records.
+        
+        Args:
+            query: Validated query
+            response: Final response
+        """
+        self.query_text = query.text
+        self.city = _intern(query.city)
+        self.timestamp = query.timestamp
+        self.query_valid = query.is_valid
+        self.validation_reason = _intern(query.validation_reason)
+        self.response_text = _intern(response.text) if response.is_refusal else response.text
+        self.is_refusal = response.is_refusal
+        self.refusal_reason = _intern(response.refusal_reason)
+        self.source_context = _intern(response.source_context)
+        self.validation_passed = response.validation_passed
+    
+    def to_pair(self) -> Tuple[Query, Response]:
+        """
+        Rebuild the query and response of this turn.
+        
+        Returns:
+            Tuple of (query, response)
+        """
+        query = Query(
+            text=self.query_text,
+            city=self.city,
+            timestamp=self.timestamp,
+            is_valid=self.query_valid,
+            validation_reason=self.validation_reason
+        )
+        response = Response(
+            text=self.response_text,
+            is_refusal=self.is_refusal,
+            refusal_reason=self.refusal_reason,
+            source_context=self.source_context,
+            validation_passed=self.validation_passed
+        )
+        return query, response
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the record to a JSON-serializable dictionary.
+        
+        Returns:
+            Dictionary with one key per field
+        """
+        data = {field: getattr(self, field) for field in self.__slots__}
+        data['timestamp'] = self.timestamp.isoformat()
+        return data
+
+
+class JsonlHistorySpill:
+    """Appends spilled turns to a JSONL file, one JSON object per line."""
+    
+    def __init__(self, path: str):
+        """
+        Initialize the spill file.
+        
+        Args:
+            path: File to append to, created on first write
+        """
+        self.path = path
+        self._lock = threading.Lock()
+    
+    def write(self, conversation_id: str, record: HistoryRecord) -> None:
+        """
+        Append one turn.
+        
+        Args:
+            conversation_id: Conversation the turn belongs to
+            record: Turn to append
+        """
+        line = json.dumps({'conversation_id': conversation_id, **record.to_dict()}, ensure_ascii=False)
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line + "\n")
+    
+    def read(self, conversation_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Read spilled turns back.
+        
+        Args:
+            conversation_id: Only return turns of this conversation if given
+            
+        Returns:
+            List of turn dictionaries in the order they were spilled
+        """
+        if not os.path.exists(self.path):
+            return []
+        with self._lock:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                rows = [json.loads(line) for line in f if line.strip()]
+        if conversation_id is None:
+            return rows
+        return [row for row in rows if row['conversation_id'] == conversation_id]
+
+
+class SqliteHistorySpill:
+    """Inserts spilled turns into a SQLite table."""
+    
+    def __init__(self, path: str):
+        """
+        Open or create the spill database.
+        
+        Args:
+            path: SQLite database file
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS conversation_turns ("
+                "conversation_id TEXT NOT NULL, "
+                + ", ".join(f"{field} TEXT" for field in HistoryRecord.__slots__)
+                + ")"
+            )
+    
+    def write(self, conversation_id: str, record: HistoryRecord) -> None:
+        """
+        Insert one turn.
+        
+        Args:
+            conversation_id: Conversation the turn belongs to
+            record: Turn to insert
+        """
+        data = record.to_dict()
+        columns = ("conversation_id",) + HistoryRecord.__slots__
+        values = [conversation_id] + [data[field] for field in HistoryRecord.__slots__]
+        with self._lock, self._connection:
+            self._connection.execute(
+                f"INSERT INTO conversation_turns ({', '.join(columns)}) "
+                f"VALUES ({', '.join('?' for _ in columns)})",
+                values
+            )
+    
+    def read(self, conversation_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Read spilled turns back.
+        
+        Args:
+            conversation_id: Only return turns of this conversation if given
+            
+        Returns:
+            List of turn dictionaries in the order they were spilled
+        """
+        sql = "SELECT * FROM conversation_turns"
+        params: Tuple = ()
+        if conversation_id is not None:
+            sql += " WHERE conversation_id = ?"
+            params = (conversation_id,)
+        with self._lock:
+            cursor = self._connection.execute(sql + " ORDER BY rowid", params)
+            names = [column[0] for column in cursor.description]
+            rows = [dict(zip(names, row)) for row in cursor.fetchall()]
+        for row in rows:
+            for field in ('query_valid', 'is_refusal', 'validation_passed'):
+                row[field] = bool(int(row[field]))
+        return rows
+    
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._connection.close()
+
+
+_spills: Dict[str, Any] = {}
+_spills_lock = threading.Lock()
+
+
+def open_spill(path: str):
+    """
+    Get the spill target for a path, shared by every history that uses it.
+    
+    Args:
+        path: '.db', '.sqlite' or '.sqlite3' for SQLite, anything else for JSONL
+        
+    Returns:
+        JsonlHistorySpill or SqliteHistorySpill
+    """
+    with _spills_lock:
+        spill = _spills.get(path)
+        if spill is None:
+            if path.lower().endswith(('.db', '.sqlite', '.sqlite3')):
+                spill = SqliteHistorySpill(path)
+            else:
+                spill = JsonlHistorySpill(path)
+            _spills[path] = spill
+        return spill
+
+
+class ConversationHistory:
+    """
+    Bounded history of (query, response) turns.
+    
+    Keeps the most recent max_turns turns as compact records; iterating or
+    indexing rebuilds Query and Response objects. Statistics cover every turn
+    since the last clear, including turns that no longer fit in the buffer.
+    """
+    
+    def __init__(self, max_turns: int = DEFAULT_MAX_TURNS, spill=None,
+                 conversation_id: Optional[str] = None):
+        """
+        Initialize the history.
+        
+        Args:
+            max_turns: Number of recent turns kept in memory
+            spill: Optional target with write(conversation_id, record) for evicted turns
+            conversation_id: Identifier written with spilled turns, random if omitted
+        """
+        if max_turns < 1:
+            raise ValueError("max_turns must be at least 1")
+        
+        self.max_turns = max_turns
+        self.spill = spill
+        self.conversation_id = conversation_id or uuid.uuid4().hex
+        self._records: deque = deque(maxlen=max_turns)
+        self._lock = threading.Lock()
+        self._reset_counters()
+    
+    @classmethod
+    def from_env(cls) -> "ConversationHistory":
+        """
+        Create a history configured by HISTORY_MAX_TURNS and HISTORY_SPILL_PATH.
+        
+        Returns:
+            New ConversationHistory
+        """
+        spill_path = os.getenv("HISTORY_SPILL_PATH")
+        return cls(
+            max_turns=int(os.getenv("HISTORY_MAX_TURNS", str(DEFAULT_MAX_TURNS))),
+            spill=open_spill(spill_path) if spill_path else None
+        )
+    
+    def _reset_counters(self) -> None:
+        """Reset the running statistics."""
+        self.total_turns = 0
+        self.refusal_turns = 0
+        self.spilled_turns = 0
+        self.first_timestamp: Optional[datetime] = None
+        self.last_timestamp: Optional[datetime] = None
+    
+    def append(self, query: Query, response: Response) -> None:
+        """
+        Add a turn, spilling or dropping the oldest one if the buffer is full.
+        
+        Args:
+            query: Validated query
+            response: Final response
+        """
+        record = HistoryRecord(query, response)
+        with self._lock:
+            if len(self._records) == self.max_turns and self.spill is not None:
+                self.spill.write(self.conversation_id, self._records[0])
+                self.spilled_turns += 1
+            self._records.append(record)
+            
+            self.total_turns += 1
+            if record.is_refusal:
+                self.refusal_turns += 1
+            if self.first_timestamp is None:
+                self.first_timestamp = record.timestamp
+            self.last_timestamp = record.timestamp
+    
+    def clear(self) -> None:
+        """Drop all turns and reset the statistics."""
+        with self._lock:
+            self._records.clear()
+            self._reset_counters()
+    
+    def copy(self) -> List[Tuple[Query, Response]]:
+        """
+        Get the retained turns.
+        
+        Returns:
+            List of (query, response) tuples, oldest first
+        """
+        with self._lock:
+            records = list(self._records)
+        return [record.to_pair() for record in records]
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        Get running statistics without scanning the turns.
+        
+        Returns:
+            Dictionary with turn counts and first/last timestamps
+        """
+        with self._lock:
+            return {
+                'total_turns': self.total_turns,
+                'refusal_turns': self.refusal_turns,
+                'retained_turns': len(self._records),
+                'spilled_turns': self.spilled_turns,
+                'first_timestamp': self.first_timestamp,
+                'last_timestamp': self.last_timestamp
+            }
+    
+    def __len__(self) -> int:
+        return len(self._records)
+    
+    def __iter__(self) -> Iterator[Tuple[Query, Response]]:
+        return iter(self.copy())
+    
+    def __getitem__(self, index):
+        with self._lock:
+            if isinstance(index, slice):
+                return [record.to_pair() for record in list(self._records)[index]]
+            return self._records[index].to_pair()
+    
+    def __bool__(self) -> bool:
+        return len(self._records) > 0
@@ -0,0 +1,168 @@
+"""
+Local embedding retrieval for Local Guide AI.
+Offline, CPU-only vector search over context chunks using a hashing vectorizer.
+"""
+import os
+import sys
+import zlib
+from typing import List, Tuple, Sequence, Dict, Iterable, Optional
+
+try:
+    import numpy as np
+except ImportError:  # Vector retrieval is unavailable without NumPy
+    np = None
+
+# Add current directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from rag_retriever import ContextChunk, tokenize
+
+
+class HashingEmbedder:
+    """
+    Stateless text embedder based on the hashing trick.
+    
+    Words and character n-grams of words are hashed into a fixed number of
+    signed buckets, so related word forms ("vendor", "vendors") share most of
+    their features. Optional concept groups map different words to a shared
+    feature, so "eat" and "food" can match. No model download or network
+    access is needed.
+    """
+    
+    def __init__(self, dimensions: int = 2048, ngram_sizes: Sequence[int] = (3, 4),
+                 ngram_weight: float = 0.5,
+                 concept_groups: Optional[Dict[str, Iterable[str]]] = None):
+        """
+        Initialize the embedder.
+        
+        Args:
+            dimensions: Number of hash buckets in each vector
+            ngram_sizes: Character n-gram lengths taken from each word
+            ngram_weight: Weight of character n-gram features relative to words
+            concept_groups: Optional concept name -> words table, e.g. the
+                            query validator's topic keywords
+                            
+        Raises:
+            ImportError: If NumPy is not installed
+        """
+        if np is None:
+            raise ImportError("Embedding retrieval requires NumPy. Run: pip install numpy")
+        
+        self.dimensions = dimensions
+        self.ngram_sizes = tuple(ngram_sizes)
+        self.ngram_weight = ngram_weight
+        
+        # word -> concept features; multi-word phrases are skipped
+        self.word_concepts: Dict[str, List[str]] = {}
+        for concept, words in (concept_groups or {}).items():
+            for word in words:
+                if ' ' not in word:
+                    self.word_concepts.setdefault(word.lower(), []).append("k:" + concept)
+    
+    def _features(self, text: str) -> List[Tuple[str, float]]:
+        """
+        Extract weighted word and character n-gram features.
+        
+        Args:
+            text: Input text
+            
+        Returns:
+            List of (feature, weight) pairs
+        """
+        features = []
+        for word in tokenize(text):
+            features.append(("w:" + word, 1.0))
+            for concept in self.word_concepts.get(word, ()):
+                features.append((concept, 1.0))
+            padded = f"<{word}>"
+            for size in self.ngram_sizes:
+                for start in range(len(padded) - size + 1):
+                    features.append(("c:" + padded[start:start + size], self.ngram_weight))
+        return features
+    
+    def embed(self, texts: List[str]) -> "np.ndarray":
+        """
+        Embed texts as unnormalized hashed feature counts.
+        
+        Args:
+            texts: Texts to embed
+            
+        Returns:
+            float32 matrix of shape (len(texts), dimensions)
+        """
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        
+        for row, text in enumerate(texts):
+            for feature, weight in self._features(text):
+                # crc32 is stable across processes, unlike the builtin hash()
+                hashed = zlib.crc32(feature.encode('utf-8'))
+                sign = 1.0 if hashed & 0x80000000 else -1.0
+                vectors[row, hashed % self.dimensions] += sign * weight
+        
+        return vectors
+
+
+class VectorIndex:
+    """Dense float32 embedding matrix over the context chunks of a single city."""
+    
+    def __init__(self, chunks: Sequence[ContextChunk], embedder: HashingEmbedder):
+        """
+        Embed and index a list of chunks.
+        
+        Bucket weights are scaled by an inverse document frequency learned
+        from the chunks, then every row is L2 normalized so the dot product
+        is the cosine similarity.
+        
+        Args:
+            chunks: Context chunks to index
+            embedder: Embedder used for chunks and queries
+        """
+        self.chunks = tuple(chunks)
+        self.embedder = embedder
+        
+        raw = embedder.embed([f"{chunk.section}\n{chunk.content}" for chunk in self.chunks])
+        document_frequency = np.count_nonzero(raw, axis=0)
+        self.idf = np.log((1 + len(self.chunks)) / (1 + document_frequency)).astype(np.float32) + 1.0
+        self.matrix = self._normalize(raw * self.idf)
+    
+    def _normalize(self, vectors: "np.ndarray") -> "np.ndarray":
+        """L2 normalize each row, leaving all-zero rows unchanged."""
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+    
+    def embed_queries(self, queries: List[str]) -> "np.ndarray":
+        """
+        Embed queries into the index's normalized vector space.
+        
+        Args:
+            queries: Query texts
+            
+        Returns:
+            float32 matrix of shape (len(queries), dimensions)
+        """
+        return self._normalize(self.embedder.embed(queries) * self.idf)
+    
+    def search(self, query: str, top_k: int = 5) -> List[Tuple[int, float]]:
+        """
+        Find the chunks most similar to a query.
+        
+        This is an exact brute-force search: one matrix-vector product over
+        all chunk vectors, which NumPy runs with SIMD BLAS kernels.
+        
+        Args:
+            query: Query text
+            top_k: Number of chunks to return
+            
+        Returns:
+            List of (chunk index, cosine similarity), best first, positive scores only
+        """
+        k = min(top_k, len(self.chunks))
+        if k <= 0:
+            return []
+        
+        similarities = self.matrix @ self.embed_queries([query])[0]
+        
+        top = np.argpartition(-similarities, k - 1)[:k]
+        top = top[np.argsort(-similarities[top], kind='stable')]
+        return [(int(doc_id), float(similarities[doc_id])) for doc_id in top if similarities[doc_id] > 0]
@@ -0,0 +1,117 @@
+"""
+Hybrid retrieval pipeline for Local Guide AI.
+Fuses lexical and vector rankings with reciprocal-rank fusion and optionally
+reranks the fused head with a cheap keyword reranker.
+"""
+import os
+import sys
+from dataclasses import dataclass
+from typing import List, Dict, Tuple, Optional, NamedTuple
+
+# Add current directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from rag_retriever import RetrievalResult, tokenize
+
+
+@dataclass
+class HybridRetrievalConfig:
+    """Budgets and switches for the hybrid retrieval pipeline."""
+    lexical_candidates: int = 20  # Chunks taken from the keyword scorer
+    vector_candidates: int = 20  # Chunks taken from the vector scorer
+    rrf_k: int = 60  # Reciprocal-rank fusion damping constant
+    rerank: bool = True  # Whether to run the reranker at all
+    rerank_depth: int = 20  # Only the fused top rerank_depth chunks are reranked
+    latency_budget_ms: Optional[float] = None  # Skip reranking once this much time is spent
+    parallel: bool = True  # Run the lexical and vector stages concurrently
+
+
+class HybridRetrieval(NamedTuple):
+    """Results of a hybrid retrieval together with per-stage latencies."""
+    results: List[RetrievalResult]
+    timings: Dict[str, float]  # Stage name -> milliseconds
+    reranked: bool
+
+
+def reciprocal_rank_fusion(rankings: List[List[RetrievalResult]], k: int = 60) -> List[RetrievalResult]:
+    """
+    Fuse several rankings of chunks with reciprocal-rank fusion.
+    
+    Each chunk scores sum(1 / (k + rank)) over the rankings it appears in,
+    so only ranks matter and scores from different scorers need no calibration.
+    
+    Args:
+        rankings: Rankings to fuse, each best first
+        k: Damping constant; larger values flatten the rank contribution
+        
+    Returns:
+        Fused ranking with RRF scores, best first
+    """
+    fused: Dict[str, float] = {}
+    chunks = {}
+    
+    for ranking in rankings:
+        for rank, result in enumerate(ranking, 1):
+            chunk_id = result.chunk.chunk_id
+            fused[chunk_id] = fused.get(chunk_id, 0.0) + 1.0 / (k + rank)
+            chunks.setdefault(chunk_id, result.chunk)
+    
+    ordered = sorted(fused.items(), key=lambda item: item[1], reverse=True)
+    return [RetrievalResult(chunks[chunk_id], score) for chunk_id, score in ordered]
+
+
+class KeywordCoverageReranker:
+    """
+    Cheap reranker that rewards chunks covering more of the query.
+    
+    Scores combine the share of query words present in the chunk with the
+    share of query bigrams that appear verbatim in the chunk text, using
+    the chunk's pre-tokenized representations only.
+    """
+    
+    def __init__(self, stopwords: Optional[set] = None, coverage_weight: float = 0.7):
+        """
+        Initialize the reranker.
+        
+        Args:
+            stopwords: Words ignored when measuring coverage
+            coverage_weight: Weight of word coverage; the rest goes to bigram matches
+        """
+        self.stopwords = stopwords if stopwords is not None else {
+            'a', 'an', 'the', 'to', 'in', 'on', 'at', 'of', 'for', 'and', 'or', 'is',
+            'are', 'i', 'can', 'do', 'does', 'what', 'where', 'when', 'how', 'which',
+            'me', 'my', 'you', 'there', 'here', 'some', 'any', 'get', 'find'
+        }
+        self.coverage_weight = coverage_weight
+    
+    def rerank(self, query: str, candidates: List[RetrievalResult]) -> List[RetrievalResult]:
+        """
+        Reorder candidates by keyword coverage, keeping fused order for ties.
+        
+        Args:
+            query: User query
+            candidates: Fused candidates, best first
+            
+        Returns:
+            Reranked candidates scored by the reranker
+        """
+        words = [word for word in tokenize(query) if word not in self.stopwords]
+        if not words:
+            return list(candidates)
+        
+        unique_words = set(words)
+        bigrams = [f"{first} {second}" for first, second in zip(words, words[1:])]
+        
+        rescored = []
+        for result in candidates:
+            chunk = result.chunk
+            coverage = len(unique_words & chunk.token_set) / len(unique_words)
+            phrase_score = (
+                sum(1 for bigram in bigrams if bigram in chunk.content_lower) / len(bigrams)
+                if bigrams else coverage
+            )
+            score = self.coverage_weight * coverage + (1 - self.coverage_weight) * phrase_score
+            rescored.append(RetrievalResult(chunk, score))
+        
+        # sorted() is stable, so equal scores keep their fused order
+        return sorted(rescored, key=lambda result: result.score, reverse=True)
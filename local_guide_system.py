@@ -3,7 +3,10 @@ Main Local Guide System - Coordinates all agents and manages the processing pipe
 """
 import os
 import sys
-from typing import Optional, Tuple
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Optional, Tuple
 from datetime import datetime
 
 # Add current directory to path for imports
@@ -15,6 +18,10 @@ from agents.query_validator import QueryValidationAgent
 from agents.local_guide_agent import LocalGuideAgent
 from agents.guard_agent import GuardAgent
 from refusal_handler import RefusalHandler, RefusalReason
+from streaming import ResponseStream
+from session_store import SessionStore
+from city_context_registry import CityContextRegistry
+from context_watcher import ContextWatcher
 
 
 class LocalGuideSystem:
@@ -23,13 +30,42 @@ class LocalGuideSystem:
     def __init__(self):
         """Initialize the Local Guide System with all agents."""
         self.context_loader = ContextLoaderAgent()
-        self.query_validator = QueryValidationAgent()
+        self.query_validator = QueryValidationAgent(city_catalog=self.context_loader.catalog)
         self.local_guide = LocalGuideAgent()
-        self.guard_agent = GuardAgent()
+        self.guard_agent = GuardAgent(mode=os.getenv("GUARD_MODE", "context"))
         self.refusal_handler = RefusalHandler()
         
+        # One shared context per city; its retrieval index is built when it loads
+        # and dropped when the city is unloaded to stay within the memory budget
+        memory_chars = int(os.getenv("CITY_CONTEXT_MEMORY_CHARS", "16000000"))
+        self.context_registry = CityContextRegistry(
+            self.context_loader,
+            on_load=self.local_guide.prepare_city_context,
+            on_evict=self.local_guide.release_city_context,
+            max_context_chars=memory_chars if memory_chars > 0 else None
+        )
+        
+        # Hot reload of edited context files; initialize() starts it for a positive interval
+        self.context_watcher = ContextWatcher(
+            self.context_registry,
+            interval=float(os.getenv("CONTEXT_RELOAD_INTERVAL", "0"))
+        )
+        
+        # Default state for single-user interfaces (CLI, Streamlit)
         self.app_state = AppState()
         self.is_initialized = False
+        
+        # Per-session state for multi-user serving (AgentCore)
+        self.sessions = SessionStore(
+            idle_ttl=float(os.getenv("SESSION_IDLE_TTL", "1800")),
+            max_sessions=int(os.getenv("MAX_SESSIONS", "1000"))
+        )
+        
+        # Worker threads for CPU-bound stages of the async pipeline
+        self.cpu_executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv("PIPELINE_CPU_WORKERS", "4")),
+            thread_name_prefix="local-guide-cpu"
+        )
     
     def initialize(self) -> bool:
         """
@@ -44,6 +80,16 @@ class LocalGuideSystem:
                 print("Warning: Model connection test failed. AWS credentials may not be configured.")
                 # Continue anyway for testing purposes
             
+            # Optionally load every city up front instead of on first selection
+            if os.getenv("PRELOAD_CITY_CONTEXTS", "false").lower() == "true":
+                failed = self.context_registry.preload()
+                if failed:
+                    print(f"Warning: Could not preload context for {', '.join(failed)}")
+            
+            # Optionally watch context files and reload them when edited
+            if self.context_watcher.interval > 0:
+                self.context_watcher.start()
+            
             self.is_initialized = True
             return True
             
@@ -51,12 +97,53 @@ class LocalGuideSystem:
             print(f"System initialization failed: {str(e)}")
             return False
     
-    def select_city(self, city: str) -> Tuple[bool, str]:
+    def get_session_state(self, session_id: Optional[str] = None) -> AppState:
+        """
+        Get the state a call should work on.
+        
+        Args:
+            session_id: Session identifier, or None for the default state
+            
+        Returns:
+            The session's AppState, created on first use
+        """
+        if session_id is None:
+            return self.app_state
+        return self.sessions.get(session_id)
+    
+    def peek_session_state(self, session_id: Optional[str] = None) -> AppState:
+        """
+        Get the state for a read-only lookup without creating or refreshing a session.
+        
+        Args:
+            session_id: Session identifier, or None for the default state
+            
+        Returns:
+            The session's AppState, or an empty AppState if there is no live session
+        """
+        if session_id is None:
+            return self.app_state
+        return self.sessions.peek(session_id) or AppState()
+    
+    def end_session(self, session_id: str) -> bool:
+        """
+        End a session and drop its state.
+        
+        Args:
+            session_id: Session identifier
+            
+        Returns:
+            True if the session existed, False otherwise
+        """
+        return self.sessions.discard(session_id)
+    
+    def select_city(self, city: str, session_id: Optional[str] = None) -> Tuple[bool, str]:
         """
         Select a city and load its context.
         
         Args:
             city: Name of the city to select
+            session_id: Session identifier, or None for the default state
             
         Returns:
             Tuple of (success, message)
@@ -67,86 +154,400 @@ class LocalGuideSystem:
                 available_cities = self.context_loader.get_available_cities()
                 return False, f"Invalid city '{city}'. Available cities: {', '.join(available_cities)}"
             
-            # Load city context
-            context = self.context_loader.load_city_context(city)
+            # Get the shared city context; the first selection of a city
+            # reads its file and loads its retrieval index
+            context = self.context_registry.get(city)
             
             # Update app state
-            self.app_state.selected_city = city.title()
-            self.app_state.loaded_context = context
+            state = self.get_session_state(session_id)
+            state.selected_city = city.title()
+            state.loaded_context = context
+            if session_id is None:
+                self.context_loader.use_context(context)
             
             return True, f"Successfully loaded context for {city.title()}"
             
         except Exception as e:
             return False, f"Failed to select city: {str(e)}"
     
-    def process_query(self, query_text: str) -> Response:
+    def process_query(self, query_text: str, session_id: Optional[str] = None) -> Response:
         """
         Process a user query through the complete pipeline.
         
         Args:
             query_text: User's query text
+            session_id: Session identifier, or None for the default state
             
         Returns:
             Response object with the result
         """
-        # Check if system is ready
-        if not self.is_initialized:
-            return self._create_error_response("System not initialized")
+        state = self.get_session_state(session_id)
+        not_ready = self._check_ready(state)
+        if not_ready:
+            return not_ready
         
-        if not self.app_state.is_city_selected():
-            return self._create_error_response("No city selected. Please select a city first.")
+        try:
+            # The whole query uses this snapshot, even if the file is reloaded meanwhile
+            city_context = self._refresh_context(state)
+            context_content = city_context.context_content
+            
+            # Steps 1-2: Create and validate query
+            query, rejection = self._validate_query(query_text, state)
+            if rejection:
+                return rejection
+            
+            # Step 3: Generate response using Local Guide Agent with RAG
+            response = self.local_guide.create_response_object(
+                query.text,
+                context_content,
+                state.selected_city,
+                city_context.get_content_hash()
+            )
+            
+            return self._finalize_response(query, response, city_context, state)
+            
+        except Exception as e:
+            error_response = self._create_error_response(f"Processing error: {str(e)}")
+            return error_response
+    
+    async def process_query_async(self, query_text: str, session_id: Optional[str] = None) -> Response:
+        """
+        Process a user query through the complete pipeline without blocking the event loop.
         
-        if not self.app_state.is_context_loaded():
-            return self._create_error_response("City context not loaded. Please select a city.")
+        Validation, retrieval and guard checks run on the CPU worker pool and
+        the model call is awaited, so many queries can be in flight at once.
+        
+        Args:
+            query_text: User's query text
+            session_id: Session identifier, or None for the default state
+            
+        Returns:
+            Response object with the result
+        """
+        state = self.get_session_state(session_id)
+        not_ready = self._check_ready(state)
+        if not_ready:
+            return not_ready
         
         try:
-            # Step 1: Create and validate query
-            query = self.query_validator.create_validation_response(
-                query_text, 
-                self.app_state.selected_city
+            # The whole query uses this snapshot, even if the file is reloaded meanwhile;
+            # reloading an unloaded city reads its file, so keep it off the event loop
+            city_context = await asyncio.get_running_loop().run_in_executor(
+                self.cpu_executor, self._refresh_context, state
             )
+            context_content = city_context.context_content
             
-            # Step 2: Check query validation
-            if not query.is_valid:
-                response = Response(
-                    text=query.validation_reason,
-                    is_refusal=True,
-                    refusal_reason="Query validation failed",
-                    source_context=f"{self.app_state.selected_city} context"
-                )
-                self.app_state.add_interaction(query, response)
-                return response
+            # Steps 1-2: Create and validate query
+            query = await self.query_validator.create_validation_response_async(
+                query_text,
+                state.selected_city,
+                self.cpu_executor
+            )
+            rejection = self._reject_query(query, state)
+            if rejection:
+                return rejection
             
             # Step 3: Generate response using Local Guide Agent with RAG
-            context_content = self.app_state.loaded_context.context_content
-            response = self.local_guide.create_response_object(
+            response = await self.local_guide.create_response_object_async(
                 query.text,
                 context_content,
-                self.app_state.selected_city
+                state.selected_city,
+                self.cpu_executor,
+                city_context.get_content_hash()
             )
             
             # Step 4: Validate response with Guard Agent
-            validated_response = self.guard_agent.validate_response_object(
+            validated_response = await self.guard_agent.validate_response_object_async(
                 response,
-                context_content
+                context_content,
+                self.cpu_executor,
+                city_context.get_content_hash()
             )
             
-            # Step 5: Ensure standardized refusal format if needed
-            if validated_response.is_refusal:
-                validated_response.text = self.refusal_handler.ensure_standardized_refusal(
-                    validated_response.text,
-                    RefusalReason.INSUFFICIENT_DATA
-                )
-            
-            # Step 6: Add to conversation history
-            self.app_state.add_interaction(query, validated_response)
-            
-            return validated_response
+            return self._record_response(query, validated_response, state)
             
         except Exception as e:
             error_response = self._create_error_response(f"Processing error: {str(e)}")
             return error_response
     
+    def process_query_stream(self, query_text: str, session_id: Optional[str] = None) -> ResponseStream:
+        """
+        Process a user query, streaming the response text as it is generated.
+        
+        The stream can be iterated synchronously or asynchronously. Once it
+        is exhausted, its response attribute holds the validated Response,
+        which is also added to the conversation history.
+        
+        Args:
+            query_text: User's query text
+            session_id: Session identifier, or None for the default state
+            
+        Returns:
+            ResponseStream of text chunks
+        """
+        state = self.get_session_state(session_id)
+        return ResponseStream(lambda stream: self._stream_query(query_text, state, stream))
+    
+    async def _stream_query(self, query_text: str, state: AppState, stream: ResponseStream) -> AsyncIterator[str]:
+        """
+        Run the pipeline for a streamed query.
+        
+        Text is released as the streaming guard passes it, so it reaches the
+        caller before the finished response is validated; if that validation
+        fails, the stream finishes with the refusal in place of the text.
+        
+        Args:
+            query_text: User's query text
+            state: State of the session the query belongs to
+            stream: Stream to finish with the final Response
+            
+        Yields:
+            Text chunks of the response
+        """
+        response = self._check_ready(state)
+        
+        if response is None:
+            try:
+                # The whole query uses this snapshot, even if the file is reloaded meanwhile;
+                # reloading an unloaded city reads its file, so keep it off the event loop
+                city_context = await asyncio.get_running_loop().run_in_executor(
+                    self.cpu_executor, self._refresh_context, state
+                )
+                context_content = city_context.context_content
+                
+                query = await self.query_validator.create_validation_response_async(
+                    query_text,
+                    state.selected_city,
+                    self.cpu_executor
+                )
+                response = self._reject_query(query, state)
+                
+                if response is None:
+                    # Step 3: Stream response from Local Guide Agent with RAG,
+                    # releasing text only after the streaming guard has checked it
+                    guard = None
+                    cancel = threading.Event()
+                    chunks = []
+                    sources = []
+                    generation = self.local_guide.stream_response(
+                        query.text,
+                        context_content,
+                        state.selected_city,
+                        cancel_signal=cancel,
+                        executor=self.cpu_executor,
+                        sources=sources,
+                        content_hash=city_context.get_content_hash()
+                    )
+                    try:
+                        async for chunk in generation:
+                            if guard is None:
+                                # The retrieved chunks are known once generation starts
+                                guard = self.guard_agent.create_stream_guard(
+                                    context_content, city_context.get_content_hash(), tuple(sources)
+                                )
+                            if guard.rejected:
+                                continue  # Cancelled; let the agent wind down
+                            chunks.append(chunk)
+                            released = guard.feed(chunk)
+                            if released:
+                                yield released
+                            if guard.rejected:
+                                # Stop the model as soon as the guard rejects the answer
+                                cancel.set()
+                    finally:
+                        # Also stops the model if the caller abandoned the stream
+                        cancel.set()
+                        async for _ in generation:
+                            pass
+                    
+                    if guard is None:
+                        guard = self.guard_agent.create_stream_guard(
+                            context_content, city_context.get_content_hash(), tuple(sources)
+                        )
+                    released = guard.flush()
+                    if released:
+                        yield released
+                    
+                    if guard.rejected:
+                        stream.finish(self._reject_stream(query, guard.reason, state))
+                        return
+                    
+                    generated = self.local_guide.build_response_object(
+                        "".join(chunks), state.selected_city, tuple(sources)
+                    )
+                    validated = await self.guard_agent.validate_response_object_async(
+                        generated,
+                        context_content,
+                        self.cpu_executor,
+                        city_context.get_content_hash()
+                    )
+                    stream.finish(self._record_response(query, validated, state))
+                    return
+                    
+            except Exception as e:
+                response = self._create_error_response(f"Processing error: {str(e)}")
+        
+        # Not generated by the model: send the whole text as one chunk, unless
+        # generation failed after text went out; the final response replaces it
+        stream.finish(response)
+        if not stream.text:
+            yield response.text
+    
+    def _check_ready(self, state: AppState) -> Optional[Response]:
+        """
+        Check that the system can answer queries for a session.
+        
+        Args:
+            state: Session state
+            
+        Returns:
+            Error response if not ready, None otherwise
+        """
+        if not self.is_initialized:
+            return self._create_error_response("System not initialized")
+        
+        if not state.is_city_selected():
+            return self._create_error_response("No city selected. Please select a city first.")
+        
+        if not state.is_context_loaded():
+            return self._create_error_response("City context not loaded. Please select a city.")
+        
+        return None
+    
+    def _refresh_context(self, state: AppState) -> CityContext:
+        """
+        Move a session to the newest loaded context of its city.
+        
+        Loads the city again if it was unloaded to stay within the memory budget.
+        
+        Args:
+            state: Session state with a loaded context
+            
+        Returns:
+            The context the current query should use
+        """
+        try:
+            latest = self.context_registry.get(state.loaded_context.city_name)
+        except (ValueError, IOError):
+            # The city's file is gone; keep answering from the context the session has
+            return state.loaded_context
+        
+        if latest is not state.loaded_context:
+            state.loaded_context = latest
+            if state is self.app_state:
+                self.context_loader.use_context(latest)
+        return state.loaded_context
+    
+    def _validate_query(self, query_text: str, state: AppState) -> Tuple[Query, Optional[Response]]:
+        """
+        Create and validate a query.
+        
+        Args:
+            query_text: User's query text
+            state: Session state
+            
+        Returns:
+            Tuple of (query, refusal response if the query was rejected)
+        """
+        # Step 1: Create and validate query
+        query = self.query_validator.create_validation_response(
+            query_text, 
+            state.selected_city
+        )
+        return query, self._reject_query(query, state)
+    
+    def _reject_query(self, query: Query, state: AppState) -> Optional[Response]:
+        """
+        Build and record the refusal for a query that failed validation.
+        
+        Args:
+            query: Validated query
+            state: Session state
+            
+        Returns:
+            Refusal response, or None if the query is valid
+        """
+        # Step 2: Check query validation
+        if query.is_valid:
+            return None
+        
+        response = Response(
+            text=query.validation_reason,
+            is_refusal=True,
+            refusal_reason="Query validation failed",
+            source_context=f"{state.selected_city} context"
+        )
+        state.add_interaction(query, response)
+        return response
+    
+    def _finalize_response(self, query: Query, response: Response, city_context: CityContext,
+                           state: AppState) -> Response:
+        """
+        Validate a generated response and record the interaction.
+        
+        Args:
+            query: Validated query
+            response: Generated response
+            city_context: Context snapshot the response was generated from
+            state: Session state
+            
+        Returns:
+            Validated response
+        """
+        # Step 4: Validate response with Guard Agent
+        validated_response = self.guard_agent.validate_response_object(
+            response,
+            city_context.context_content,
+            city_context.get_content_hash()
+        )
+        
+        return self._record_response(query, validated_response, state)
+    
+    def _reject_stream(self, query: Query, reason: str, state: AppState) -> Response:
+        """
+        Build and record the refusal for a stream stopped by the streaming guard.
+        
+        Args:
+            query: Validated query
+            reason: Why the guard stopped generation
+            state: Session state
+            
+        Returns:
+            Refusal response
+        """
+        response = Response(
+            text=self.guard_agent.force_refusal("validation failed"),
+            is_refusal=True,
+            refusal_reason=f"Guard agent stopped generation: {reason}",
+            source_context=f"{state.selected_city} context (RAG-enhanced)",
+            validation_passed=False
+        )
+        return self._record_response(query, response, state)
+    
+    def _record_response(self, query: Query, response: Response, state: AppState) -> Response:
+        """
+        Standardize refusals and add the interaction to the history.
+        
+        Args:
+            query: Validated query
+            response: Validated response
+            state: Session state
+            
+        Returns:
+            Final response
+        """
+        # Step 5: Ensure standardized refusal format if needed
+        if response.is_refusal:
+            response.text = self.refusal_handler.ensure_standardized_refusal(
+                response.text,
+                RefusalReason.INSUFFICIENT_DATA
+            )
+        
+        # Step 6: Add to conversation history
+        state.add_interaction(query, response)
+        
+        return response
+    
     def get_available_cities(self) -> list:
         """
         Get list of available cities.
@@ -156,60 +557,86 @@ class LocalGuideSystem:
         """
         return self.context_loader.get_available_cities()
     
-    def get_current_city(self) -> Optional[str]:
+    def get_current_city(self, session_id: Optional[str] = None) -> Optional[str]:
         """
         Get currently selected city.
         
+        Args:
+            session_id: Session identifier, or None for the default state
+            
         Returns:
             Current city name or None if no city selected
         """
-        return self.app_state.selected_city
+        return self.peek_session_state(session_id).selected_city
     
-    def get_system_status(self) -> dict:
+    def get_system_status(self, session_id: Optional[str] = None) -> dict:
         """
         Get current system status.
         
+        Args:
+            session_id: Session identifier, or None for the default state
+            
         Returns:
             Dictionary with system status information
         """
+        state = self.peek_session_state(session_id)
+        history = state.conversation_history.get_statistics()
         return {
             'initialized': self.is_initialized,
-            'selected_city': self.app_state.selected_city,
-            'context_loaded': self.app_state.is_context_loaded(),
-            'conversation_length': len(self.app_state.conversation_history),
+            'selected_city': state.selected_city,
+            'context_loaded': state.is_context_loaded(),
+            'conversation_length': history['total_turns'],
+            'retained_turns': history['retained_turns'],
             'model_info': self.local_guide.get_model_info(),
+            'prompt_cache': self.local_guide.get_prompt_cache_stats(),
+            'agent_pool': self.local_guide.get_agent_pool_stats(),
+            'guard_context_cache': self.guard_agent.get_context_cache_stats(),
+            'city_contexts': self.context_registry.get_stats(),
+            'context_reload': self.context_watcher.get_stats(),
+            'sessions': self.sessions.get_stats(),
             'available_cities': self.get_available_cities()
         }
     
-    def reset_session(self) -> None:
-        """Reset the current session and clear state."""
-        self.app_state.reset_city_selection()
-        self.context_loader.clear_context()
+    def reset_session(self, session_id: Optional[str] = None) -> None:
+        """
+        Reset the current session and clear state.
+        
+        Args:
+            session_id: Session identifier, or None for the default state
+        """
+        self.get_session_state(session_id).reset_city_selection()
+        if session_id is None:
+            # The loader's current context belongs to the single-user interfaces
+            self.context_loader.clear_context()
     
-    def switch_city(self, new_city: str) -> Tuple[bool, str]:
+    def switch_city(self, new_city: str, session_id: Optional[str] = None) -> Tuple[bool, str]:
         """
         Switch to a different city.
         
         Args:
             new_city: Name of the new city to switch to
+            session_id: Session identifier, or None for the default state
             
         Returns:
             Tuple of (success, message)
         """
         # Clear current state
-        self.reset_session()
+        self.reset_session(session_id)
         
         # Select new city
-        return self.select_city(new_city)
+        return self.select_city(new_city, session_id)
     
-    def get_conversation_history(self) -> list:
+    def get_conversation_history(self, session_id: Optional[str] = None) -> list:
         """
         Get conversation history for current session.
         
+        Args:
+            session_id: Session identifier, or None for the default state
+            
         Returns:
             List of (query, response) tuples
         """
-        return self.app_state.conversation_history.copy()
+        return self.peek_session_state(session_id).conversation_history.copy()
     
     def get_context_summary(self) -> str:
         """
@@ -299,16 +726,23 @@ class LocalGuideSystem:
             validation_passed=False
         )
     
-    def get_usage_statistics(self) -> dict:
+    def get_usage_statistics(self, session_id: Optional[str] = None) -> dict:
         """
         Get usage statistics for the current session.
         
+        Args:
+            session_id: Session identifier, or None for the default state
+            
         Returns:
             Dictionary with usage statistics
         """
-        history = self.app_state.conversation_history
+        state = self.peek_session_state(session_id)
+        
+        # Running counters cover turns already dropped from the bounded history
+        counters = state.conversation_history.get_statistics()
+        total_queries = counters['total_turns']
         
-        if not history:
+        if total_queries == 0:
             return {
                 'total_queries': 0,
                 'successful_responses': 0,
@@ -316,8 +750,7 @@ class LocalGuideSystem:
                 'refusal_rate': 0.0
             }
         
-        total_queries = len(history)
-        refusal_responses = sum(1 for _, response in history if response.is_refusal)
+        refusal_responses = counters['refusal_turns']
         successful_responses = total_queries - refusal_responses
         
         return {
@@ -325,7 +758,7 @@ class LocalGuideSystem:
             'successful_responses': successful_responses,
             'refusal_responses': refusal_responses,
             'refusal_rate': refusal_responses / total_queries if total_queries > 0 else 0.0,
-            'current_city': self.app_state.selected_city,
-            'session_start': history[0][0].timestamp if history else None,
-            'last_query': history[-1][0].timestamp if history else None
+            'current_city': state.selected_city,
+            'session_start': counters['first_timestamp'],
+            'last_query': counters['last_timestamp']
         }
\ No newline at end of file
@@ -3,30 +3,41 @@ Core data models for Local Guide AI application.
 """
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional, List, Tuple
+from functools import cached_property
+from typing import Optional, List
 import hashlib
+import os
 
 
-@dataclass
+@dataclass(frozen=True)
 class CityContext:
-    """Model for city-specific context data."""
+    """
+    Model for city-specific context data.
+    
+    Immutable, so one loaded instance can be shared by every session.
+    """
     city_name: str
     context_content: str
     file_path: str
     last_loaded: datetime
     
     def is_valid(self) -> bool:
-        """Check if the context is valid."""
+        """Check if the context is valid: complete and read from the city's own context file."""
         return (
             bool(self.city_name) and 
             bool(self.context_content) and 
             bool(self.file_path) and
-            self.city_name.lower() in ['madurai', 'dindigul']
+            os.path.basename(self.file_path).lower() == f"{self.city_name.lower()}_context.md"
         )
     
+    @cached_property
+    def content_hash(self) -> str:
+        """Hash of the context content, computed once."""
+        return hashlib.md5(self.context_content.encode()).hexdigest()
+    
     def get_content_hash(self) -> str:
         """Get hash of the context content for change detection."""
-        return hashlib.md5(self.context_content.encode()).hexdigest()
+        return self.content_hash
 
 
 @dataclass
@@ -55,6 +66,7 @@ class Response:
     refusal_reason: Optional[str] = None
     source_context: str = ""
     validation_passed: bool = True
+    source_chunks: tuple = ()  # Retrieved ContextChunks the model was given, in prompt order
     
     def is_standardized_refusal(self) -> bool:
         """Check if response uses standardized refusal phrases."""
@@ -75,12 +87,18 @@ class AppState:
     """Model for application state."""
     selected_city: Optional[str] = None
     loaded_context: Optional[CityContext] = None
-    conversation_history: List[Tuple[Query, Response]] = None
+    conversation_history: "ConversationHistory" = None
     
     def __post_init__(self):
         """Initialize conversation history if not provided."""
-        if self.conversation_history is None:
-            self.conversation_history = []
+        # Imported here: conversation_history builds on the models above
+        from conversation_history import ConversationHistory
+        
+        if not isinstance(self.conversation_history, ConversationHistory):
+            turns = self.conversation_history or []
+            self.conversation_history = ConversationHistory.from_env()
+            for query, response in turns:
+                self.conversation_history.append(query, response)
     
     def reset_city_selection(self) -> None:
         """Reset city selection and clear context."""
@@ -90,11 +108,13 @@ class AppState:
     
     def add_interaction(self, query: Query, response: Response) -> None:
         """Add a query-response interaction to history."""
-        self.conversation_history.append((query, response))
+        self.conversation_history.append(query, response)
     
     def get_available_cities(self) -> List[str]:
-        """Get list of available cities."""
-        return ['Madurai', 'Dindigul']
+        """Get list of available cities from the default context directory."""
+        from city_catalog import get_catalog
+        
+        return [entry.display_name for entry in get_catalog().get_manifest()]
     
     def is_city_selected(self) -> bool:
         """Check if a city is currently selected."""
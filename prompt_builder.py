@@ -0,0 +1,213 @@
+"""
+Token-budgeted prompt context builder for Local Guide AI.
+Assembles the city context sent to the model from retrieved chunks, without
+repeating any text, within an explicit input token budget. Stable context is
+kept apart from per-query context so it can sit in a cached prompt prefix.
+"""
+import os
+import sys
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+# Add current directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from rag_retriever import RAGRetriever, ContextChunk
+
+
+@dataclass
+class PromptContext:
+    """City context assembled for one query."""
+    text: str  # Per-query context: time context and retrieved chunks
+    mode: str
+    estimated_tokens: int  # Estimated tokens of city_context and text together
+    city_context: str = ""  # Context shared by every query for the city, safe to cache
+    chunk_ids: List[str] = field(default_factory=list)  # Chunks included, in prompt order
+    chunks: Tuple[ContextChunk, ...] = ()  # The included chunks themselves, in prompt order
+    truncated: bool = False  # True if relevant text was left out to meet the budget
+
+
+class PromptBuilder:
+    """Builds the context part of the prompt under a token budget."""
+    
+    PROMPT_MODES = ('rag-only', 'full-context')
+    
+    def __init__(self, mode: str = 'rag-only', token_budget: int = 1200,
+                 retrieval_depth: int = 8, chars_per_token: float = 4.0):
+        """
+        Initialize the prompt builder.
+        
+        Args:
+            mode: 'rag-only' sends retrieved chunks and neighbouring sections
+                  within the budget; 'full-context' sends the whole city file once
+            token_budget: Maximum estimated tokens of context in rag-only mode
+            retrieval_depth: Number of ranked chunks considered before neighbours
+            chars_per_token: Characters per token used for estimates
+            
+        Raises:
+            ValueError: If the mode is unknown
+        """
+        if mode not in self.PROMPT_MODES:
+            raise ValueError(f"Unknown prompt mode '{mode}'. Available modes: {self.PROMPT_MODES}")
+        
+        self.mode = mode
+        self.token_budget = token_budget
+        self.retrieval_depth = retrieval_depth
+        self.chars_per_token = chars_per_token
+    
+    def estimate_tokens(self, text: str) -> int:
+        """
+        Estimate the number of model tokens in text.
+        
+        Args:
+            text: Text to measure
+            
+        Returns:
+            Estimated token count
+        """
+        return int(len(text) / self.chars_per_token + 0.5)
+    
+    def build(self, query: str, city: str, retriever: RAGRetriever, full_context: str,
+              content_hash: Optional[str] = None) -> PromptContext:
+        """
+        Build the city context for a query.
+        
+        Args:
+            query: User query
+            city: Selected city, already loaded into the retriever
+            retriever: RAG retriever holding the city's chunks
+            full_context: Full city context file content; chunks come from the
+                          index built from exactly this content
+            content_hash: Hash of full_context, computed if not given
+            
+        Returns:
+            PromptContext with the assembled text and what went into it
+        """
+        now = retriever.clock()
+        time_line = f"TIME CONTEXT: {retriever.get_time_context(now)}"
+        
+        if self.mode == 'full-context':
+            city_context = f"FULL CONTEXT:\n{full_context}"
+            return PromptContext(
+                text=time_line,
+                mode=self.mode,
+                estimated_tokens=self.estimate_tokens(city_context) + self.estimate_tokens(time_line),
+                city_context=city_context
+            )
+        
+        index = retriever.index_for(city, full_context, content_hash)
+        ranked = retriever.retrieve_cached(query, city, self.retrieval_depth, retriever.get_current_period(now),
+                                           index=index)
+        chunks = index.chunks
+        selected, truncated = self._select_chunks([result.chunk for result in ranked], chunks)
+        
+        parts = [time_line, "RELEVANT LOCAL INFORMATION:"]
+        for i, chunk in enumerate(selected, 1):
+            parts.append(f"\n{i}. {chunk.section}:")
+            parts.append(chunk.content)
+        text = "\n".join(parts)
+        
+        return PromptContext(
+            text=text,
+            mode=self.mode,
+            estimated_tokens=self.estimate_tokens(text),
+            chunk_ids=[chunk.chunk_id for chunk in selected],
+            chunks=tuple(selected),
+            truncated=truncated
+        )
+    
+    def _select_chunks(self, ranked: List[ContextChunk], chunks: tuple) -> tuple:
+        """
+        Pick chunks for the prompt: ranked chunks first, then their neighbours.
+        
+        Chunks are added greedily while they fit the budget; each chunk is
+        used at most once. Without any ranked chunk the city file is taken
+        in document order, so the model still gets some context.
+        
+        Args:
+            ranked: Retrieved chunks, best first
+            chunks: All chunks of the city in document order
+            
+        Returns:
+            Tuple of (selected chunks in prompt order, whether anything was left out)
+        """
+        positions = {chunk.chunk_id: position for position, chunk in enumerate(chunks)}
+        selected: List[ContextChunk] = []
+        seen = set()
+        used_tokens = 0
+        truncated = False
+        
+        def try_add(chunk: ContextChunk) -> None:
+            nonlocal used_tokens, truncated
+            if chunk.chunk_id in seen:
+                return
+            cost = self.estimate_tokens(f"\n{len(selected) + 1}. {chunk.section}:\n{chunk.content}")
+            if used_tokens + cost > self.token_budget:
+                truncated = True
+                return
+            seen.add(chunk.chunk_id)
+            selected.append(chunk)
+            used_tokens += cost
+        
+        for chunk in ranked:
+            try_add(chunk)
+        
+        if ranked:
+            # Neighbouring sections, nearest first, around the ranked chunks in rank order
+            for distance in (1, 2):
+                for chunk in ranked:
+                    position = positions.get(chunk.chunk_id)
+                    if position is None:
+                        continue
+                    for neighbour in (position - distance, position + distance):
+                        if 0 <= neighbour < len(chunks):
+                            try_add(chunks[neighbour])
+        else:
+            for chunk in chunks:
+                try_add(chunk)
+        
+        return selected, truncated
+
+
+class PromptCacheStats:
+    """Thread-safe totals of cached and uncached input tokens reported by the model."""
+    
+    def __init__(self):
+        """Initialize empty totals."""
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.input_tokens = 0
+        self.cache_read_tokens = 0
+        self.cache_write_tokens = 0
+    
+    def record(self, usage: Dict[str, Any]) -> None:
+        """
+        Add one request's token usage.
+        
+        Args:
+            usage: Usage dictionary in Bedrock's format (inputTokens,
+                   cacheReadInputTokens, cacheWriteInputTokens)
+        """
+        with self._lock:
+            self.requests += 1
+            self.input_tokens += usage.get('inputTokens', 0)
+            self.cache_read_tokens += usage.get('cacheReadInputTokens', 0)
+            self.cache_write_tokens += usage.get('cacheWriteInputTokens', 0)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get prompt cache statistics.
+        
+        Returns:
+            Dictionary with token totals and the share of input read from cache
+        """
+        with self._lock:
+            total_input = self.input_tokens + self.cache_read_tokens + self.cache_write_tokens
+            return {
+                'requests': self.requests,
+                'uncached_input_tokens': self.input_tokens,
+                'cache_read_input_tokens': self.cache_read_tokens,
+                'cache_write_input_tokens': self.cache_write_tokens,
+                'cached_ratio': self.cache_read_tokens / total_input if total_input > 0 else 0.0
+            }
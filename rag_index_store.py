@@ -0,0 +1,160 @@
+"""
+On-disk retrieval index store for Local Guide AI.
+Persists each city's compiled InvertedIndex, including per-chunk time
+features and grounding shingles, next to its context file so new processes
+can skip chunking and tokenization.
+
+Sidecars are plain JSON data, never pickles: the context directory is
+editor-writable, and loading a sidecar must not be able to run code.
+"""
+import os
+import sys
+import json
+import tempfile
+from typing import Optional
+
+# Add current directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models import CityContext
+from rag_retriever import ContextChunk, InvertedIndex
+
+# Bump whenever the sidecar layout changes so stale sidecars are rebuilt
+INDEX_FORMAT_VERSION = 4
+INDEX_FILE_SUFFIX = ".idx"
+
+
+def _chunk_to_dict(chunk: ContextChunk) -> dict:
+    """Serialize a chunk with its pre-tokenized fields."""
+    return {
+        'content': chunk.content,
+        'section': chunk.section,
+        'city': chunk.city,
+        'chunk_id': chunk.chunk_id,
+        'term_counts': chunk.term_counts,
+        'section_tokens': list(chunk.section_tokens),
+        'time_mask': chunk.time_mask,
+        'shingles': sorted(chunk.shingles)
+    }
+
+
+def _chunk_from_dict(data: dict) -> ContextChunk:
+    """Rebuild a chunk from its serialized fields without tokenizing it again."""
+    return ContextChunk(
+        content=str(data['content']),
+        section=str(data['section']),
+        city=str(data['city']),
+        chunk_id=str(data['chunk_id']),
+        term_counts={str(term): int(count) for term, count in data['term_counts'].items()},
+        section_tokens=tuple(str(token) for token in data['section_tokens']),
+        time_mask=int(data['time_mask']),
+        shingles=frozenset(int(shingle) for shingle in data['shingles'])
+    )
+
+
+class RetrievalIndexStore:
+    """Reads and writes compiled retrieval index sidecar files."""
+    
+    def __init__(self, index_dir: Optional[str] = None):
+        """
+        Initialize the index store.
+        
+        Args:
+            index_dir: Directory for sidecar files. Defaults to the directory
+                       of each context file.
+        """
+        self.index_dir = index_dir
+    
+    def get_index_path(self, city_context: CityContext) -> str:
+        """
+        Get the sidecar path for a city context.
+        
+        Args:
+            city_context: Loaded city context
+            
+        Returns:
+            Path of the compiled index file, e.g. context/madurai_context.idx
+        """
+        base_name = os.path.splitext(os.path.basename(city_context.file_path))[0]
+        directory = self.index_dir or os.path.dirname(city_context.file_path)
+        return os.path.join(directory, base_name + INDEX_FILE_SUFFIX)
+    
+    def load(self, city_context: CityContext) -> Optional[InvertedIndex]:
+        """
+        Load the compiled index for a city context if it is still current.
+        
+        Args:
+            city_context: Loaded city context
+            
+        Returns:
+            InvertedIndex, or None if the sidecar is missing, unreadable,
+            from another format version or built from different content
+        """
+        index_path = self.get_index_path(city_context)
+        if not os.path.exists(index_path):
+            return None
+        
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                payload = json.load(f)
+        except Exception:
+            return None
+        
+        if not isinstance(payload, dict):
+            return None
+        if payload.get('format_version') != INDEX_FORMAT_VERSION:
+            return None
+        if payload.get('content_hash') != city_context.get_content_hash():
+            return None
+        
+        try:
+            index = InvertedIndex(
+                [_chunk_from_dict(chunk) for chunk in payload['chunks']],
+                k1=float(payload['k1']),
+                b=float(payload['b']),
+                section_weight=int(payload['section_weight'])
+            )
+        except Exception:
+            return None
+        index.content_hash = payload['content_hash']
+        return index
+    
+    def save(self, city_context: CityContext, index: InvertedIndex) -> bool:
+        """
+        Write the compiled index for a city context.
+        
+        The file is written to a temporary path and renamed into place so
+        concurrent readers never see a partial sidecar.
+        
+        Args:
+            city_context: City context the index was built from
+            index: Compiled inverted index
+            
+        Returns:
+            True if the sidecar was written, False otherwise
+        """
+        index_path = self.get_index_path(city_context)
+        payload = {
+            'format_version': INDEX_FORMAT_VERSION,
+            'content_hash': city_context.get_content_hash(),
+            'k1': index.k1,
+            'b': index.b,
+            'section_weight': index.section_weight,
+            'chunks': [_chunk_to_dict(chunk) for chunk in index.chunks]
+        }
+        
+        try:
+            directory = os.path.dirname(index_path) or "."
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=directory, suffix=INDEX_FILE_SUFFIX + ".tmp")
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(payload, f, separators=(',', ':'))
+                os.replace(temp_path, index_path)
+            except Exception:
+                os.unlink(temp_path)
+                raise
+            return True
+        except Exception as e:
+            print(f"Warning: could not write retrieval index {index_path}: {str(e)}")
+            return False
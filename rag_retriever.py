@@ -5,37 +5,294 @@ Retrieves relevant context sections based on user queries with time awareness.
 import re
 import os
 import sys
-from datetime import datetime
-from typing import List, Dict, Tuple, Optional
-from dataclasses import dataclass
+import math
+import time
+import hashlib
+import heapq
+import zlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Tuple, Optional, FrozenSet, NamedTuple, Callable
+from dataclasses import dataclass, field
+
+try:
+    import numpy as np
+except ImportError:  # Batch retrieval is unavailable without NumPy
+    np = None
 
 # Add current directory to path for imports
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+# Local time of the supported cities
+IST = timezone(timedelta(hours=5, minutes=30), 'IST')
 
-@dataclass
+# Keywords that tie a query or chunk to a time of day
+TIME_SENSITIVE_KEYWORDS = {
+    'morning': ['breakfast', 'early', 'dawn', '6am', '7am', '8am', '9am'],
+    'afternoon': ['lunch', 'noon', 'midday', '12pm', '1pm', '2pm', '3pm'],
+    'evening': ['dinner', 'sunset', 'dusk', '6pm', '7pm', '8pm', '9pm'],
+    'night': ['late', 'night', 'after', '10pm', '11pm', 'midnight'],
+    'timing': ['when', 'time', 'hours', 'open', 'close', 'schedule']
+}
+
+# Bit flags for per-chunk and per-query time features
+TIME_PERIODS = tuple(TIME_SENSITIVE_KEYWORDS)
+PERIOD_BITS = {period: 1 << i for i, period in enumerate(TIME_PERIODS)}
+TIME_WORDS_BIT = 1 << len(TIME_PERIODS)  # Mentions opening hours or clock times
+TIME_MASK_SIZE = TIME_WORDS_BIT << 1
+
+# Words left out of grounding shingles, so shingles pair up content words
+SHINGLE_STOPWORDS = frozenset({
+    'a', 'an', 'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with',
+    'by', 'from', 'is', 'are', 'was', 'were', 'be', 'been', 'it', 'its', 'this', 'that',
+    'these', 'those', 'as', 'also', 'can', 'you', 'your', 'there', 'here', 'which'
+})
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase word tokens.
+    
+    Args:
+        text: Input text
+        
+    Returns:
+        List of tokens in document order
+    """
+    return re.findall(r'\b\w+\b', text.lower())
+
+
+def shingle_terms(text: str) -> List[str]:
+    """
+    Get the words of a text that take part in grounding shingles.
+    
+    Args:
+        text: Input text
+        
+    Returns:
+        Lowercase tokens without stopwords, in document order
+    """
+    return [token for token in tokenize(text) if token not in SHINGLE_STOPWORDS]
+
+
+def hash_shingle(*terms: str) -> int:
+    """
+    Hash a word or word pair into a shingle.
+    
+    CRC32 is stable across processes, unlike hash(), so shingles can be
+    stored in the compiled index sidecar.
+    
+    Args:
+        terms: One or two consecutive terms
+        
+    Returns:
+        32-bit shingle hash
+    """
+    return zlib.crc32(" ".join(terms).encode('utf-8'))
+
+
+def text_shingles(terms: List[str]) -> FrozenSet[int]:
+    """
+    Build the shingles of a text: each term and each pair of consecutive terms.
+    
+    Args:
+        terms: Output of shingle_terms
+        
+    Returns:
+        Frozen set of shingle hashes
+    """
+    shingles = {hash_shingle(term) for term in terms}
+    shingles.update(hash_shingle(first, second) for first, second in zip(terms, terms[1:]))
+    return frozenset(shingles)
+
+
+@dataclass(frozen=True)
 class ContextChunk:
-    """Represents a chunk of context with metadata."""
+    """Represents a chunk of context with metadata. Chunks are shared and immutable."""
     content: str
     section: str
-    relevance_score: float
     city: str
     chunk_id: str
+    
+    # Pre-tokenized representations, computed once when the chunk is created
+    content_lower: str = field(default="", repr=False)
+    term_counts: Dict[str, int] = field(default_factory=dict, repr=False)
+    token_set: FrozenSet[str] = field(default=frozenset(), repr=False)
+    section_tokens: Tuple[str, ...] = field(default=(), repr=False)
+    time_mask: int = field(default=0, repr=False)  # PERIOD_BITS and TIME_WORDS_BIT flags
+    shingles: FrozenSet[int] = field(default=frozenset(), repr=False)  # For grounding checks
+    
+    def __post_init__(self):
+        """Tokenize content and section title and build shingles unless already provided."""
+        if not self.content_lower:
+            object.__setattr__(self, 'content_lower', self.content.lower())
+        if not self.term_counts:
+            object.__setattr__(self, 'term_counts', dict(Counter(tokenize(self.content_lower))))
+        if not self.token_set:
+            object.__setattr__(self, 'token_set', frozenset(self.term_counts))
+        if not self.section_tokens:
+            object.__setattr__(self, 'section_tokens', tuple(tokenize(self.section)))
+        if not self.shingles:
+            object.__setattr__(self, 'shingles', text_shingles(shingle_terms(self.content_lower)))
+
+
+class RetrievalResult(NamedTuple):
+    """A retrieval score paired with a reference to a shared context chunk."""
+    chunk: ContextChunk
+    score: float
+
+
+class InvertedIndex:
+    """BM25 inverted index over the context chunks of a single city."""
+    
+    def __init__(self, chunks: List[ContextChunk], k1: float = 1.5, b: float = 0.75,
+                 section_weight: int = 2):
+        """
+        Build the index from a list of chunks.
+        
+        The index keeps its own tuple of the chunks, so a reader holding an
+        index always sees chunks and postings from the same load.
+        
+        Args:
+            chunks: Context chunks to index
+            k1: BM25 term frequency saturation parameter
+            b: BM25 document length normalization parameter
+            section_weight: How many times section title terms are counted
+        """
+        self.chunks: Tuple[ContextChunk, ...] = tuple(chunks)
+        self.content_hash: Optional[str] = None  # Hash of the context the chunks came from
+        self.k1 = k1
+        self.b = b
+        self.section_weight = section_weight
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}  # term -> [(chunk index, tf)]
+        self.doc_lengths: List[int] = []
+        
+        for doc_id, chunk in enumerate(self.chunks):
+            term_counts = Counter(chunk.term_counts)
+            for term in chunk.section_tokens:
+                term_counts[term] += section_weight
+            
+            self.doc_lengths.append(sum(term_counts.values()))
+            for term, tf in term_counts.items():
+                self.postings.setdefault(term, []).append((doc_id, tf))
+        
+        self.doc_count = len(self.doc_lengths)
+        self.avg_doc_length = (sum(self.doc_lengths) / self.doc_count) if self.doc_count else 0.0
+        self.idf: Dict[str, float] = {
+            term: math.log(1 + (self.doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self.postings.items()
+        }
+        
+        # Per-document length normalization is query independent, so fold it in once
+        self._length_norms = [
+            k1 * (1 - b + b * (length / self.avg_doc_length)) if self.avg_doc_length else k1
+            for length in self.doc_lengths
+        ]
+    
+    def search(self, query_terms: List[str]) -> Dict[int, float]:
+        """
+        Score every chunk that contains at least one query term.
+        
+        Args:
+            query_terms: Tokenized query
+            
+        Returns:
+            Mapping of chunk index to BM25 score
+        """
+        scores: Dict[int, float] = {}
+        k1_plus_one = self.k1 + 1
+        
+        for term in set(query_terms):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self.idf[term]
+            for doc_id, tf in postings:
+                term_score = idf * tf * k1_plus_one / (tf + self._length_norms[doc_id])
+                scores[doc_id] = scores.get(doc_id, 0.0) + term_score
+        
+        return scores
+    
+    def to_weight_matrix(self) -> Tuple[Dict[str, int], "np.ndarray"]:
+        """
+        Materialize the BM25 term weights as a dense term x chunk matrix.
+        
+        Returns:
+            Tuple of (term -> row mapping, float32 weight matrix)
+        """
+        vocabulary = {term: row for row, term in enumerate(self.postings)}
+        weights = np.zeros((len(vocabulary), self.doc_count), dtype=np.float32)
+        k1_plus_one = self.k1 + 1
+        
+        for term, row in vocabulary.items():
+            idf = self.idf[term]
+            for doc_id, tf in self.postings[term]:
+                weights[row, doc_id] = idf * tf * k1_plus_one / (tf + self._length_norms[doc_id])
+        
+        return vocabulary, weights
+
+
+@dataclass
+class TermChunkMatrix:
+    """Dense scoring matrices for vectorized batch retrieval over one city."""
+    index: InvertedIndex  # The index the matrices were built from
+    vocabulary: Dict[str, int]
+    weights: "np.ndarray"  # terms x chunks, BM25 weights
+    time_masks: "np.ndarray"  # chunks, time feature bitmask of each chunk
 
 
 class RAGRetriever:
     """RAG-based retriever for context-aware responses."""
     
-    def __init__(self):
-        """Initialize the RAG retriever."""
+    RETRIEVAL_MODES = ('lexical', 'vector', 'hybrid')
+    
+    def __init__(self, index_store=None, clock: Optional[Callable[[], datetime]] = None,
+                 tz: timezone = IST, embedder=None, retrieval_mode: str = 'lexical',
+                 hybrid_config=None, reranker=None, cache=None):
+        """
+        Initialize the RAG retriever.
+        
+        Args:
+            index_store: Optional RetrievalIndexStore used to persist compiled indexes
+            clock: Optional callable returning the current time, for testing
+            tz: Timezone used to resolve the time of day, IST by default
+            embedder: Optional HashingEmbedder, required for vector and hybrid retrieval
+            retrieval_mode: Default retrieval mode, 'lexical', 'vector' or 'hybrid'
+            hybrid_config: Optional HybridRetrievalConfig for hybrid retrieval
+            reranker: Optional reranker for hybrid retrieval, defaults to
+                      KeywordCoverageReranker
+            cache: Optional RetrievalCache used by build_rag_context
+            
+        Raises:
+            ValueError: If the retrieval mode is unknown or needs a missing embedder
+        """
+        if retrieval_mode not in self.RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode '{retrieval_mode}'. Available modes: {self.RETRIEVAL_MODES}")
+        if retrieval_mode != 'lexical' and embedder is None:
+            raise ValueError(f"Retrieval mode '{retrieval_mode}' requires an embedder")
+        
+        self.index_store = index_store
+        self.embedder = embedder
+        self.retrieval_mode = retrieval_mode
+        self.hybrid_config = hybrid_config
+        self.reranker = reranker
+        self.cache = cache
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self.tz = tz
+        self.clock = clock or (lambda: datetime.now(self.tz))
         self.context_chunks = {}  # city -> List[ContextChunk]
-        self.time_sensitive_keywords = {
-            'morning': ['breakfast', 'early', 'dawn', '6am', '7am', '8am', '9am'],
-            'afternoon': ['lunch', 'noon', 'midday', '12pm', '1pm', '2pm', '3pm'],
-            'evening': ['dinner', 'sunset', 'dusk', '6pm', '7pm', '8pm', '9pm'],
-            'night': ['late', 'night', 'after', '10pm', '11pm', 'midnight'],
-            'timing': ['when', 'time', 'hours', 'open', 'close', 'schedule']
-        }
+        self.indexes = {}  # city -> InvertedIndex
+        self.previous_indexes = {}  # city -> InvertedIndex replaced by the last reload
+        self.term_matrices = {}  # city -> TermChunkMatrix, built on first batch
+        self.vector_indexes = {}  # city -> VectorIndex, built on first vector query
+        self.time_sensitive_keywords = dict(TIME_SENSITIVE_KEYWORDS)
+        # Weight of the time sensitivity boost relative to the BM25 score
+        self.time_boost_weight = 0.5
+        # (query time mask, current period) -> boost indexed by chunk time mask
+        self._time_boost_rows: Dict[Tuple[int, str], Tuple[float, ...]] = {}
     
     def load_context_chunks(self, city: str, context_content: str) -> None:
         """
@@ -45,8 +302,110 @@ class RAGRetriever:
             city: City name
             context_content: Full context content
         """
-        chunks = self._chunk_context(context_content, city)
-        self.context_chunks[city.lower()] = chunks
+        index = InvertedIndex(self._chunk_context(context_content, city))
+        index.content_hash = hashlib.md5(context_content.encode()).hexdigest()
+        self._install_index(city.lower(), index)
+    
+    def load_city_context(self, city_context) -> None:
+        """
+        Load a city's index, reusing the compiled sidecar when it is current.
+        
+        Nothing is done if the city is already loaded from the same content.
+        Otherwise the index is read from the index store, or built and
+        written back when the stored copy is missing or stale.
+        
+        Args:
+            city_context: CityContext to load
+        """
+        city_lower = city_context.city_name.lower()
+        content_hash = city_context.get_content_hash()
+        
+        current = self.indexes.get(city_lower)
+        if current is not None and current.content_hash == content_hash:
+            return
+        
+        index = self.index_store.load(city_context) if self.index_store else None
+        if index is None:
+            index = InvertedIndex(self._chunk_context(city_context.context_content, city_lower))
+            index.content_hash = content_hash
+            if self.index_store:
+                self.index_store.save(city_context, index)
+        
+        self._install_index(city_lower, index)
+    
+    def index_for(self, city: str, context_content: str, content_hash: Optional[str] = None) -> InvertedIndex:
+        """
+        Get the index built from exactly the given context content.
+        
+        A query keeps using the index of the context snapshot it started
+        with, even if the city is reloaded meanwhile: the current index and
+        the one it replaced are kept, and a snapshot older than both gets an
+        index built from its own content, which is not installed.
+        
+        Args:
+            city: City name
+            context_content: The query's context snapshot
+            content_hash: Hash of context_content, computed if not given
+            
+        Returns:
+            InvertedIndex whose content_hash matches the snapshot
+        """
+        city_lower = city.lower()
+        if content_hash is None:
+            content_hash = hashlib.md5(context_content.encode()).hexdigest()
+        
+        current = self.indexes.get(city_lower)
+        if current is not None and current.content_hash == content_hash:
+            return current
+        previous = self.previous_indexes.get(city_lower)
+        if previous is not None and previous.content_hash == content_hash:
+            return previous
+        
+        index = InvertedIndex(self._chunk_context(context_content, city_lower))
+        index.content_hash = content_hash
+        if current is None:
+            self._install_index(city_lower, index)
+        return index
+    
+    def _install_index(self, city_lower: str, index: InvertedIndex) -> None:
+        """Make an index the current one for a city, keeping the one it replaces."""
+        current = self.indexes.get(city_lower)
+        if current is not None and current.content_hash != index.content_hash:
+            self.previous_indexes[city_lower] = current
+        self.context_chunks[city_lower] = index.chunks
+        self.indexes[city_lower] = index
+        self.term_matrices.pop(city_lower, None)
+        self.vector_indexes.pop(city_lower, None)
+        
+        # Results cached for other content of this city are stale; queries still
+        # on the previous snapshot simply miss, as the key includes the hash
+        if self.cache is not None:
+            self.cache.invalidate(lambda key: key[1] == city_lower and key[3] != index.content_hash)
+    
+    def unload_city(self, city: str, content_hash: Optional[str] = None) -> bool:
+        """
+        Drop a city's index and everything derived from it.
+        
+        Args:
+            city: City name
+            content_hash: Only unload if the loaded index was built from this content
+            
+        Returns:
+            True if the city was unloaded, False otherwise
+        """
+        city_lower = city.lower()
+        index = self.indexes.get(city_lower)
+        if index is None or (content_hash is not None and index.content_hash != content_hash):
+            return False
+        
+        self.indexes.pop(city_lower, None)
+        self.previous_indexes.pop(city_lower, None)
+        self.context_chunks.pop(city_lower, None)
+        self.term_matrices.pop(city_lower, None)
+        self.vector_indexes.pop(city_lower, None)
+        if self.cache is not None:
+            self.cache.invalidate(lambda key: key[1] == city_lower)
+        return True
     
     def _chunk_context(self, content: str, city: str) -> List[ContextChunk]:
         """
@@ -57,7 +416,7 @@ class RAGRetriever:
             city: City name
             
         Returns:
-            List of context chunks
+            List of pre-tokenized context chunks
         """
         chunks = []
         
@@ -80,160 +439,449 @@ class RAGRetriever:
                     continue
                 
                 # Create chunk
+                chunk_content = subsection.strip()
+                content_lower = chunk_content.lower()
                 chunk = ContextChunk(
-                    content=subsection.strip(),
+                    content=chunk_content,
                     section=section_title,
-                    relevance_score=0.0,
                     city=city.lower(),
-                    chunk_id=f"{city.lower()}_{i}_{j}"
+                    chunk_id=f"{city.lower()}_{i}_{j}",
+                    content_lower=content_lower,
+                    time_mask=self._get_time_mask(content_lower)
                 )
                 chunks.append(chunk)
         
         return chunks
     
-    def retrieve_relevant_context(self, query: str, city: str, top_k: int = 5) -> List[ContextChunk]:
+    def retrieve_relevant_context(self, query: str, city: str, top_k: int = 5,
+                                  period: Optional[str] = None,
+                                  mode: Optional[str] = None,
+                                  index: Optional[InvertedIndex] = None) -> List[RetrievalResult]:
         """
         Retrieve most relevant context chunks for a query.
         
+        Shared chunks are never modified, so one retriever can serve
+        concurrent requests without locking.
+        
         Args:
             query: User query
             city: Selected city
             top_k: Number of top chunks to return
+            period: Current time period, resolved from the clock if not given
+            mode: Retrieval mode, defaults to the retriever's retrieval_mode
+            index: Index to search, defaults to the city's current index
             
         Returns:
-            List of relevant context chunks
+            List of retrieval results, best first
         """
-        city_lower = city.lower()
-        if city_lower not in self.context_chunks:
+        mode = mode or self.retrieval_mode
+        if mode == 'vector':
+            return self.retrieve_by_vector(query, city, top_k, index=index)
+        if mode == 'hybrid':
+            return self.retrieve_hybrid(query, city, top_k, period, index=index).results
+        return self.retrieve_by_keywords(query, city, top_k, period, index=index)
+    
+    def retrieve_by_keywords(self, query: str, city: str, top_k: int = 5,
+                             period: Optional[str] = None,
+                             index: Optional[InvertedIndex] = None) -> List[RetrievalResult]:
+        """
+        Retrieve chunks with BM25 keyword scoring and the time boost.
+        
+        Only chunks that share at least one term with the query are scored,
+        so the cost grows with the matching postings rather than the corpus.
+        
+        Args:
+            query: User query
+            city: Selected city
+            top_k: Number of top chunks to return
+            period: Current time period, resolved from the clock if not given
+            index: Index to search, defaults to the city's current index
+            
+        Returns:
+            List of retrieval results, best first
+        """
+        index = index or self.indexes.get(city.lower())
+        if index is None:
             return []
         
-        chunks = self.context_chunks[city_lower]
+        query_lower = query.lower()
+        bm25_scores = index.search(tokenize(query_lower))
+        if not bm25_scores:
+            return []
+        
+        # Time boost is a lookup by chunk time mask, one row per query
+        boost_row = self._get_time_boost_row(
+            self._get_time_mask(query_lower),
+            period or self.get_current_period()
+        )
+        
+        # Score each candidate chunk
+        scores = {}
+        for doc_id, bm25_score in bm25_scores.items():
+            time_boost = boost_row[index.chunks[doc_id].time_mask]
+            scores[doc_id] = bm25_score + time_boost * self.time_boost_weight
+        
+        # Heap-based selection of the top_k scores
+        top = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+        return [RetrievalResult(index.chunks[doc_id], score) for doc_id, score in top]
+    
+    def retrieve_by_vector(self, query: str, city: str, top_k: int = 5,
+                           index: Optional[InvertedIndex] = None) -> List[RetrievalResult]:
+        """
+        Retrieve chunks by embedding similarity, catching paraphrases that
+        share no keywords with the context.
+        
+        Args:
+            query: User query
+            city: Selected city
+            top_k: Number of top chunks to return
+            index: Index whose chunks are searched, defaults to the city's current index
+            
+        Returns:
+            List of retrieval results scored by cosine similarity, best first
+            
+        Raises:
+            ValueError: If the retriever has no embedder
+        """
+        if self.embedder is None:
+            raise ValueError("Vector retrieval requires an embedder")
         
-        # Score each chunk
-        scored_chunks = []
-        for chunk in chunks:
-            score = self._calculate_relevance_score(query, chunk)
-            chunk.relevance_score = score
-            scored_chunks.append(chunk)
+        city_lower = city.lower()
+        current = self.indexes.get(city_lower)
+        index = index or current
+        if index is None:
+            return []
         
-        # Sort by relevance score and return top_k
-        scored_chunks.sort(key=lambda x: x.relevance_score, reverse=True)
-        return scored_chunks[:top_k]
+        vector_index = self.vector_indexes.get(city_lower)
+        if vector_index is None or vector_index.chunks is not index.chunks:
+            from embedding_index import VectorIndex
+            vector_index = VectorIndex(index.chunks, self.embedder)
+            if index is current:
+                # Vectors of an older snapshot's chunks serve only that query
+                self.vector_indexes[city_lower] = vector_index
+        
+        return [
+            RetrievalResult(vector_index.chunks[doc_id], score)
+            for doc_id, score in vector_index.search(query, top_k)
+        ]
     
-    def _calculate_relevance_score(self, query: str, chunk: ContextChunk) -> float:
+    def retrieve_hybrid(self, query: str, city: str, top_k: int = 5,
+                        period: Optional[str] = None, config=None,
+                        index: Optional[InvertedIndex] = None):
         """
-        Calculate relevance score between query and chunk.
+        Retrieve chunks with the hybrid lexical + vector pipeline.
+        
+        The keyword and vector scorers run concurrently, their rankings are
+        fused with reciprocal-rank fusion, and the fused head is optionally
+        reranked. Each stage is timed so budgets can be tuned.
         
         Args:
             query: User query
-            chunk: Context chunk
+            city: Selected city
+            top_k: Number of top chunks to return
+            period: Current time period, resolved from the clock if not given
+            config: HybridRetrievalConfig, defaults to the retriever's hybrid_config
+            index: Index to search, defaults to the city's current index
             
         Returns:
-            Relevance score (0.0 to 1.0)
+            HybridRetrieval with results, per-stage timings in milliseconds
+            and whether the reranker ran
+            
+        Raises:
+            ValueError: If the retriever has no embedder
         """
-        query_lower = query.lower()
-        content_lower = chunk.content.lower()
-        section_lower = chunk.section.lower()
+        from hybrid_retrieval import (
+            HybridRetrievalConfig, HybridRetrieval, KeywordCoverageReranker, reciprocal_rank_fusion
+        )
+        
+        if self.embedder is None:
+            raise ValueError("Hybrid retrieval requires an embedder")
+        
+        config = config or self.hybrid_config or HybridRetrievalConfig()
+        period = period or self.get_current_period()
+        timings: Dict[str, float] = {}
+        start = time.perf_counter()
+        
+        def timed(stage, func, *args):
+            stage_start = time.perf_counter()
+            result = func(*args)
+            timings[stage] = (time.perf_counter() - stage_start) * 1000
+            return result
+        
+        lexical_args = (query, city, config.lexical_candidates, period, index)
+        vector_args = (query, city, config.vector_candidates, index)
+        if config.parallel:
+            executor = self._get_executor()
+            lexical_future = executor.submit(timed, 'lexical_ms', self.retrieve_by_keywords, *lexical_args)
+            vector_future = executor.submit(timed, 'vector_ms', self.retrieve_by_vector, *vector_args)
+            lexical, vector = lexical_future.result(), vector_future.result()
+        else:
+            lexical = timed('lexical_ms', self.retrieve_by_keywords, *lexical_args)
+            vector = timed('vector_ms', self.retrieve_by_vector, *vector_args)
         
-        score = 0.0
+        fused = timed('fusion_ms', reciprocal_rank_fusion, [lexical, vector], config.rrf_k)
         
-        # Exact word matches in content
-        query_words = set(re.findall(r'\b\w+\b', query_lower))
-        content_words = set(re.findall(r'\b\w+\b', content_lower))
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        within_budget = config.latency_budget_ms is None or elapsed_ms < config.latency_budget_ms
+        reranked = bool(config.rerank and fused and within_budget)
+        if reranked:
+            reranker = self.reranker or KeywordCoverageReranker()
+            head = timed('rerank_ms', reranker.rerank, query, fused[:config.rerank_depth])
+            fused = head + fused[config.rerank_depth:]
+        
+        timings['total_ms'] = (time.perf_counter() - start) * 1000
+        return HybridRetrieval(results=fused[:top_k], timings=timings, reranked=reranked)
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Get the thread pool shared by the hybrid retrieval stages."""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="rag-retrieval")
+            return self._executor
+    
+    def retrieve_batch(self, queries: List[str], city: str, top_k: int = 5,
+                       batch_size: int = 1024, period: Optional[str] = None) -> List[List[RetrievalResult]]:
+        """
+        Retrieve relevant context chunks for many queries at once.
         
-        # Calculate word overlap
-        overlap = query_words.intersection(content_words)
-        if query_words:
-            word_overlap_score = len(overlap) / len(query_words)
-            score += word_overlap_score * 0.6
+        Queries are encoded as a query x term matrix and scored against the
+        city's term x chunk BM25 matrix in one matrix product per batch.
+        Scores match retrieve_relevant_context.
         
-        # Section title relevance
-        section_words = set(re.findall(r'\b\w+\b', section_lower))
-        section_overlap = query_words.intersection(section_words)
-        if query_words:
-            section_score = len(section_overlap) / len(query_words)
-            score += section_score * 0.3
+        Args:
+            queries: User queries
+            city: Selected city
+            top_k: Number of top chunks to return per query
+            batch_size: Number of queries scored per matrix product
+            period: Current time period, resolved from the clock if not given
+            
+        Returns:
+            One list of retrieval results per query, best first
+            
+        Raises:
+            ImportError: If NumPy is not installed
+        """
+        if np is None:
+            raise ImportError("Batch retrieval requires NumPy. Run: pip install numpy")
         
-        # Time-sensitive boost
-        time_boost = self._get_time_sensitivity_boost(query_lower, content_lower)
-        score += time_boost * 0.1
+        city_lower = city.lower()
+        index = self.indexes.get(city_lower)
+        if index is None:
+            return [[] for _ in queries]
+        
+        chunks = index.chunks
+        matrix = self.term_matrices.get(city_lower)
+        if matrix is None or matrix.index is not index:
+            matrix = self._build_term_matrix(index)
+            self.term_matrices[city_lower] = matrix
+        
+        k = min(top_k, len(chunks))
+        if k <= 0:
+            return [[] for _ in queries]
+        
+        period = period or self.get_current_period()
+        
+        results = []
+        for start in range(0, len(queries), batch_size):
+            batch = [query.lower() for query in queries[start:start + batch_size]]
+            scores = self._score_batch(batch, matrix, period)
+            
+            # Partial selection of the top k per row, then order just those
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            top_scores = np.take_along_axis(scores, top, axis=1)
+            order = np.argsort(-top_scores, axis=1, kind='stable')
+            top = np.take_along_axis(top, order, axis=1)
+            top_scores = np.take_along_axis(top_scores, order, axis=1)
+            
+            for row_ids, row_scores in zip(top.tolist(), top_scores.tolist()):
+                results.append([
+                    RetrievalResult(chunks[doc_id], score)
+                    for doc_id, score in zip(row_ids, row_scores)
+                    if score != float('-inf')
+                ])
+        
+        return results
+    
+    def _build_term_matrix(self, index: InvertedIndex) -> TermChunkMatrix:
+        """
+        Build the dense scoring matrices for a city's index.
         
-        return min(score, 1.0)
+        Args:
+            index: Inverted index of the city
+            
+        Returns:
+            TermChunkMatrix for the index
+        """
+        vocabulary, weights = index.to_weight_matrix()
+        time_masks = np.array([chunk.time_mask for chunk in index.chunks], dtype=np.intp)
+        
+        return TermChunkMatrix(
+            index=index,
+            vocabulary=vocabulary,
+            weights=weights,
+            time_masks=time_masks
+        )
     
-    def _get_time_sensitivity_boost(self, query: str, content: str) -> float:
+    def _score_batch(self, queries: List[str], matrix: TermChunkMatrix, period: str) -> "np.ndarray":
         """
-        Calculate time sensitivity boost based on current time and query.
+        Score lowercase queries against every chunk of a city.
         
         Args:
-            query: User query (lowercase)
-            content: Chunk content (lowercase)
+            queries: Lowercase queries
+            matrix: Scoring matrices for the city
+            period: Current time period
             
         Returns:
-            Time sensitivity boost (0.0 to 1.0)
+            Query x chunk score matrix, -inf where a chunk shares no query term
         """
-        current_hour = datetime.now().hour
+        query_terms = np.zeros((len(queries), len(matrix.vocabulary)), dtype=np.float32)
+        boost_rows = np.zeros((len(queries), TIME_MASK_SIZE), dtype=np.float32)
         
-        # Determine current time period
-        if 6 <= current_hour < 12:
-            current_period = 'morning'
-        elif 12 <= current_hour < 17:
-            current_period = 'afternoon'
-        elif 17 <= current_hour < 22:
-            current_period = 'evening'
-        else:
-            current_period = 'night'
+        for row, query in enumerate(queries):
+            for term in tokenize(query):
+                column = matrix.vocabulary.get(term)
+                if column is not None:
+                    query_terms[row, column] = 1.0
+            boost_rows[row] = self._get_time_boost_row(self._get_time_mask(query), period)
         
-        boost = 0.0
+        bm25 = query_terms @ matrix.weights
         
-        # Check if query contains time-sensitive keywords
+        # Gather each query's boost row by the chunk time masks
+        scores = bm25 + boost_rows[:, matrix.time_masks] * self.time_boost_weight
+        
+        # Only chunks containing a query term are candidates, as in the single query path
+        scores[bm25 <= 0] = -np.inf
+        return scores
+    
+    def _get_time_mask(self, text: str) -> int:
+        """
+        Compute the time feature bitmask of lowercase text.
+        
+        Args:
+            text: Lowercase chunk content or query
+            
+        Returns:
+            Bitmask of PERIOD_BITS whose keywords appear, plus TIME_WORDS_BIT
+            if the text mentions opening hours or clock times
+        """
+        mask = 0
         for period, keywords in self.time_sensitive_keywords.items():
-            for keyword in keywords:
-                if keyword in query:
-                    # Boost if it matches current time period
-                    if period == current_period:
-                        boost += 0.3
-                    # Check if content is relevant to this time period
-                    if keyword in content or any(kw in content for kw in keywords):
-                        boost += 0.2
-                    break
+            if any(keyword in text for keyword in keywords):
+                mask |= PERIOD_BITS[period]
+        
+        if any(time_word in text for time_word in ['am', 'pm', 'hour', 'time', 'open', 'close']):
+            mask |= TIME_WORDS_BIT
+        
+        return mask
+    
+    def _get_time_boost_row(self, query_mask: int, current_period: str) -> Tuple[float, ...]:
+        """
+        Get the time sensitivity boost for every possible chunk time mask.
+        
+        Rows depend only on the query's time features and the current period,
+        so they are computed once and then served from a small table.
+        
+        Args:
+            query_mask: Time feature bitmask of the query
+            current_period: Current time period
+            
+        Returns:
+            Boosts (0.0 to 1.0) indexed by chunk time mask
+        """
+        key = (query_mask, current_period)
+        row = self._time_boost_rows.get(key)
+        if row is None:
+            row = tuple(
+                self._get_time_sensitivity_boost(query_mask, chunk_mask, current_period)
+                for chunk_mask in range(TIME_MASK_SIZE)
+            )
+            self._time_boost_rows[key] = row
+        return row
+    
+    def _get_time_sensitivity_boost(self, query_mask: int, chunk_mask: int, current_period: str) -> float:
+        """
+        Calculate time sensitivity boost based on current time and query.
+        
+        Args:
+            query_mask: Time feature bitmask of the query
+            chunk_mask: Time feature bitmask of the chunk
+            current_period: Current time period
+            
+        Returns:
+            Time sensitivity boost (0.0 to 1.0)
+        """
+        boost = 0.0
+        
+        for period in TIME_PERIODS:
+            if not query_mask & PERIOD_BITS[period]:
+                continue
+            # Boost if it matches current time period
+            if period == current_period:
+                boost += 0.3
+            # Check if content is relevant to this time period
+            if chunk_mask & PERIOD_BITS[period]:
+                boost += 0.2
         
         # Special boost for timing-related queries
-        if any(kw in query for kw in self.time_sensitive_keywords['timing']):
-            if any(time_word in content for time_word in ['am', 'pm', 'hour', 'time', 'open', 'close']):
-                boost += 0.4
+        if query_mask & PERIOD_BITS['timing'] and chunk_mask & TIME_WORDS_BIT:
+            boost += 0.4
         
         return min(boost, 1.0)
     
-    def get_time_context(self) -> str:
+    def get_current_period(self, now: Optional[datetime] = None) -> str:
         """
-        Get current time context for responses.
+        Determine the current time period in the city's local time.
         
+        Args:
+            now: Time to classify, read from the clock if not given
+            
         Returns:
-            Time context string
+            One of 'morning', 'afternoon', 'evening' or 'night'
         """
-        now = datetime.now()
-        current_hour = now.hour
+        current_hour = self._to_local(now or self.clock()).hour
         
-        # Determine time period and appropriate context
         if 6 <= current_hour < 12:
-            period = "morning"
-            context = "It's morning now, so breakfast places and early activities are most relevant."
+            return 'morning'
         elif 12 <= current_hour < 17:
-            period = "afternoon"
-            context = "It's afternoon now, so lunch options and midday activities are most suitable."
+            return 'afternoon'
         elif 17 <= current_hour < 22:
-            period = "evening"
-            context = "It's evening now, so dinner places and evening activities are ideal."
+            return 'evening'
         else:
-            period = "night"
-            context = "It's late night now, so options may be limited. Most places close early."
+            return 'night'
+    
+    def _to_local(self, now: datetime) -> datetime:
+        """Convert an aware time to the retriever's timezone. Naive times are taken as local."""
+        return now.astimezone(self.tz) if now.tzinfo is not None else now
+    
+    def get_time_context(self, now: Optional[datetime] = None) -> str:
+        """
+        Get current time context for responses.
+        
+        Args:
+            now: Time to describe, read from the clock if not given
+            
+        Returns:
+            Time context string
+        """
+        now = self._to_local(now or self.clock())
+        period = self.get_current_period(now)
+        
+        # Appropriate context for the time period
+        period_contexts = {
+            'morning': "It's morning now, so breakfast places and early activities are most relevant.",
+            'afternoon': "It's afternoon now, so lunch options and midday activities are most suitable.",
+            'evening': "It's evening now, so dinner places and evening activities are ideal.",
+            'night': "It's late night now, so options may be limited. Most places close early."
+        }
         
-        return f"Current time: {now.strftime('%I:%M %p')} ({period}). {context}"
+        return f"Current time: {now.strftime('%I:%M %p')} ({period}). {period_contexts[period]}"
     
     def build_rag_context(self, query: str, city: str) -> str:
         """
         Build RAG-enhanced context for the query.
         
+        The clock is read once, so retrieval and the time context agree.
+        
         Args:
             query: User query
             city: Selected city
@@ -241,8 +889,10 @@ class RAGRetriever:
         Returns:
             Enhanced context string
         """
+        now = self.clock()
+        
         # Get relevant chunks
-        relevant_chunks = self.retrieve_relevant_context(query, city, top_k=3)
+        relevant_chunks = self.retrieve_cached(query, city, 3, self.get_current_period(now))
         
         if not relevant_chunks:
             return ""
@@ -251,18 +901,73 @@ class RAGRetriever:
         context_parts = []
         
         # Add time context
-        time_context = self.get_time_context()
+        time_context = self.get_time_context(now)
         context_parts.append(f"TIME CONTEXT: {time_context}")
         
         # Add relevant chunks
         context_parts.append("RELEVANT LOCAL INFORMATION:")
         
-        for i, chunk in enumerate(relevant_chunks, 1):
-            context_parts.append(f"\n{i}. {chunk.section}:")
-            context_parts.append(chunk.content)
+        for i, result in enumerate(relevant_chunks, 1):
+            context_parts.append(f"\n{i}. {result.chunk.section}:")
+            context_parts.append(result.chunk.content)
         
         return "\n".join(context_parts)
     
+    def retrieve_cached(self, query: str, city: str, top_k: int, period: str,
+                        index: Optional[InvertedIndex] = None) -> List[RetrievalResult]:
+        """
+        Retrieve relevant chunks through the result cache, if one is configured.
+        
+        The canonical query is used only for the key; retrieval and reranking
+        always see the original query. The rest of the key is everything else
+        the ranking depends on: city, time period, context content hash,
+        retrieval mode, top_k and the query's time features. Reworded queries
+        sharing a key are served the ranking of the one that filled the entry.
+        
+        Args:
+            query: User query
+            city: Selected city
+            top_k: Number of top chunks to return
+            period: Current time period
+            index: Index to search, defaults to the city's current index
+            
+        Returns:
+            List of retrieval results, best first
+        """
+        index = index or self.indexes.get(city.lower())
+        if self.cache is None or index is None:
+            return self.retrieve_relevant_context(query, city, top_k=top_k, period=period, index=index)
+        
+        from retrieval_cache import canonicalize_query
+        
+        key = (
+            canonicalize_query(query),
+            city.lower(),
+            period,
+            index.content_hash,
+            self.retrieval_mode,
+            top_k,
+            self._get_time_mask(query.lower())
+        )
+        results = self.cache.get(key)
+        if results is None:
+            results = self.retrieve_relevant_context(query, city, top_k=top_k, period=period, index=index)
+            self.cache.put(key, tuple(results))
+        return list(results)
+    
+    def get_chunks(self, city: str) -> Tuple[ContextChunk, ...]:
+        """
+        Get a city's loaded chunks in document order.
+        
+        Args:
+            city: City name
+            
+        Returns:
+            Tuple of chunks, empty if the city is not loaded
+        """
+        index = self.indexes.get(city.lower())
+        return index.chunks if index is not None else ()
+    
     def get_retrieval_stats(self, city: str) -> Dict:
         """
         Get statistics about loaded context chunks.
@@ -280,8 +985,12 @@ class RAGRetriever:
         chunks = self.context_chunks[city_lower]
         sections = list(set(chunk.section for chunk in chunks))
         
-        return {
+        stats = {
             "total_chunks": len(chunks),
             "sections": sections,
             "city": city
-        }
\ No newline at end of file
+        }
+        if self.cache is not None:
+            stats["cache"] = self.cache.get_stats()
+        
+        return stats
\ No newline at end of file
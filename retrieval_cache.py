@@ -0,0 +1,139 @@
+"""
+Retrieval result cache for Local Guide AI.
+Bounded LRU/TTL cache of retrieved chunks keyed on a canonicalized query.
+"""
+import os
+import sys
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+# Add current directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from rag_retriever import tokenize
+
+# Words that do not change what a local guide query is about
+QUERY_STOPWORDS = frozenset({
+    'a', 'an', 'the', 'is', 'are', 'was', 'were', 'be', 'in', 'on', 'at', 'to', 'for',
+    'of', 'with', 'by', 'and', 'or', 'what', 'which', 'who', 'how', 'where', 'me',
+    'i', 'you', 'can', 'could', 'do', 'does', 'please', 'tell', 'some', 'any', 'there',
+    'here', 'it', 'its', 'this', 'that', 'my', 'your', 'should', 'would', 'about'
+})
+
+
+def canonicalize_query(query: str) -> str:
+    """
+    Reduce a query to a canonical form for cache lookups.
+    
+    The query is lowercased and tokenized, stopwords are removed and the
+    remaining unique tokens are sorted, so "what food is madurai famous for"
+    and "famous food in madurai?" share one key.
+    
+    Args:
+        query: User query
+        
+    Returns:
+        Canonical query string
+    """
+    return " ".join(sorted(set(tokenize(query)) - QUERY_STOPWORDS))
+
+
+class RetrievalCache:
+    """Thread-safe LRU cache with a time-to-live for retrieval results."""
+    
+    def __init__(self, max_entries: int = 1024, ttl_seconds: Optional[float] = 300.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the cache.
+        
+        Args:
+            max_entries: Maximum number of cached results before LRU eviction
+            ttl_seconds: Seconds an entry stays valid, or None for no expiry
+            clock: Monotonic time source, for testing
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Look up a cached value.
+        
+        Args:
+            key: Cache key
+            
+        Returns:
+            Cached value, or None on a miss or an expired entry
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                if self.ttl_seconds is None or self.clock() - stored_at < self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+    
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        Store a value, evicting the least recently used entries when full.
+        
+        Args:
+            key: Cache key
+            value: Value to cache
+        """
+        with self._lock:
+            self._entries[key] = (self.clock(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def invalidate(self, predicate: Callable[[Hashable], bool]) -> int:
+        """
+        Remove every entry whose key matches a predicate.
+        
+        Args:
+            predicate: Called with each key; True removes the entry
+            
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            stale = [key for key in self._entries if predicate(key)]
+            for key in stale:
+                del self._entries[key]
+            return len(stale)
+    
+    def clear(self) -> None:
+        """Remove all entries. Counters are kept."""
+        with self._lock:
+            self._entries.clear()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+        
+        Returns:
+            Dictionary with size, hit/miss counters and hit rate
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups > 0 else 0.0
+            }
@@ -0,0 +1,198 @@
+"""
+Session store for Local Guide AI.
+Keeps one small AppState per session so a single process can serve many
+users at once. City contexts, retrieval indexes and agents are shared by all
+sessions; a session only references them.
+"""
+import os
+import sys
+import time
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+# Add current directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models import AppState
+
+
+class Session:
+    """One session: its state and when it was last used."""
+    
+    __slots__ = ('session_id', 'state', 'created_at', 'last_seen')
+    
+    def __init__(self, session_id: str, state: AppState, now: float):
+        """
+        Initialize the session.
+        
+        Args:
+            session_id: Caller-supplied session identifier
+            state: Per-session application state
+            now: Creation time on the store's clock
+        """
+        self.session_id = session_id
+        self.state = state
+        self.created_at = now
+        self.last_seen = now
+
+
+class SessionStore:
+    """
+    Thread-safe store of per-session AppState records.
+    
+    Sessions are created on first use and kept in least-recently-used order.
+    A session idle for longer than idle_ttl seconds is dropped, and when
+    max_sessions is reached the least recently used session makes room.
+    """
+    
+    def __init__(self, idle_ttl: float = 1800.0, max_sessions: int = 1000,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the session store.
+        
+        Args:
+            idle_ttl: Seconds a session may stay unused before it expires
+            max_sessions: Maximum number of live sessions
+            clock: Time source in seconds, injectable for tests
+        """
+        if max_sessions < 1:
+            raise ValueError("max_sessions must be at least 1")
+        
+        self.idle_ttl = idle_ttl
+        self.max_sessions = max_sessions
+        self.clock = clock
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._expired = 0
+        self._evicted = 0
+    
+    def get(self, session_id: str) -> AppState:
+        """
+        Get the state of a session, creating the session if needed.
+        
+        Args:
+            session_id: Session identifier
+            
+        Returns:
+            The session's AppState
+            
+        Raises:
+            ValueError: If session_id is empty
+        """
+        if not session_id:
+            raise ValueError("session_id must not be empty")
+        
+        with self._lock:
+            now = self.clock()
+            self._expire(now)
+            
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.last_seen = now
+                self._sessions.move_to_end(session_id)
+                return session.state
+            
+            while len(self._sessions) >= self.max_sessions:
+                self._sessions.popitem(last=False)
+                self._evicted += 1
+            
+            session = Session(session_id, AppState(), now)
+            self._sessions[session_id] = session
+            self._created += 1
+            return session.state
+    
+    def peek(self, session_id: str) -> Optional[AppState]:
+        """
+        Get the state of a live session without creating or touching it.
+        
+        Args:
+            session_id: Session identifier
+            
+        Returns:
+            The session's AppState, or None if there is no live session
+        """
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None or self._is_expired(session, self.clock()):
+                return None
+            return session.state
+    
+    def discard(self, session_id: str) -> bool:
+        """
+        End a session.
+        
+        Args:
+            session_id: Session identifier
+            
+        Returns:
+            True if the session existed, False otherwise
+        """
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+    
+    def evict_expired(self) -> int:
+        """
+        Drop all sessions that have been idle for longer than idle_ttl.
+        
+        Returns:
+            Number of sessions dropped
+        """
+        with self._lock:
+            return self._expire(self.clock())
+    
+    def clear(self) -> None:
+        """Drop all sessions."""
+        with self._lock:
+            self._sessions.clear()
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+    
+    def __contains__(self, session_id: str) -> bool:
+        return self.peek(session_id) is not None
+    
+    def get_stats(self) -> Dict[str, float]:
+        """
+        Get session store statistics.
+        
+        Returns:
+            Dictionary with live sessions, limits and lifetime counters
+        """
+        with self._lock:
+            return {
+                'sessions': len(self._sessions),
+                'max_sessions': self.max_sessions,
+                'idle_ttl': self.idle_ttl,
+                'created': self._created,
+                'expired': self._expired,
+                'evicted': self._evicted
+            }
+    
+    def _is_expired(self, session: Session, now: float) -> bool:
+        """Check whether a session has been idle for too long."""
+        return now - session.last_seen > self.idle_ttl
+    
+    def _expire(self, now: float) -> int:
+        """
+        Drop expired sessions. Caller must hold the lock.
+        
+        Sessions are kept in last-used order, so expired ones are at the front.
+        
+        Args:
+            now: Current time on the store's clock
+            
+        Returns:
+            Number of sessions dropped
+        """
+        dropped = 0
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if not self._is_expired(session, now):
+                break
+            self._sessions.popitem(last=False)
+            dropped += 1
+        self._expired += dropped
+        return dropped
@@ -0,0 +1,117 @@
+"""
+Streaming helpers for Local Guide AI.
+Response streams that yield text as the model generates it and carry the
+final validated Response once the stream is exhausted.
+"""
+import os
+import sys
+import queue
+import asyncio
+import threading
+from typing import AsyncIterator, Callable, Iterator, List, Optional, TypeVar
+
+# Add current directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models import Response
+
+T = TypeVar('T')
+
+_ITEM, _ERROR, _DONE = range(3)
+
+
+def iterate_sync(make_iterator: Callable[[], AsyncIterator[T]]) -> Iterator[T]:
+    """
+    Consume an async iterator from synchronous code.
+    
+    The async iterator runs on its own event loop in a background thread,
+    so this works whether or not the calling thread already has a loop.
+    Items are handed over as soon as they are produced. If the caller stops
+    early, the async iterator is closed after its next item.
+    
+    Args:
+        make_iterator: Creates the async iterator inside the worker loop
+        
+    Yields:
+        Items of the async iterator, in order
+        
+    Raises:
+        Exception: Whatever the async iterator raised
+    """
+    items: "queue.Queue" = queue.Queue()
+    stop = threading.Event()
+    
+    async def pump() -> None:
+        iterator = make_iterator()
+        try:
+            async for item in iterator:
+                items.put((_ITEM, item))
+                if stop.is_set():
+                    break
+        except Exception as e:
+            items.put((_ERROR, e))
+            return
+        finally:
+            aclose = getattr(iterator, 'aclose', None)
+            if aclose is not None:
+                await aclose()
+        items.put((_DONE, None))
+    
+    worker = threading.Thread(target=lambda: asyncio.run(pump()), daemon=True)
+    worker.start()
+    
+    try:
+        while True:
+            kind, value = items.get()
+            if kind == _DONE:
+                return
+            if kind == _ERROR:
+                raise value
+            yield value
+    finally:
+        stop.set()
+
+
+class ResponseStream:
+    """
+    Text chunks of a response as they are generated.
+    
+    Iterate it synchronously (CLI, Streamlit) or asynchronously (AgentCore).
+    A stream can be consumed once; afterwards response holds the final,
+    validated Response, whose text may differ from the streamed text if the
+    guard replaced it with a refusal.
+    """
+    
+    def __init__(self, producer: Callable[["ResponseStream"], AsyncIterator[str]]):
+        """
+        Initialize the stream.
+        
+        Args:
+            producer: Called with this stream; yields text chunks and calls
+                      finish() with the final Response before it ends
+        """
+        self._producer = producer
+        self._chunks: List[str] = []
+        self.response: Optional[Response] = None
+    
+    @property
+    def text(self) -> str:
+        """Text streamed so far."""
+        return "".join(self._chunks)
+    
+    def finish(self, response: Response) -> None:
+        """
+        Record the final Response of the stream.
+        
+        Args:
+            response: Final validated response
+        """
+        self.response = response
+    
+    async def __aiter__(self) -> AsyncIterator[str]:
+        async for chunk in self._producer(self):
+            self._chunks.append(chunk)
+            yield chunk
+    
+    def __iter__(self) -> Iterator[str]:
+        return iterate_sync(self.__aiter__)
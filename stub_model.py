@@ -0,0 +1,176 @@
+"""
+Local stub model for Local Guide AI.
+A Strands model provider that needs no AWS access: it records the prompts it
+receives and simulates Bedrock prompt-prefix caching and token usage.
+"""
+import os
+import re
+import sys
+import asyncio
+import threading
+from dataclasses import dataclass
+from typing import Any, AsyncIterable, Dict, List, Optional, Tuple
+
+from strands.models import Model
+
+# Add current directory to path for imports
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+
+@dataclass
+class RecordedRequest:
+    """One request received by the stub model."""
+    prefix: str  # Text up to the last cache checkpoint
+    suffix: str  # Text after the last cache checkpoint
+    cache_hit: bool
+
+
+class StubModel(Model):
+    """
+    Strands model provider that answers locally.
+    
+    Text before a cachePoint block counts as a cacheable prefix: the first
+    request with a given prefix reports it as cache-write tokens, later
+    requests report it as cache-read tokens, and only the rest counts as
+    regular input tokens, as Bedrock does.
+    """
+    
+    def __init__(self, response_text: str = "This isn't covered in my local context.",
+                 chars_per_token: float = 4.0, delta_delay: float = 0.0):
+        """
+        Initialize the stub model.
+        
+        Args:
+            response_text: Text returned for every request
+            chars_per_token: Characters per token used for usage figures
+            delta_delay: Seconds to wait before each streamed word, to simulate generation time
+        """
+        self.config: Dict[str, Any] = {"model_id": "local-stub", "response_text": response_text}
+        self.chars_per_token = chars_per_token
+        self.delta_delay = delta_delay
+        self.requests: List[RecordedRequest] = []
+        self.deltas_sent = 0  # Text deltas emitted, lower when a stream is cancelled
+        self._cached_prefixes = set()
+        self._lock = threading.Lock()
+    
+    def update_config(self, **model_config: Any) -> None:
+        """
+        Update the model configuration.
+        
+        Args:
+            **model_config: Configuration overrides
+        """
+        self.config.update(model_config)
+    
+    def get_config(self) -> Dict[str, Any]:
+        """
+        Get the model configuration.
+        
+        Returns:
+            Model configuration dictionary
+        """
+        return self.config
+    
+    @property
+    def prefixes(self) -> List[str]:
+        """Cacheable prefixes of all recorded requests, in arrival order."""
+        return [request.prefix for request in self.requests]
+    
+    def _estimate_tokens(self, text: str) -> int:
+        """Estimate the token count of text."""
+        return int(len(text) / self.chars_per_token + 0.5)
+    
+    def _split_prompt(self, system_blocks: List[Dict[str, Any]], messages: List[Dict[str, Any]]) -> Tuple[str, str]:
+        """
+        Flatten a request and split it at the last cache checkpoint.
+        
+        Args:
+            system_blocks: System prompt content blocks
+            messages: Conversation messages
+            
+        Returns:
+            Tuple of (prefix, suffix) text
+        """
+        parts: List[str] = []
+        checkpoint = 0
+        blocks = list(system_blocks)
+        for message in messages:
+            blocks.extend(message.get("content", []))
+        
+        for block in blocks:
+            if "cachePoint" in block:
+                checkpoint = len(parts)
+            elif "text" in block:
+                parts.append(block["text"])
+        
+        return "".join(parts[:checkpoint]), "".join(parts[checkpoint:])
+    
+    def _record(self, system_blocks: List[Dict[str, Any]], messages: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Record a request and compute its simulated usage.
+        
+        Args:
+            system_blocks: System prompt content blocks
+            messages: Conversation messages
+            
+        Returns:
+            Usage dictionary in Bedrock's format
+        """
+        prefix, suffix = self._split_prompt(system_blocks, messages)
+        prefix_tokens = self._estimate_tokens(prefix)
+        
+        with self._lock:
+            cache_hit = bool(prefix) and prefix in self._cached_prefixes
+            if prefix:
+                self._cached_prefixes.add(prefix)
+            self.requests.append(RecordedRequest(prefix=prefix, suffix=suffix, cache_hit=cache_hit))
+        
+        input_tokens = self._estimate_tokens(suffix)
+        output_tokens = self._estimate_tokens(self.config["response_text"])
+        return {
+            "inputTokens": input_tokens,
+            "outputTokens": output_tokens,
+            "totalTokens": input_tokens + prefix_tokens + output_tokens,
+            "cacheReadInputTokens": prefix_tokens if cache_hit else 0,
+            "cacheWriteInputTokens": 0 if cache_hit else prefix_tokens,
+        }
+    
+    async def stream(self, messages, tool_specs=None, system_prompt: Optional[str] = None, *,
+                     system_prompt_content=None, cancel_signal: Optional[threading.Event] = None,
+                     **kwargs: Any) -> AsyncIterable[Dict[str, Any]]:
+        """
+        Answer a request with the configured response text.
+        
+        Args:
+            messages: Conversation messages
+            tool_specs: Ignored
+            system_prompt: Plain system prompt, used when no content blocks are given
+            system_prompt_content: System prompt content blocks, possibly with cache points
+            cancel_signal: Stops generation once set, like an aborted Bedrock request
+            **kwargs: Ignored
+            
+        Yields:
+            Bedrock-style stream events
+        """
+        system_blocks = system_prompt_content or ([{"text": system_prompt}] if system_prompt else [])
+        usage = self._record(system_blocks, messages)
+        
+        yield {"messageStart": {"role": "assistant"}}
+        yield {"contentBlockStart": {"start": {}}}
+        # One delta per word, as a real model streams
+        for word in re.findall(r'\s*\S+\s*', self.config["response_text"]):
+            if self.delta_delay:
+                await asyncio.sleep(self.delta_delay)
+            if cancel_signal is not None and cancel_signal.is_set():
+                break
+            with self._lock:
+                self.deltas_sent += 1
+            yield {"contentBlockDelta": {"delta": {"text": word}}}
+        yield {"contentBlockStop": {}}
+        yield {"messageStop": {"stopReason": "end_turn"}}
+        yield {"metadata": {"usage": usage, "metrics": {"latencyMs": 0}}}
+    
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        """Structured output is not supported by the stub model."""
+        raise NotImplementedError("StubModel does not support structured output")
+        yield  # pragma: no cover
@@ -32,11 +32,11 @@ def test_rag_retriever():
         
         # Test retrieval
         query = "breakfast food"
-        chunks = retriever.retrieve_relevant_context(query, "Madurai")
+        results = retriever.retrieve_relevant_context(query, "Madurai")
         
-        print(f"✅ Retrieved {len(chunks)} chunks for query: '{query}'")
-        for chunk in chunks:
-            print(f"   - {chunk.section}: {chunk.relevance_score:.2f}")
+        print(f"✅ Retrieved {len(results)} chunks for query: '{query}'")
+        for result in results:
+            print(f"   - {result.chunk.section}: {result.score:.2f}")
         
         # Test time context
         time_context = retriever.get_time_context()
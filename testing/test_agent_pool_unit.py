@@ -0,0 +1,135 @@
+"""
+Unit tests for the agent pool.
+Tests reuse, LRU eviction, concurrent leasing and LocalGuideAgent integration.
+"""
+import pytest
+import sys
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent_pool import AgentPool
+from agents.local_guide_agent import LocalGuideAgent
+from stub_model import StubModel
+
+
+class FakeAgent:
+    """Minimal stand-in with a conversation history."""
+    
+    def __init__(self):
+        self.messages = []
+
+
+class TestAgentPoolUnit:
+    """Unit tests for the agent pool."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.pool = AgentPool(max_keys=2, max_idle_per_key=2)
+        self.madurai_context = """# Madurai Context
+
+## Food & Dining
+
+### Traditional Foods
+- **Jigarthanda** - Famous cold drink in Madurai
+"""
+    
+    def test_agent_reused_for_same_key(self):
+        """Test that a released agent is handed out again."""
+        with self.pool.lease("madurai", FakeAgent) as first:
+            pass
+        with self.pool.lease("madurai", FakeAgent) as second:
+            pass
+        
+        assert first is second
+        stats = self.pool.get_stats()
+        assert stats['misses'] == 1
+        assert stats['hits'] == 1
+    
+    def test_conversation_reset_on_release(self):
+        """Test that a pooled agent carries no history into the next lease."""
+        with self.pool.lease("madurai", FakeAgent) as agent:
+            agent.messages.append({"role": "user", "content": [{"text": "hi"}]})
+        
+        with self.pool.lease("madurai", FakeAgent) as agent:
+            assert agent.messages == []
+    
+    def test_lru_eviction(self):
+        """Test that the least recently used key is evicted."""
+        for city in ("madurai", "dindigul", "madurai", "chennai"):
+            with self.pool.lease(city, FakeAgent):
+                pass
+        
+        assert self.pool.get_stats()['evictions'] == 1
+        with self.pool.lease("madurai", FakeAgent):
+            pass
+        assert self.pool.get_stats()['hits'] == 2
+        with self.pool.lease("dindigul", FakeAgent):
+            pass
+        assert self.pool.get_stats()['misses'] == 4
+    
+    def test_concurrent_leases_get_distinct_agents(self):
+        """Test that overlapping leases never share an agent."""
+        first = self.pool.acquire("madurai", FakeAgent)
+        second = self.pool.acquire("madurai", FakeAgent)
+        
+        assert first is not second
+        self.pool.release("madurai", first)
+        self.pool.release("madurai", second)
+        assert self.pool.get_stats()['idle_agents'] == 2
+    
+    def test_idle_agents_bounded(self):
+        """Test that at most max_idle_per_key agents are kept."""
+        agents = [self.pool.acquire("madurai", FakeAgent) for _ in range(4)]
+        for agent in agents:
+            self.pool.release("madurai", agent)
+        
+        assert self.pool.get_stats()['idle_agents'] == 2
+    
+    def test_release_after_eviction_drops_agent(self):
+        """Test that an agent whose key was evicted is not pooled again."""
+        agent = self.pool.acquire("madurai", FakeAgent)
+        with self.pool.lease("dindigul", FakeAgent):
+            pass
+        with self.pool.lease("chennai", FakeAgent):
+            pass
+        self.pool.release("madurai", agent)
+        
+        assert self.pool.get_stats()['keys'] == 2
+        assert self.pool.get_stats()['idle_agents'] == 2
+    
+    def test_local_guide_agent_reuses_pooled_agent(self):
+        """Test that repeated queries for a city reuse one agent statelessly."""
+        guide = LocalGuideAgent()
+        guide.model = StubModel(response_text="Try Jigarthanda.")
+        
+        guide.generate_response("famous drink", self.madurai_context, "Madurai")
+        guide.generate_response("cold drink", self.madurai_context, "Madurai")
+        
+        stats = guide.get_agent_pool_stats()
+        assert stats['misses'] == 1
+        assert stats['hits'] == 1
+        assert "famous drink" not in guide.model.requests[1].suffix
+    
+    def test_local_guide_agent_concurrent_queries(self):
+        """Test that concurrent queries for one city all succeed."""
+        guide = LocalGuideAgent()
+        guide.model = StubModel(response_text="Try Jigarthanda.")
+        barrier = threading.Barrier(4)
+        
+        def ask(i):
+            barrier.wait()
+            return guide.generate_response(f"drink {i}", self.madurai_context, "Madurai")
+        
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            responses = list(executor.map(ask, range(4)))
+        
+        assert all(response.strip() == "Try Jigarthanda." for response in responses)
+        assert guide.get_agent_pool_stats()['idle_agents'] <= guide.agent_pool.max_idle_per_key
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,100 @@
+"""
+Unit tests for the AgentCore entrypoint.
+Tests how request session ids map to LocalGuideSystem state and the
+city names used in error messages.
+"""
+import pytest
+import sys
+import os
+import asyncio
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("bedrock_agentcore")
+
+import agentcore_main
+from bedrock_agentcore.runtime import RequestContext
+from local_guide_system import LocalGuideSystem
+from stub_model import StubModel
+
+
+class TestAgentCoreMainUnit:
+    """Unit tests for handle_local_guide_request."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.system = LocalGuideSystem()
+        self.system.local_guide.model = StubModel(response_text="Jigarthanda is a famous cold drink.")
+        self.system.is_initialized = True
+        agentcore_main.guide_system = self.system
+    
+    def teardown_method(self):
+        """Clean up test fixtures."""
+        agentcore_main.guide_system = None
+    
+    def handle(self, request):
+        """Run one request through the entrypoint."""
+        return asyncio.run(agentcore_main.handle_local_guide_request(request))
+    
+    def test_anonymous_requests_get_private_state(self):
+        """Test that requests without any session id neither share nor keep state."""
+        first = self.handle({"prompt": "What food is famous here?", "city": "Madurai"})
+        second = self.handle({"prompt": "What food is famous here?"})
+        
+        assert first['session_id'] is None
+        assert first['city'] == "Madurai"
+        assert first['conversation_length'] == 1
+        assert second['is_refusal']
+        assert self.system.get_current_city() is None
+        assert len(self.system.app_state.conversation_history) == 0
+        assert len(self.system.sessions) == 0
+    
+    def test_runtime_session_id_is_used(self):
+        """Test that the AgentCore context's session id is the fallback."""
+        context = RequestContext(session_id="runtime-1")
+        asyncio.run(agentcore_main.handle_local_guide_request(
+            {"prompt": "What food is famous here?", "city": "Madurai"}, context
+        ))
+        response = asyncio.run(agentcore_main.handle_local_guide_request(
+            {"prompt": "What food is famous here?"}, context
+        ))
+        
+        assert response['session_id'] == "runtime-1"
+        assert response['conversation_length'] == 2
+        assert self.system.get_current_city("runtime-1") == "Madurai"
+    
+    def test_anonymous_stream_ends_its_session(self):
+        """Test that a streamed anonymous request drops its session when done."""
+        async def run():
+            events = await agentcore_main.handle_local_guide_request(
+                {"prompt": "What food is famous here?", "city": "Madurai", "stream": True}
+            )
+            return [event async for event in events]
+        
+        events = asyncio.run(run())
+        
+        assert events[-1]['type'] == "final"
+        assert events[-1]['session_id'] is None
+        assert len(self.system.sessions) == 0
+    
+    def test_request_with_session_uses_its_own_state(self):
+        """Test that a session id keeps its own city apart from the default state."""
+        self.handle({"prompt": "What food is famous here?", "city": "Dindigul", "session_id": "alice"})
+        
+        assert self.system.get_current_city("alice") == "Dindigul"
+        assert self.system.get_current_city() is None
+    
+    def test_error_messages_name_available_cities(self):
+        """Test that error messages list the cities of the context directory."""
+        cities = self.system.get_available_cities()
+        
+        empty = self.handle({"prompt": ""})
+        unsupported = self.handle({"prompt": "What food is famous here?", "city": "Atlantis"})
+        
+        assert empty['response'] == f"Please provide a question about {' or '.join(cities)}."
+        assert unsupported['response'].startswith(f"Sorry, I can only help with {' and '.join(cities)}.")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
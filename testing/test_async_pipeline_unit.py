@@ -0,0 +1,93 @@
+"""
+Unit tests for the async query pipeline.
+Tests process_query_async and the awaitable agent stages against the local stub model.
+"""
+import pytest
+import sys
+import os
+import time
+import asyncio
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from local_guide_system import LocalGuideSystem
+from models import Response
+from stub_model import StubModel
+
+
+class TestAsyncPipelineUnit:
+    """Unit tests for the async query pipeline."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.answer = "Jigarthanda is a famous cold drink made with milk and almond gum."
+        self.system = LocalGuideSystem()
+        self.system.local_guide.model = StubModel(response_text=self.answer, delta_delay=0.01)
+        self.system.is_initialized = True
+        self.system.select_city("Madurai")
+    
+    def test_process_query_async_matches_sync(self):
+        """Test that the async pipeline gives the same response as the blocking one."""
+        blocking = self.system.process_query("What food is famous here?")
+        response = asyncio.run(self.system.process_query_async("What food is famous here?"))
+        
+        assert isinstance(response, Response)
+        assert response.text == blocking.text
+        assert response.validation_passed
+        assert len(self.system.app_state.conversation_history) == 2
+    
+    def test_process_query_async_rejected_query(self):
+        """Test that an off-topic query is refused by the async pipeline."""
+        response = asyncio.run(self.system.process_query_async("Tell me about quantum physics"))
+        
+        assert response.is_refusal
+        assert response.refusal_reason == "Query validation failed"
+    
+    def test_process_query_async_not_ready(self):
+        """Test that the async pipeline reports a missing city."""
+        self.system.app_state.reset_city_selection()
+        
+        response = asyncio.run(self.system.process_query_async("What food is famous here?"))
+        
+        assert response.is_refusal
+    
+    def test_event_loop_not_blocked(self):
+        """Test that other coroutines run while a query is in flight."""
+        async def run():
+            ticks = 0
+            done = asyncio.Event()
+            
+            async def ticker():
+                nonlocal ticks
+                while not done.is_set():
+                    ticks += 1
+                    await asyncio.sleep(0.005)
+            
+            task = asyncio.create_task(ticker())
+            await self.system.process_query_async("What food is famous here?")
+            done.set()
+            await task
+            return ticks
+        
+        assert asyncio.run(run()) > 5
+    
+    def test_concurrent_queries_overlap(self):
+        """Test that in-flight queries overlap instead of running one after another."""
+        async def run(count):
+            start = time.perf_counter()
+            responses = await asyncio.gather(
+                *(self.system.process_query_async("What food is famous here?") for _ in range(count))
+            )
+            return time.perf_counter() - start, responses
+        
+        asyncio.run(self.system.process_query_async("What food is famous here?"))  # Warm up
+        single, _ = asyncio.run(run(1))
+        elapsed, responses = asyncio.run(run(8))
+        
+        assert all(response.text.strip() == self.answer for response in responses)
+        assert elapsed < single * 4
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,120 @@
+"""
+Unit tests for the offline batch guard.
+Tests lazy JSONL reading, verdict output order, statistics and the process pool.
+"""
+import pytest
+import sys
+import os
+import io
+import json
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.guard_agent import GuardAgent
+from batch_guard import BatchGuardValidator, iter_jsonl
+
+CONTEXT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "context")
+
+SAMPLE_CONTEXT = """# Test City Context
+Famous for ancient temple and traditional cuisine.
+Popular dishes include biryani, idli, dosa, and local sweets.
+Transportation options include city buses, auto rickshaws, and taxis.
+Shopping areas include central market, commercial street, and local bazaars.
+"""
+
+
+class TestBatchGuardUnit:
+    """Unit tests for BatchGuardValidator."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.responses = [
+            "Local cuisine includes biryani, idli, and dosa.",
+            "According to research, the temple is ancient.",
+            "This isn't covered in my local context.",
+            "Paris Berlin Tokyo London Madrid.",
+            "You can travel by city buses or auto rickshaws."
+        ]
+        self.lines = [json.dumps({'id': f"r{i}", 'city': "testcity", 'response': response})
+                      for i, response in enumerate(self.responses)]
+    
+    def run(self, lines, **kwargs):
+        """Validate lines and return (verdicts, stats)."""
+        validator = BatchGuardValidator(contexts={"testcity": SAMPLE_CONTEXT}, **kwargs)
+        output = io.StringIO()
+        stats = validator.validate_lines(enumerate(lines, 1), output)
+        verdicts = [json.loads(line) for line in output.getvalue().splitlines()]
+        return verdicts, stats
+    
+    def test_matches_guard_agent(self):
+        """Test that batch verdicts agree with GuardAgent.validate_response."""
+        verdicts, stats = self.run(self.lines, workers=1)
+        guard = GuardAgent()
+        
+        assert [verdict['id'] for verdict in verdicts] == ["r0", "r1", "r2", "r3", "r4"]
+        for verdict, response in zip(verdicts, self.responses):
+            assert verdict['is_valid'] == guard.validate_response(response, SAMPLE_CONTEXT)
+        assert stats['total_responses'] == 5
+        assert stats['valid_count'] == 3
+        assert stats['invalid_reasons'] == {"suspicious pattern": 1,
+                                            "insufficient overlap with the context": 1}
+    
+    def test_refusal_statistics_match_guard_agent(self):
+        """Test that refusal statistics agree with GuardAgent.get_refusal_statistics."""
+        _, stats = self.run(self.lines, workers=1)
+        expected = GuardAgent().get_refusal_statistics(self.responses)
+        
+        for key in ('total_responses', 'refusal_count', 'refusal_rate', 'refusal_breakdown'):
+            assert stats[key] == expected[key]
+    
+    def test_bad_lines_are_reported(self):
+        """Test that unreadable records get an error verdict and do not stop the run."""
+        lines = ["not json", json.dumps({'city': "testcity"}), json.dumps({'city': "nowhere", 'response': "Hi."}),
+                 self.lines[0]]
+        
+        verdicts, stats = self.run(lines, workers=1)
+        
+        assert [('error' in verdict) for verdict in verdicts] == [True, True, True, False]
+        assert verdicts[3]['line'] == 4
+        assert stats['error_count'] == 3
+        assert stats['valid_count'] == 1
+    
+    def test_process_pool_keeps_input_order(self):
+        """Test that worker processes return verdicts in input order."""
+        lines = self.lines * 40
+        
+        verdicts, stats = self.run(lines, workers=2, chunk_size=7, max_pending_chunks=3)
+        serial, _ = self.run(lines, workers=1)
+        
+        assert [verdict['line'] for verdict in verdicts] == list(range(1, len(lines) + 1))
+        assert verdicts == serial
+        assert stats['total_responses'] == 200
+    
+    def test_reads_context_files_per_city(self, tmp_path):
+        """Test a file-to-file run that reads city contexts from the context directory."""
+        input_path = tmp_path / "responses.jsonl"
+        output_path = tmp_path / "verdicts.jsonl"
+        records = [{'city': "Madurai", 'response': "Jigarthanda is a famous cold drink in Madurai."},
+                   {'city': "Dindigul", 'response': "I don't have enough local data to answer that."}]
+        input_path.write_text("\n".join(json.dumps(record) for record in records) + "\n\n", encoding='utf-8')
+        
+        stats = BatchGuardValidator(context_dir=CONTEXT_DIR, workers=2).validate_file(
+            str(input_path), str(output_path)
+        )
+        
+        verdicts = [json.loads(line) for line in output_path.read_text(encoding='utf-8').splitlines()]
+        assert [verdict['city'] for verdict in verdicts] == ["Madurai", "Dindigul"]
+        assert all('error' not in verdict for verdict in verdicts)
+        assert stats['refusal_count'] == 1
+    
+    def test_iter_jsonl_skips_blank_lines(self, tmp_path):
+        """Test that blank lines are skipped and line numbers kept."""
+        path = tmp_path / "log.jsonl"
+        path.write_text('{"a": 1}\n\n{"b": 2}\n', encoding='utf-8')
+        
+        assert [number for number, _ in iter_jsonl(str(path))] == [1, 3]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
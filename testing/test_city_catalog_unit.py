@@ -0,0 +1,212 @@
+"""
+Unit tests for the directory-driven city catalog.
+Tests discovery of context files, lookup, and the memory-bounded loading of
+city contexts and indexes.
+"""
+import pytest
+import sys
+import os
+import tempfile
+import shutil
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.context_loader import ContextLoaderAgent
+from agents.query_validator import QueryValidationAgent
+from city_catalog import CityCatalog
+from city_context_registry import CityContextRegistry
+from local_guide_system import LocalGuideSystem
+from stub_model import StubModel
+
+TOWN_COUNT = 300
+
+
+def town_name(i: int) -> str:
+    """Name of the i-th generated town."""
+    return f"town{i:03d}"
+
+
+def town_content(name: str) -> str:
+    """Context file content for a generated town."""
+    return (f"# {name.title()} Local Guide\n\n## Food\n{name.title()} is known for idli and filter coffee "
+            f"served near the bus stand.\n\n## Transport\nAutos in {name.title()} charge by the kilometre.\n")
+
+
+class CountingLoader(ContextLoaderAgent):
+    """Context loader that counts file reads."""
+    
+    def __init__(self, context_dir):
+        super().__init__(context_dir=context_dir)
+        self.reads = 0
+    
+    def read_city_context(self, city):
+        self.reads += 1
+        return super().read_city_context(city)
+
+
+class TestCityCatalogUnit:
+    """Unit tests for CityCatalog and memory-bounded city loading."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+        for i in range(TOWN_COUNT):
+            name = town_name(i)
+            with open(os.path.join(self.temp_dir, f"{name}_context.md"), 'w', encoding='utf-8') as f:
+                f.write(town_content(name))
+        with open(os.path.join(self.temp_dir, "notes.md"), 'w', encoding='utf-8') as f:
+            f.write("Not a city")
+        self.catalog = CityCatalog(self.temp_dir)
+    
+    def teardown_method(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.temp_dir)
+    
+    def test_discovers_context_files(self):
+        """Test that every <city>_context.md file is a city and nothing else is."""
+        names = self.catalog.names()
+        
+        assert len(names) == TOWN_COUNT
+        assert names[0] == "town000"
+        assert "notes" not in names
+    
+    def test_manifest_entries(self):
+        """Test the manifest's metadata and lazily known hash."""
+        entry = self.catalog.get("Town007")
+        
+        assert entry.name == "town007"
+        assert entry.display_name == "Town007"
+        assert entry.size == os.path.getsize(entry.file_path)
+        assert entry.content_hash is None
+        
+        loader = ContextLoaderAgent(context_dir=self.temp_dir)
+        loader.catalog = self.catalog
+        context = loader.read_city_context("town007")
+        
+        assert self.catalog.get("town007").content_hash == context.get_content_hash()
+    
+    def test_rejects_unsafe_names(self):
+        """Test that names which could leave the directory are not cities."""
+        assert "../town001" not in self.catalog
+        assert "town001/.." not in self.catalog
+        assert "" not in self.catalog
+        assert self.catalog.normalize(" Town001 ") == "town001"
+    
+    def test_new_file_is_discovered(self):
+        """Test that a context file added while running becomes a city."""
+        self.catalog.names()
+        with open(os.path.join(self.temp_dir, "newtown_context.md"), 'w', encoding='utf-8') as f:
+            f.write(town_content("newtown"))
+        
+        assert "newtown" in self.catalog
+        assert "newtown" in self.catalog.names()
+    
+    def test_find_cities(self):
+        """Test finding catalog cities mentioned in text."""
+        assert self.catalog.find_cities("Tell me about Town042 and town007's food") == ["town042", "town007"]
+        assert self.catalog.find_cities("Tell me about Chennai") == []
+    
+    def test_count_cities_matches_whole_words(self):
+        """Test that city mentions are counted only as whole words."""
+        counts = self.catalog.count_cities("Town001 and town001-bound buses, town002s and mytown003.")
+        
+        assert counts == {"town001": 2}
+    
+    def test_context_isolation_ignores_names_inside_words(self):
+        """Test that another city's name inside a longer word does not break isolation."""
+        with open(os.path.join(self.temp_dir, "town005_context.md"), 'a', encoding='utf-8') as f:
+            f.write("\n" + "Try the town006style dosa. " * 5)
+        loader = ContextLoaderAgent(context_dir=self.temp_dir)
+        loader.catalog = self.catalog
+        loader.load_city_context("town005")
+        
+        assert loader.validate_context_isolation("town005")
+        
+        with open(os.path.join(self.temp_dir, "town005_context.md"), 'a', encoding='utf-8') as f:
+            f.write("\n" + "Buses go to Town006. " * 5)
+        loader.load_city_context("town005")
+        
+        assert not loader.validate_context_isolation("town005")
+    
+    def test_discovery_reads_no_files(self):
+        """Test that listing and validating cities does not read context files."""
+        loader = CountingLoader(self.temp_dir)
+        
+        assert len(loader.get_available_cities()) == TOWN_COUNT
+        assert loader.validate_city_selection("Town123")
+        assert loader.reads == 0
+    
+    def test_validator_accepts_general_query_about_catalog_city(self):
+        """Test that a general question about any catalog city is in scope."""
+        validator = QueryValidationAgent(city_catalog=self.catalog)
+        
+        assert validator.is_supported_topic("Tell me about Town250")
+    
+    def test_registry_stays_within_budget(self):
+        """Test that loading many cities keeps the total context size within budget."""
+        size = len(town_content("town000"))
+        evicted = []
+        registry = CityContextRegistry(CountingLoader(self.temp_dir), on_evict=evicted.append,
+                                       max_context_chars=size * 10)
+        
+        for i in range(50):
+            registry.get(town_name(i))
+        
+        stats = registry.get_stats()
+        assert stats['cities'] == 10
+        assert stats['context_chars'] <= size * 10
+        assert stats['evictions'] == 40
+        assert [context.city_name for context in evicted[:2]] == ["town000", "town001"]
+        assert registry.is_loaded("town049")
+    
+    def test_registry_keeps_recently_used(self):
+        """Test that a city in use is not the one evicted."""
+        size = len(town_content("town000"))
+        registry = CityContextRegistry(CountingLoader(self.temp_dir), max_context_chars=size * 2)
+        
+        registry.get("town000")
+        registry.get("town001")
+        registry.get("town000")
+        registry.get("town002")
+        
+        assert registry.is_loaded("town000")
+        assert not registry.is_loaded("town001")
+    
+    def test_preload_stops_at_budget(self):
+        """Test that preloading a large catalog stops once the budget is full."""
+        size = len(town_content("town000"))
+        loader = CountingLoader(self.temp_dir)
+        registry = CityContextRegistry(loader, max_context_chars=size * 5)
+        
+        registry.preload()
+        
+        assert loader.reads == 5
+        assert registry.get_stats()['evictions'] == 0
+    
+    def test_system_unloads_indexes_of_evicted_cities(self):
+        """Test that evicted cities' indexes leave the retriever and return on demand."""
+        size = len(town_content("town000"))
+        system = LocalGuideSystem()
+        system.local_guide.model = StubModel(response_text="Idli and filter coffee near the bus stand.")
+        system.is_initialized = True
+        system.context_loader.context_dir = self.temp_dir
+        system.context_registry.max_context_chars = size * 3
+        
+        system.select_city("town000", session_id="alice")
+        for i in range(1, 6):
+            system.select_city(town_name(i), session_id=f"user{i}")
+        
+        retriever = system.local_guide.rag_retriever
+        assert "town000" not in retriever.indexes
+        assert len(retriever.indexes) == 3
+        
+        response = system.process_query("What food is famous here?", session_id="alice")
+        
+        assert not response.is_refusal
+        assert "town000" in retriever.indexes
+        assert len(retriever.indexes) == 3
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,128 @@
+"""
+Unit tests for the city context registry.
+Tests that contexts load once and are shared by every session.
+"""
+import pytest
+import sys
+import os
+import dataclasses
+import threading
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.context_loader import ContextLoaderAgent
+from city_context_registry import CityContextRegistry
+from local_guide_system import LocalGuideSystem
+
+
+class CountingLoader(ContextLoaderAgent):
+    """Context loader that counts file reads."""
+    
+    def __init__(self):
+        super().__init__()
+        self.reads = 0
+    
+    def read_city_context(self, city):
+        self.reads += 1
+        return super().read_city_context(city)
+
+
+class TestCityContextRegistryUnit:
+    """Unit tests for CityContextRegistry."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.loader = CountingLoader()
+        self.loaded = []
+        self.registry = CityContextRegistry(self.loader, on_load=self.loaded.append)
+    
+    def test_loads_once_and_shares(self):
+        """Test that repeated lookups return the same instance without rereading."""
+        first = self.registry.get("Madurai")
+        second = self.registry.get("madurai")
+        
+        assert first is second
+        assert self.loader.reads == 1
+        assert self.loaded == [first]
+        assert self.registry.get_stats()['hits'] == 1
+    
+    def test_context_is_immutable(self):
+        """Test that a shared context cannot be modified."""
+        context = self.registry.get("Madurai")
+        
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            context.context_content = "changed"
+    
+    def test_content_hash_cached(self):
+        """Test that the content hash is computed once."""
+        context = self.registry.get("Madurai")
+        
+        assert context.get_content_hash() == context.content_hash
+        assert 'content_hash' in context.__dict__
+    
+    def test_unsupported_city(self):
+        """Test that unsupported cities raise and are not stored."""
+        with pytest.raises(ValueError):
+            self.registry.get("Chennai")
+        assert not self.registry.is_loaded("Chennai")
+    
+    def test_preload(self):
+        """Test that preload loads every available city."""
+        assert self.registry.preload() == []
+        assert self.registry.is_loaded("Madurai")
+        assert self.registry.is_loaded("Dindigul")
+        assert self.registry.get_stats()['cities'] == 2
+    
+    def test_invalidate(self):
+        """Test that an invalidated city is read again."""
+        first = self.registry.get("Madurai")
+        self.registry.invalidate("Madurai")
+        
+        assert self.registry.get("Madurai") is not first
+        assert self.loader.reads == 2
+    
+    def test_concurrent_get_returns_one_instance(self):
+        """Test that concurrent first lookups agree on one context."""
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.registry.get("Dindigul")))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert all(result is results[0] for result in results)
+
+
+class TestSharedContextsUnit:
+    """Unit tests for context sharing in LocalGuideSystem."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.system = LocalGuideSystem()
+        self.system.is_initialized = True
+    
+    def test_sessions_share_context(self):
+        """Test that sessions in the same city reference one context."""
+        self.system.select_city("Madurai", session_id="alice")
+        self.system.select_city("Madurai", session_id="bob")
+        
+        alice = self.system.get_session_state("alice").loaded_context
+        bob = self.system.get_session_state("bob").loaded_context
+        assert alice is bob
+    
+    def test_switch_city_does_not_reread(self):
+        """Test that switching back to a city reuses its loaded context."""
+        self.system.select_city("Madurai")
+        madurai = self.system.app_state.loaded_context
+        self.system.switch_city("Dindigul")
+        self.system.switch_city("Madurai")
+        
+        assert self.system.app_state.loaded_context is madurai
+        assert self.system.context_loader.get_current_context() is madurai
+        assert self.system.context_registry.get_stats()['loads'] == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
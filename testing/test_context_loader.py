@@ -48,9 +48,9 @@ class TestContextLoaderAgent:
         shutil.rmtree(self.temp_dir)
     
     def test_get_available_cities(self):
-        """Test getting list of available cities."""
+        """Test getting list of available cities discovered from the context files."""
         cities = self.agent.get_available_cities()
-        assert cities == ['Madurai', 'Dindigul']
+        assert cities == ['Dindigul', 'Madurai']
     
     def test_validate_city_selection_valid(self):
         """Test validation of valid city selections."""
@@ -0,0 +1,188 @@
+"""
+Unit tests for hot reload of context files.
+Tests ContextWatcher, CityContextRegistry.reload and how LocalGuideSystem
+moves sessions to a reloaded context.
+"""
+import pytest
+import sys
+import os
+import time
+import shutil
+import asyncio
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from context_watcher import ContextWatcher
+from local_guide_system import LocalGuideSystem
+from stub_model import StubModel
+
+CONTEXT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "context")
+ADDED_SECTION = "\n\n## Night Market\nThe night market near the bus stand sells hot jalebi after 9 PM.\n"
+
+
+class TestContextWatcherUnit:
+    """Unit tests for context hot reload."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.answer = "Jigarthanda is a famous cold drink made with milk and almond gum."
+        self.system = LocalGuideSystem()
+        self.system.local_guide.model = StubModel(response_text=self.answer, delta_delay=0.01)
+        self.system.is_initialized = True
+        self.watcher = ContextWatcher(self.system.context_registry, interval=0.01)
+    
+    def use_context_dir(self, tmp_path):
+        """Serve context files from a writable copy."""
+        for name in os.listdir(CONTEXT_DIR):
+            if name.endswith("_context.md"):
+                shutil.copy(os.path.join(CONTEXT_DIR, name), tmp_path / name)
+        self.system.context_loader.context_dir = str(tmp_path)
+        return tmp_path / "madurai_context.md"
+    
+    def edit(self, path, text=ADDED_SECTION):
+        """Append to a context file."""
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(text)
+    
+    def test_first_check_does_not_reload(self, tmp_path):
+        """Test that an unchanged file is not reloaded."""
+        self.use_context_dir(tmp_path)
+        self.system.select_city("Madurai")
+        
+        assert self.watcher.check_once() == []
+        assert self.watcher.check_once() == []
+    
+    def test_edit_reloads_city(self, tmp_path):
+        """Test that an edited file swaps in a new context and index."""
+        path = self.use_context_dir(tmp_path)
+        self.system.select_city("Madurai")
+        old = self.system.context_registry.peek("madurai")
+        self.watcher.check_once()
+        
+        self.edit(path)
+        assert self.watcher.check_once() == ["madurai"]
+        
+        new = self.system.context_registry.peek("madurai")
+        assert new is not old
+        assert "Night Market" in new.context_content
+        retriever = self.system.local_guide.rag_retriever
+        assert retriever.indexes["madurai"].content_hash == new.get_content_hash()
+        assert any(chunk.section == "Night Market" for chunk in retriever.get_chunks("madurai"))
+        
+        stats = self.watcher.get_stats()
+        assert stats['reloads'] == 1
+        assert stats['city_reload_ms']['madurai'] >= 0
+    
+    def test_touch_without_change(self, tmp_path):
+        """Test that a file touched without new content is not swapped."""
+        path = self.use_context_dir(tmp_path)
+        self.system.select_city("Madurai")
+        old = self.system.context_registry.peek("madurai")
+        self.watcher.check_once()
+        
+        os.utime(path, ns=(time.time_ns(), time.time_ns() + 10**9))
+        
+        assert self.watcher.check_once() == []
+        assert self.system.context_registry.peek("madurai") is old
+    
+    def test_missing_file_keeps_serving(self, tmp_path):
+        """Test that a deleted file is reported and the old context stays."""
+        path = self.use_context_dir(tmp_path)
+        self.system.select_city("Madurai")
+        old = self.system.context_registry.peek("madurai")
+        os.remove(path)
+        
+        assert self.watcher.check_once() == []
+        assert self.watcher.get_stats()['errors'] == 1
+        assert self.system.context_registry.peek("madurai") is old
+    
+    def test_sessions_move_to_new_context(self, tmp_path):
+        """Test that the next query of a session uses the reloaded context."""
+        path = self.use_context_dir(tmp_path)
+        self.system.select_city("Madurai", session_id="alice")
+        self.watcher.check_once()
+        
+        self.edit(path)
+        self.watcher.check_once()
+        self.system.process_query("What food is famous here?", session_id="alice")
+        
+        state = self.system.get_session_state("alice")
+        assert state.loaded_context is self.system.context_registry.peek("madurai")
+    
+    def test_in_flight_query_keeps_old_snapshot(self, tmp_path):
+        """Test that a query started before a reload retrieves from and is guarded by the old context."""
+        path = self.use_context_dir(tmp_path)
+        self.system.select_city("Madurai")
+        self.watcher.check_once()
+        model = self.system.local_guide.model
+        local_guide = self.system.local_guide
+        
+        # Reload after the query has taken its snapshot but before it retrieves
+        prepare = local_guide._prepare_invocation
+        
+        def reloading_prepare(*args):
+            self.edit(path)
+            self.watcher.check_once()
+            return prepare(*args)
+        
+        local_guide._prepare_invocation = reloading_prepare
+        
+        guarded_contexts = []
+        validate = self.system.guard_agent.validate_response_object_async
+        
+        async def recording_validate(response_obj, context, executor=None, content_hash=None):
+            guarded_contexts.append(context)
+            return await validate(response_obj, context, executor, content_hash)
+        
+        self.system.guard_agent.validate_response_object_async = recording_validate
+        
+        response = asyncio.run(self.system.process_query_async("Where can I buy hot jalebi at the night market?"))
+        
+        assert self.watcher.get_stats()['reloads'] == 1
+        assert "Night Market" in self.system.context_registry.peek("madurai").context_content
+        assert response.text.strip() == self.answer
+        assert "Night Market" not in guarded_contexts[0]
+        assert all("Night Market" != chunk.section for chunk in response.source_chunks)
+        assert "sells hot jalebi" not in model.requests[0].prefix + model.requests[0].suffix
+    
+    def test_reload_drops_pooled_agents_for_city(self, tmp_path):
+        """Test that pooled agents of a reloaded city are dropped and others kept."""
+        path = self.use_context_dir(tmp_path)
+        self.system.select_city("Madurai", session_id="alice")
+        self.system.select_city("Dindigul", session_id="bob")
+        self.system.process_query("What food is famous here?", session_id="alice")
+        self.system.process_query("What food is famous here?", session_id="bob")
+        assert self.system.local_guide.get_agent_pool_stats()['keys'] == 2
+        self.watcher.check_once()
+        
+        self.edit(path)
+        self.watcher.check_once()
+        
+        assert self.system.local_guide.get_agent_pool_stats()['keys'] == 1
+    
+    def test_background_thread(self, tmp_path):
+        """Test that the started watcher picks up edits on its own."""
+        path = self.use_context_dir(tmp_path)
+        self.system.select_city("Madurai")
+        self.watcher.start()
+        try:
+            time.sleep(0.05)
+            self.edit(path)
+            deadline = time.time() + 5
+            while self.watcher.get_stats()['reloads'] == 0 and time.time() < deadline:
+                time.sleep(0.01)
+        finally:
+            self.watcher.stop()
+        
+        assert self.watcher.get_stats()['reloads'] == 1
+        assert not self.watcher.is_running()
+    
+    def test_start_requires_interval(self):
+        """Test that a watcher without an interval cannot start."""
+        with pytest.raises(ValueError):
+            ContextWatcher(self.system.context_registry, interval=0).start()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,135 @@
+"""
+Unit tests for the bounded conversation history.
+Tests the ring buffer, running statistics and spilling to JSONL and SQLite.
+"""
+import pytest
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from conversation_history import (
+    ConversationHistory, HistoryRecord, JsonlHistorySpill, SqliteHistorySpill
+)
+from models import AppState, Query, Response
+
+START = datetime(2025, 1, 1, 9, 0, 0)
+
+
+def make_turn(i: int, refusal: bool = False):
+    """Build a query/response pair numbered i."""
+    query = Query(text=f"question {i}", city="Madurai", timestamp=START + timedelta(minutes=i), is_valid=True)
+    response = Response(
+        text="This isn't covered in my local context." if refusal else f"answer {i}",
+        is_refusal=refusal,
+        refusal_reason="Guard agent validation failed" if refusal else None,
+        source_context="Madurai context (RAG-enhanced)"
+    )
+    return query, response
+
+
+class TestConversationHistoryUnit:
+    """Unit tests for ConversationHistory."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.history = ConversationHistory(max_turns=3)
+    
+    def test_round_trip(self):
+        """Test that a stored turn rebuilds the same query and response."""
+        query, response = make_turn(1)
+        self.history.append(query, response)
+        
+        assert self.history[0] == (query, response)
+    
+    def test_records_have_no_instance_dict(self):
+        """Test that records use slots."""
+        record = HistoryRecord(*make_turn(1))
+        
+        assert not hasattr(record, '__dict__')
+    
+    def test_keeps_most_recent_turns(self):
+        """Test that the buffer drops the oldest turns beyond its cap."""
+        for i in range(5):
+            self.history.append(*make_turn(i))
+        
+        assert len(self.history) == 3
+        assert [query.text for query, _ in self.history] == ["question 2", "question 3", "question 4"]
+        assert self.history[-1][0].text == "question 4"
+    
+    def test_statistics_cover_dropped_turns(self):
+        """Test that running statistics include turns no longer in the buffer."""
+        for i in range(5):
+            self.history.append(*make_turn(i, refusal=(i % 2 == 0)))
+        
+        stats = self.history.get_statistics()
+        
+        assert stats['total_turns'] == 5
+        assert stats['refusal_turns'] == 3
+        assert stats['retained_turns'] == 3
+        assert stats['first_timestamp'] == START
+        assert stats['last_timestamp'] == START + timedelta(minutes=4)
+    
+    def test_clear_resets_statistics(self):
+        """Test that clearing drops turns and counters."""
+        self.history.append(*make_turn(1))
+        self.history.clear()
+        
+        assert len(self.history) == 0
+        assert not self.history
+        assert self.history.get_statistics()['total_turns'] == 0
+    
+    def test_invalid_cap(self):
+        """Test that the history needs room for at least one turn."""
+        with pytest.raises(ValueError):
+            ConversationHistory(max_turns=0)
+    
+    def test_jsonl_spill(self, tmp_path):
+        """Test that evicted turns are appended to a JSONL file."""
+        spill = JsonlHistorySpill(str(tmp_path / "history.jsonl"))
+        history = ConversationHistory(max_turns=2, spill=spill, conversation_id="c1")
+        
+        for i in range(4):
+            history.append(*make_turn(i))
+        
+        rows = spill.read("c1")
+        assert [row['query_text'] for row in rows] == ["question 0", "question 1"]
+        assert history.get_statistics()['spilled_turns'] == 2
+    
+    def test_sqlite_spill(self, tmp_path):
+        """Test that evicted turns are inserted into SQLite."""
+        spill = SqliteHistorySpill(str(tmp_path / "history.db"))
+        history = ConversationHistory(max_turns=1, spill=spill, conversation_id="c1")
+        
+        history.append(*make_turn(0, refusal=True))
+        history.append(*make_turn(1))
+        
+        rows = spill.read("c1")
+        spill.close()
+        assert len(rows) == 1
+        assert rows[0]['query_text'] == "question 0"
+        assert rows[0]['is_refusal'] is True
+    
+    def test_app_state_uses_bounded_history(self, monkeypatch):
+        """Test that AppState reads its cap from the environment."""
+        monkeypatch.setenv("HISTORY_MAX_TURNS", "2")
+        state = AppState()
+        
+        for i in range(3):
+            state.add_interaction(*make_turn(i))
+        
+        assert len(state.conversation_history) == 2
+        assert state.conversation_history.get_statistics()['total_turns'] == 3
+    
+    def test_app_state_accepts_list(self):
+        """Test that an AppState built with a list of turns converts it."""
+        state = AppState(conversation_history=[make_turn(1)])
+        
+        assert isinstance(state.conversation_history, ConversationHistory)
+        assert state.conversation_history[0][0].text == "question 1"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
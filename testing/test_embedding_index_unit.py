@@ -0,0 +1,122 @@
+"""
+Unit tests for local embedding retrieval.
+Tests the hashing embedder, the vector index and vector mode in RAGRetriever.
+"""
+import pytest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+np = pytest.importorskip("numpy")
+
+from embedding_index import HashingEmbedder, VectorIndex
+from rag_retriever import RAGRetriever, RetrievalResult
+
+
+class TestEmbeddingIndexUnit:
+    """Unit tests for local embedding retrieval."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.concept_groups = {
+            'food': ['food', 'eat', 'restaurant', 'dinner'],
+            'night': ['late', 'night', 'midnight'],
+        }
+        self.embedder = HashingEmbedder(dimensions=512, concept_groups=self.concept_groups)
+        
+        self.sample_context = """# Test City Context
+
+## Food & Dining
+
+### Street Food Areas
+- **Bus Stand** - Late night food vendors
+
+### Traditional Sweets
+- **Halwa** - Served with ghee at sweet stalls
+
+## Transport
+
+### Local Transport
+- **Auto Rickshaw** - Meter fare starts at 25 rupees
+"""
+        self.retriever = RAGRetriever(embedder=self.embedder, retrieval_mode='vector')
+        self.retriever.load_context_chunks("TestCity", self.sample_context)
+    
+    def test_embeddings_are_float32_and_deterministic(self):
+        """Test that embeddings are stable float32 vectors."""
+        first = self.embedder.embed(["late night food vendors"])
+        second = HashingEmbedder(dimensions=512, concept_groups=self.concept_groups).embed(
+            ["late night food vendors"]
+        )
+        
+        assert first.dtype == np.float32
+        assert first.shape == (1, 512)
+        assert np.array_equal(first, second)
+    
+    def test_word_forms_share_features(self):
+        """Test that character n-grams make related word forms similar."""
+        vectors = self.embedder.embed(["vendor", "vendors", "temple"])
+        vendor, vendors, temple = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        
+        assert vendor @ vendors > vendor @ temple
+    
+    def test_concept_groups_link_different_words(self):
+        """Test that words in one concept group share a feature."""
+        vectors = self.embedder.embed(["eat", "dinner", "fare"])
+        eat, dinner, fare = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        
+        assert eat @ dinner > eat @ fare
+    
+    def test_index_rows_are_normalized(self):
+        """Test that chunk vectors are unit length."""
+        index = VectorIndex(self.retriever.context_chunks["testcity"], self.embedder)
+        
+        assert index.matrix.dtype == np.float32
+        assert np.allclose(np.linalg.norm(index.matrix, axis=1), 1.0, atol=1e-5)
+    
+    def test_paraphrase_retrieval(self):
+        """Test that a paraphrase without shared keywords finds the right chunk."""
+        results = self.retriever.retrieve_relevant_context("where to eat at midnight", "TestCity", top_k=1)
+        
+        assert results
+        assert isinstance(results[0], RetrievalResult)
+        assert "Late night food vendors" in results[0].chunk.content
+    
+    def test_lexical_mode_still_available(self):
+        """Test that the keyword scorer can be selected per call."""
+        results = self.retriever.retrieve_relevant_context("auto rickshaw", "TestCity", mode='lexical')
+        
+        assert "Auto Rickshaw" in results[0].chunk.content
+    
+    def test_vector_index_rebuilt_on_reload(self):
+        """Test that reloading a city discards its vector index."""
+        self.retriever.retrieve_relevant_context("food", "TestCity")
+        vector_index = self.retriever.vector_indexes["testcity"]
+        
+        self.retriever.load_context_chunks("TestCity", self.sample_context)
+        self.retriever.retrieve_relevant_context("food", "TestCity")
+        
+        assert self.retriever.vector_indexes["testcity"] is not vector_index
+    
+    def test_vector_mode_requires_embedder(self):
+        """Test that vector mode cannot be selected without an embedder."""
+        with pytest.raises(ValueError):
+            RAGRetriever(retrieval_mode='vector')
+        
+        with pytest.raises(ValueError):
+            RAGRetriever(retrieval_mode='semantic', embedder=self.embedder)
+        
+        retriever = RAGRetriever()
+        retriever.load_context_chunks("TestCity", self.sample_context)
+        with pytest.raises(ValueError):
+            retriever.retrieve_relevant_context("food", "TestCity", mode='vector')
+    
+    def test_unknown_city(self):
+        """Test vector retrieval for a city without loaded chunks."""
+        assert self.retriever.retrieve_relevant_context("food", "Unknown") == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -6,12 +6,14 @@ and forced refusal mechanisms.
 import pytest
 import sys
 import os
+from datetime import datetime
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from agents.guard_agent import GuardAgent
-from models import Response
+from models import CityContext, Response
+from rag_retriever import RAGRetriever
 
 
 class TestGuardAgentUnit:
@@ -282,6 +284,239 @@ class TestGuardAgentUnit:
             result = self.guard.validate_response(response, self.sample_context)
             assert isinstance(result, bool)  # Should not crash on different cases
 
+    
+    def test_stream_guard_releases_valid_sentences(self):
+        """Test that the streaming guard releases text one checked sentence at a time."""
+        stream_guard = self.guard.create_stream_guard(self.sample_context)
+        
+        assert stream_guard.feed("Popular dishes include bir") == ""
+        assert stream_guard.feed("yani and idli. Take city") == "Popular dishes include biryani and idli."
+        assert stream_guard.feed(" buses") == ""
+        assert stream_guard.flush() == " Take city buses"
+        assert not stream_guard.rejected
+    
+    def test_stream_guard_rejects_suspicious_pattern(self):
+        """Test that a suspicious pattern rejects the stream immediately."""
+        stream_guard = self.guard.create_stream_guard(self.sample_context)
+        
+        assert stream_guard.feed("Biryani is popular. According to experts, it is old.") == ""
+        assert stream_guard.rejected
+        assert stream_guard.reason == "suspicious pattern"
+        assert stream_guard.feed("More text.") == ""
+    
+    def test_stream_guard_rejects_external_words(self):
+        """Test that the running share of unknown words rejects the stream."""
+        stream_guard = self.guard.create_stream_guard(self.sample_context)
+        
+        stream_guard.feed("Idli and dosa are served in the central market.")
+        assert not stream_guard.rejected
+        stream_guard.feed("Paris Berlin Tokyo London Madrid Rome Vienna Prague Oslo Lisbon.")
+        
+        assert stream_guard.rejected
+        assert stream_guard.reason == "too many words outside the context"
+    
+    def test_stream_guard_waits_for_enough_words(self):
+        """Test that a short opening is not judged on its word ratio."""
+        stream_guard = self.guard.create_stream_guard(self.sample_context)
+        
+        assert stream_guard.feed("Vanakkam friend.") == "Vanakkam friend."
+        assert not stream_guard.rejected
+    
+    def test_stream_guard_allows_refusal(self):
+        """Test that a standardized refusal passes the streaming guard."""
+        stream_guard = self.guard.create_stream_guard(self.sample_context)
+        
+        released = stream_guard.feed("This isn't covered in my local context.")
+        
+        assert released == "This isn't covered in my local context."
+        assert stream_guard.is_refusal
+        assert not stream_guard.rejected
+    
+    def test_context_words_cached(self):
+        """Test that a context's content words are extracted once."""
+        self.guard.validate_response("The ancient temple is a major attraction here.", self.sample_context)
+        self.guard.get_validation_details("Local cuisine includes biryani and dosa.", self.sample_context)
+        self.guard.create_stream_guard(self.sample_context)
+        
+        stats = self.guard.get_context_cache_stats()
+        assert stats['misses'] == 1
+        assert stats['hits'] == 2
+        assert self.guard._get_context_words(self.sample_context) == self.guard._extract_content_words(self.sample_context)
+    
+    def test_context_cache_keyed_by_content_hash(self):
+        """Test that the cache is keyed by the content hash, not the context text."""
+        context = CityContext(city_name="testcity", context_content=self.sample_context, file_path="",
+                              last_loaded=datetime.now())
+        self.guard.validate_response("The ancient temple is a major attraction here.",
+                                     context.context_content, context.get_content_hash())
+        self.guard.get_validation_details("Local cuisine includes biryani and dosa.", self.sample_context)
+        
+        assert list(self.guard._context_words) == [context.get_content_hash()]
+        assert self.guard.get_context_cache_stats()['hits'] == 1
+    
+    def test_context_cache_evicts_least_recently_used(self):
+        """Test that the context cache keeps only the most recently used contexts."""
+        guard = GuardAgent(max_cached_contexts=2)
+        first = guard._get_context_words("Madurai temple")
+        guard._get_context_words("Dindigul fort")
+        guard._get_context_words("Madurai temple")
+        guard._get_context_words("Kodaikanal lake")
+        
+        assert guard.get_context_cache_stats()['contexts'] == 2
+        assert guard._get_context_words("Madurai temple") is first
+        guard._get_context_words("Dindigul fort")
+        assert guard.get_context_cache_stats()['misses'] == 4
+    
+    def test_evaluate_short_circuits(self):
+        """Test that evaluation stops at the first failed check."""
+        verdict = self.guard.evaluate("According to experts, the temple is ancient.", self.sample_context)
+        
+        assert not verdict.is_valid
+        assert verdict.reason == "suspicious pattern"
+        assert verdict.response_words == set()
+        assert self.guard.get_context_cache_stats()['misses'] == 0
+    
+    def test_evaluate_reasons(self):
+        """Test the reason reported by each failed check."""
+        cases = {
+            "": "empty response or context",
+            "Paris Berlin Tokyo London Madrid.": "insufficient overlap with the context",
+            "Temple biryani idli Paris Berlin Tokyo.": "too many words outside the context",
+            "Temple biryani idli dosa buses pongal market survey.": "external knowledge indicator",
+        }
+        
+        for response, reason in cases.items():
+            verdict = self.guard.evaluate(response, self.sample_context)
+            assert not verdict.is_valid
+            assert verdict.reason == reason, response
+        
+        verdict = self.guard.evaluate("Local cuisine includes biryani, idli, and dosa.", self.sample_context)
+        assert verdict.is_valid
+        assert verdict.reason is None
+    
+    def test_full_evaluation_matches_validation(self):
+        """Test that a full evaluation agrees with validate_response and fills every field."""
+        responses = [
+            "According to research, biryani is popular.",
+            "Local cuisine includes biryani, idli, and dosa.",
+            "This isn't covered in my local context.",
+            "Paris Berlin Tokyo London Madrid."
+        ]
+        
+        for response in responses:
+            verdict = self.guard.evaluate(response, self.sample_context, full=True)
+            assert verdict.is_valid == self.guard.validate_response(response, self.sample_context)
+            assert verdict.response_words == self.guard._extract_content_words(response)
+            assert verdict.overlap_words | verdict.external_words == verdict.response_words
+    
+    def test_combined_pattern_matches_each_pattern(self):
+        """Test that the combined suspicious pattern finds what the separate patterns find."""
+        import re
+        
+        texts = ["studies indicate so", "ask google", "i believe it", "usually busy",
+                 "known worldwide", "the latest menu", "the temple at dawn", "googled it"]
+        
+        for text in texts:
+            expected = any(re.search(pattern, text) for pattern in self.guard.suspicious_patterns)
+            assert self.guard._contains_suspicious_patterns(text) == expected, text
+    
+    def grounding_chunks(self):
+        """Chunks of a small context, as the retriever indexes them."""
+        context = """# Test City
+## Food
+Jigarthanda is a famous cold drink made with milk and almond gum.
+## Transport
+City buses run from the central bus stand every ten minutes.
+"""
+        return tuple(RAGRetriever()._chunk_context(context, "testcity"))
+    
+    def test_ground_response_scores_sentences(self):
+        """Test per-sentence support scores and chunk attributions."""
+        chunks = self.grounding_chunks()
+        
+        supports = self.guard.ground_response(
+            "Jigarthanda is a famous cold drink made with milk. The Eiffel Tower sparkles at night.", chunks
+        )
+        
+        assert len(supports) == 2
+        assert supports[0].score == 1.0
+        assert supports[0].chunk_ids == [chunks[1].chunk_id]
+        assert supports[1].score < 0.2
+    
+    def test_evaluate_grounded(self):
+        """Test that unsupported sentences and outside sources fail grounding."""
+        chunks = self.grounding_chunks()
+        
+        assert self.guard.evaluate_grounded("Buses run from the central bus stand.", chunks).is_valid
+        assert self.guard.evaluate_grounded("This isn't covered in my local context.", chunks).is_valid
+        
+        verdict = self.guard.evaluate_grounded(
+            "Jigarthanda is a cold drink. The Eiffel Tower sparkles every hour at night.", chunks
+        )
+        assert verdict.reason == "sentence not supported by the retrieved context"
+        
+        verdict = self.guard.evaluate_grounded("City buses run every ten minutes, says the government.", chunks)
+        assert verdict.reason == "external knowledge indicator"
+    
+    def test_grounded_mode_uses_response_chunks(self):
+        """Test that grounded mode checks the chunks on the response, if any."""
+        guard = GuardAgent(mode='grounded')
+        chunks = self.grounding_chunks()
+        text = "Jigarthanda is a famous cold drink made with milk."
+        
+        # The whole context lacks the words, but the chunks the model saw have them
+        grounded = guard.validate_response_object(
+            Response(text=text, is_refusal=False, source_chunks=chunks), "Unrelated context about temples."
+        )
+        assert grounded.validation_passed
+        
+        ungrounded = guard.validate_response_object(
+            Response(text=text, is_refusal=False), "Unrelated context about temples."
+        )
+        assert not ungrounded.validation_passed
+    
+    def stream_verdict(self, guard, text, context, chunks):
+        """Feed text word by word through a stream guard; return (rejected, released text)."""
+        stream_guard = guard.create_stream_guard(context, chunks=chunks)
+        released = "".join(stream_guard.feed(word + " ") for word in text.split())
+        released += stream_guard.flush()
+        return stream_guard.rejected, released
+    
+    def test_grounded_stream_guard_matches_final_check(self):
+        """Test that in grounded mode the stream guard judges against the same chunks."""
+        guard = GuardAgent(mode='grounded')
+        chunks = self.grounding_chunks()
+        unrelated = "Unrelated context about temples."
+        cases = [
+            "Jigarthanda is a famous cold drink made with milk.",
+            "Jigarthanda is a cold drink. The Eiffel Tower sparkles every hour at night.",
+            "City buses run every ten minutes, says the government.",
+            "Buses run. Eiffel sparkles."
+        ]
+        
+        for text in cases:
+            final = guard.validate_response_object(
+                Response(text=text, is_refusal=False, source_chunks=chunks), unrelated
+            )
+            rejected, _ = self.stream_verdict(guard, text, unrelated, chunks)
+            assert rejected == (not final.validation_passed), text
+    
+    def test_stream_guard_without_chunks_uses_context(self):
+        """Test that a grounded stream guard with no chunks falls back to the whole context."""
+        guard = GuardAgent(mode='grounded')
+        text = "Jigarthanda is a famous cold drink made with milk."
+        
+        rejected, released = self.stream_verdict(guard, text, self.sample_context, ())
+        
+        assert guard.create_stream_guard(self.sample_context).chunks == ()
+        assert not rejected
+        assert released.strip() == text
+    
+    def test_unknown_guard_mode(self):
+        """Test that an unknown guard mode is rejected."""
+        with pytest.raises(ValueError):
+            GuardAgent(mode='strict')
+
 
 if __name__ == "__main__":
     pytest.main([__file__])
\ No newline at end of file
@@ -0,0 +1,160 @@
+"""
+Unit tests for hybrid retrieval.
+Tests reciprocal-rank fusion, the keyword reranker and the hybrid pipeline.
+"""
+import pytest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("numpy")
+
+from embedding_index import HashingEmbedder
+from hybrid_retrieval import (
+    HybridRetrievalConfig, HybridRetrieval, KeywordCoverageReranker, reciprocal_rank_fusion
+)
+from rag_retriever import RAGRetriever, RetrievalResult, ContextChunk
+from retrieval_cache import RetrievalCache
+
+
+class TestHybridRetrievalUnit:
+    """Unit tests for hybrid retrieval."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.sample_context = """# Test City Context
+
+## Food & Dining
+
+### Street Food Areas
+- **Bus Stand** - Late night food vendors
+
+### Traditional Sweets
+- **Halwa** - Served with ghee at sweet stalls
+
+## Transport
+
+### Local Transport
+- **Auto Rickshaw** - Meter fare starts at 25 rupees
+- **Share Auto** - Fixed routes
+"""
+        embedder = HashingEmbedder(
+            dimensions=512,
+            concept_groups={'food': ['food', 'eat'], 'night': ['late', 'night', 'midnight']}
+        )
+        self.retriever = RAGRetriever(embedder=embedder, retrieval_mode='hybrid')
+        self.retriever.load_context_chunks("TestCity", self.sample_context)
+    
+    def make_chunk(self, chunk_id, content="text"):
+        """Create a standalone chunk."""
+        return ContextChunk(content=content, section="Section", city="testcity", chunk_id=chunk_id)
+    
+    def test_rrf_rewards_agreement(self):
+        """Test that chunks ranked by both scorers come first."""
+        a, b, c = self.make_chunk("a"), self.make_chunk("b"), self.make_chunk("c")
+        lexical = [RetrievalResult(a, 9.0), RetrievalResult(b, 5.0)]
+        vector = [RetrievalResult(b, 0.9), RetrievalResult(c, 0.8)]
+        
+        fused = reciprocal_rank_fusion([lexical, vector], k=60)
+        
+        assert [result.chunk.chunk_id for result in fused] == ["b", "a", "c"]
+        assert fused[0].score == pytest.approx(1 / 62 + 1 / 61)
+    
+    def test_rrf_empty_rankings(self):
+        """Test fusion of empty rankings."""
+        assert reciprocal_rank_fusion([[], []]) == []
+    
+    def test_reranker_prefers_query_coverage(self):
+        """Test that the reranker promotes chunks covering more of the query."""
+        partial = self.make_chunk("partial", "auto stand")
+        full = self.make_chunk("full", "share auto fixed routes")
+        candidates = [RetrievalResult(partial, 0.5), RetrievalResult(full, 0.4)]
+        
+        reranked = KeywordCoverageReranker().rerank("share auto routes", candidates)
+        
+        assert [result.chunk.chunk_id for result in reranked] == ["full", "partial"]
+    
+    def test_reranker_keeps_order_for_stopword_queries(self):
+        """Test that a query of only stopwords leaves the order unchanged."""
+        candidates = [RetrievalResult(self.make_chunk("a"), 0.5), RetrievalResult(self.make_chunk("b"), 0.4)]
+        
+        assert KeywordCoverageReranker().rerank("where is the", candidates) == candidates
+    
+    def test_hybrid_returns_timings(self):
+        """Test that every stage reports its latency."""
+        retrieval = self.retriever.retrieve_hybrid("late night food", "TestCity", top_k=2)
+        
+        assert isinstance(retrieval, HybridRetrieval)
+        assert len(retrieval.results) <= 2
+        assert retrieval.reranked
+        for stage in ('lexical_ms', 'vector_ms', 'fusion_ms', 'rerank_ms', 'total_ms'):
+            assert retrieval.timings[stage] >= 0
+    
+    def test_hybrid_ranks_agreement_first(self):
+        """Test that a chunk favoured by both scorers wins over a stopword match."""
+        results = self.retriever.retrieve_relevant_context("where to eat late at midnight", "TestCity", top_k=1)
+        
+        assert "Late night food vendors" in results[0].chunk.content
+    
+    def test_hybrid_serial_matches_parallel(self):
+        """Test that running stages serially gives the same ranking."""
+        query = "auto rickshaw fare"
+        parallel = self.retriever.retrieve_hybrid(query, "TestCity", period="morning")
+        serial = self.retriever.retrieve_hybrid(
+            query, "TestCity", period="morning", config=HybridRetrievalConfig(parallel=False)
+        )
+        
+        assert parallel.results == serial.results
+    
+    def test_rerank_can_be_disabled(self):
+        """Test that the reranker stage is optional."""
+        retrieval = self.retriever.retrieve_hybrid(
+            "auto rickshaw", "TestCity", config=HybridRetrievalConfig(rerank=False)
+        )
+        
+        assert not retrieval.reranked
+        assert 'rerank_ms' not in retrieval.timings
+    
+    def test_rerank_skipped_over_latency_budget(self):
+        """Test that the reranker is skipped once the latency budget is spent."""
+        retrieval = self.retriever.retrieve_hybrid(
+            "auto rickshaw", "TestCity", config=HybridRetrievalConfig(latency_budget_ms=0.0)
+        )
+        
+        assert not retrieval.reranked
+    
+    def test_candidate_budgets(self):
+        """Test that stage budgets bound the fused candidates."""
+        config = HybridRetrievalConfig(lexical_candidates=1, vector_candidates=1, rerank=False)
+        retrieval = self.retriever.retrieve_hybrid("auto rickshaw food", "TestCity", top_k=10, config=config)
+        
+        assert len(retrieval.results) <= 2
+    
+    def test_cached_hybrid_reranks_original_query(self):
+        """Test that the reranker sees the query's word order, not the cache key."""
+        seen = []
+        
+        class RecordingReranker(KeywordCoverageReranker):
+            def rerank(self, query, candidates):
+                seen.append(query)
+                return super().rerank(query, candidates)
+        
+        self.retriever.reranker = RecordingReranker()
+        self.retriever.cache = RetrievalCache()
+        self.retriever.retrieve_cached("late night food", "TestCity", 3, "night")
+        
+        assert seen == ["late night food"]
+    
+    def test_hybrid_requires_embedder(self):
+        """Test that hybrid retrieval needs an embedder."""
+        retriever = RAGRetriever()
+        retriever.load_context_chunks("TestCity", self.sample_context)
+        
+        with pytest.raises(ValueError):
+            retriever.retrieve_hybrid("food", "TestCity")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
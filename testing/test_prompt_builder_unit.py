@@ -0,0 +1,155 @@
+"""
+Unit tests for the token-budgeted prompt builder.
+Tests chunk selection, budgets, deduplication and prompt modes.
+"""
+import pytest
+import sys
+import os
+from datetime import datetime
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from prompt_builder import PromptBuilder, PromptContext, PromptCacheStats
+from rag_retriever import RAGRetriever, IST
+
+
+class TestPromptBuilderUnit:
+    """Unit tests for the prompt builder."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.sample_context = """# Madurai Context
+
+## Food & Dining
+
+### Traditional Foods
+- **Jigarthanda** - Famous cold drink in Madurai
+- **Idli** - Soft idlis for breakfast
+
+### Street Food
+- **Kari Dosai** - Spicy mutton dosa near the bus stand
+
+## Transport
+
+### Local Transport
+- **Auto Rickshaw** - Meter fare starts at 25 rupees
+
+### Buses
+- **Town Bus** - Frequent buses from Periyar stand
+
+## Culture
+
+### Temples
+- **Meenakshi Temple** - Open from early morning
+"""
+        self.retriever = RAGRetriever(clock=lambda: datetime(2024, 1, 1, 10, 0, tzinfo=IST))
+        self.retriever.load_context_chunks("Madurai", self.sample_context)
+    
+    def test_rag_only_excludes_full_context(self):
+        """Test that rag-only mode never appends the full city file."""
+        prompt = PromptBuilder().build("jigarthanda", "Madurai", self.retriever, self.sample_context)
+        
+        assert isinstance(prompt, PromptContext)
+        assert "FULL CONTEXT" not in prompt.text
+        assert "Jigarthanda" in prompt.text
+        assert prompt.text.startswith("TIME CONTEXT:")
+    
+    def test_retrieved_chunk_comes_first(self):
+        """Test that the best ranked chunk is placed first."""
+        prompt = PromptBuilder().build("auto rickshaw fare", "Madurai", self.retriever, self.sample_context)
+        
+        chunks = {chunk.chunk_id: chunk for chunk in self.retriever.get_chunks("Madurai")}
+        first = chunks[prompt.chunk_ids[0]]
+        assert "Auto Rickshaw" in first.content
+    
+    def test_no_duplicate_text(self):
+        """Test that each chunk appears at most once."""
+        prompt = PromptBuilder(token_budget=10000).build(
+            "food transport temple", "Madurai", self.retriever, self.sample_context
+        )
+        
+        assert len(prompt.chunk_ids) == len(set(prompt.chunk_ids))
+        assert prompt.text.count("Jigarthanda") == 1
+        assert prompt.text.count("Meter fare") == 1
+    
+    def test_budget_limits_context(self):
+        """Test that a small budget drops neighbours and flags truncation."""
+        builder = PromptBuilder(token_budget=25)
+        prompt = builder.build("auto rickshaw fare", "Madurai", self.retriever, self.sample_context)
+        
+        assert len(prompt.chunk_ids) == 1
+        assert prompt.truncated
+        assert "Meenakshi" not in prompt.text
+    
+    def test_neighbours_fill_remaining_budget(self):
+        """Test that sections next to a retrieved chunk are added when budget allows."""
+        prompt = PromptBuilder(token_budget=10000).build(
+            "meter fare", "Madurai", self.retriever, self.sample_context
+        )
+        
+        assert "Town Bus" in prompt.text
+        assert not prompt.truncated
+    
+    def test_no_match_falls_back_to_document_order(self):
+        """Test that an unmatched query still gets context within budget."""
+        builder = PromptBuilder(token_budget=40)
+        prompt = builder.build("xyzzy", "Madurai", self.retriever, self.sample_context)
+        
+        assert prompt.chunk_ids
+        assert prompt.estimated_tokens <= builder.token_budget + builder.estimate_tokens(
+            "TIME CONTEXT: " + self.retriever.get_time_context() + "\nRELEVANT LOCAL INFORMATION:"
+        )
+    
+    def test_full_context_mode(self):
+        """Test that full-context mode sends the city file exactly once."""
+        prompt = PromptBuilder(mode='full-context').build("jigarthanda", "Madurai", self.retriever, self.sample_context)
+        
+        assert prompt.city_context.count("Famous cold drink") == 1
+        assert "Famous cold drink" not in prompt.text
+        assert "RELEVANT LOCAL INFORMATION" not in prompt.text
+    
+    def test_stable_context_separate_from_time(self):
+        """Test that the cacheable city context carries no per-query text."""
+        builder = PromptBuilder(mode='full-context')
+        morning = builder.build("jigarthanda", "Madurai", self.retriever, self.sample_context)
+        self.retriever.clock = lambda: datetime(2024, 1, 1, 21, 0, tzinfo=IST)
+        night = builder.build("auto fare", "Madurai", self.retriever, self.sample_context)
+        
+        assert morning.city_context == night.city_context
+        assert "TIME CONTEXT" not in morning.city_context
+        assert morning.text != night.text
+    
+    def test_rag_only_has_no_city_context(self):
+        """Test that rag-only mode keeps everything in the per-query text."""
+        prompt = PromptBuilder().build("jigarthanda", "Madurai", self.retriever, self.sample_context)
+        
+        assert prompt.city_context == ""
+    
+    def test_rag_only_smaller_than_full_context(self):
+        """Test that rag-only prompts are smaller than full-context prompts."""
+        rag = PromptBuilder(token_budget=30).build("jigarthanda", "Madurai", self.retriever, self.sample_context)
+        full = PromptBuilder(mode='full-context').build("jigarthanda", "Madurai", self.retriever, self.sample_context)
+        
+        assert rag.estimated_tokens < full.estimated_tokens
+    
+    def test_cache_stats(self):
+        """Test cached and uncached input token totals."""
+        stats = PromptCacheStats()
+        stats.record({'inputTokens': 50, 'cacheWriteInputTokens': 150})
+        stats.record({'inputTokens': 50, 'cacheReadInputTokens': 150})
+        
+        totals = stats.get_stats()
+        assert totals['requests'] == 2
+        assert totals['uncached_input_tokens'] == 100
+        assert totals['cache_read_input_tokens'] == 150
+        assert totals['cached_ratio'] == pytest.approx(150 / 400)
+    
+    def test_invalid_mode(self):
+        """Test that an unknown mode is rejected."""
+        with pytest.raises(ValueError):
+            PromptBuilder(mode='everything')
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
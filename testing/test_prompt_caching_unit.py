@@ -0,0 +1,121 @@
+"""
+Unit tests for the prefix-cache-friendly prompt layout.
+Runs LocalGuideAgent against the local stub model and checks the prefixes it receives.
+"""
+import pytest
+import sys
+import os
+from datetime import datetime
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.local_guide_agent import LocalGuideAgent
+from prompt_builder import PromptBuilder
+from rag_retriever import IST
+from stub_model import StubModel
+
+
+class TestPromptCachingUnit:
+    """Unit tests for prompt prefix caching."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.madurai_context = """# Madurai Context
+
+## Food & Dining
+
+### Traditional Foods
+- **Jigarthanda** - Famous cold drink in Madurai
+
+## Transport
+
+### Local Transport
+- **Auto Rickshaw** - Meter fare starts at 25 rupees
+"""
+        self.dindigul_context = """# Dindigul Context
+
+## Food & Dining
+
+### Biryani
+- **Thalappakatti Biryani** - Seeraga samba rice biryani
+"""
+        self.agent = LocalGuideAgent()
+        self.agent.model = StubModel(response_text="Jigarthanda is the famous cold drink.")
+        self.agent.rag_retriever.clock = lambda: datetime(2024, 1, 1, 10, 0, tzinfo=IST)
+    
+    def test_prefix_shared_across_queries(self):
+        """Test that different queries for a city send the same prefix."""
+        self.agent.generate_response("famous drink", self.madurai_context, "Madurai")
+        self.agent.generate_response("auto fare", self.madurai_context, "Madurai")
+        
+        first, second = self.agent.model.requests
+        assert first.prefix == second.prefix
+        assert "CONTEXT SUPREMACY" in first.prefix
+        assert not first.cache_hit
+        assert second.cache_hit
+    
+    def test_volatile_text_after_checkpoint(self):
+        """Test that the time context, chunks and query follow the cache checkpoint."""
+        self.agent.generate_response("famous drink", self.madurai_context, "Madurai")
+        
+        request = self.agent.model.requests[0]
+        assert "TIME CONTEXT" not in request.prefix
+        assert "famous drink" not in request.prefix
+        assert "TIME CONTEXT" in request.suffix
+        assert "Jigarthanda" in request.suffix
+        assert request.suffix.endswith("QUESTION: famous drink")
+    
+    def test_full_context_mode_caches_city_file(self):
+        """Test that full-context mode puts the city file in the cached prefix."""
+        self.agent.prompt_builder = PromptBuilder(mode='full-context')
+        self.agent.generate_response("famous drink", self.madurai_context, "Madurai")
+        self.agent.rag_retriever.clock = lambda: datetime(2024, 1, 1, 21, 0, tzinfo=IST)
+        self.agent.generate_response("auto fare", self.madurai_context, "Madurai")
+        
+        first, second = self.agent.model.requests
+        assert "Meter fare starts at 25 rupees" in first.prefix
+        assert first.prefix == second.prefix
+        assert second.cache_hit
+        assert "Meter fare" not in second.suffix
+    
+    def test_prefix_per_city(self):
+        """Test that each city gets its own cached prefix in full-context mode."""
+        self.agent.prompt_builder = PromptBuilder(mode='full-context')
+        self.agent.generate_response("biryani", self.dindigul_context, "Dindigul")
+        self.agent.generate_response("famous drink", self.madurai_context, "Madurai")
+        
+        dindigul, madurai = self.agent.model.requests
+        assert dindigul.prefix != madurai.prefix
+        assert not madurai.cache_hit
+    
+    def test_cache_metrics(self):
+        """Test that cached and uncached input tokens are counted."""
+        for query in ("famous drink", "auto fare", "cold drink"):
+            self.agent.generate_response(query, self.madurai_context, "Madurai")
+        
+        stats = self.agent.get_prompt_cache_stats()
+        assert stats['requests'] == 3
+        assert stats['cache_write_input_tokens'] > 0
+        assert stats['cache_read_input_tokens'] == 2 * stats['cache_write_input_tokens']
+        assert stats['uncached_input_tokens'] > 0
+        assert 0 < stats['cached_ratio'] < 1
+    
+    def test_caching_disabled(self):
+        """Test that no checkpoint is sent when prompt caching is off."""
+        self.agent.prompt_caching = False
+        self.agent.generate_response("famous drink", self.madurai_context, "Madurai")
+        
+        request = self.agent.model.requests[0]
+        assert request.prefix == ""
+        assert "CONTEXT SUPREMACY" in request.suffix
+    
+    def test_response_text_returned(self):
+        """Test that the stub model's answer is returned."""
+        response = self.agent.generate_response("famous drink", self.madurai_context, "Madurai")
+        
+        assert response.strip() == "Jigarthanda is the famous cold drink."
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -11,7 +11,7 @@ from datetime import datetime
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from agents.query_validator import QueryValidationAgent
+from agents.query_validator import QueryValidationAgent, KeywordAutomaton
 from models import Query
 
 
@@ -261,6 +261,52 @@ class TestQueryValidationAgentUnit:
         for query in queries:
             assert self.validator.validate_query_scope(query), f"Should accept case variations: {query}"
             assert self.validator.is_supported_topic(query), f"Should identify topic for: {query}"
+    
+    def test_keyword_automaton_matches_substring_tests(self):
+        """Test that one scan finds exactly the keywords the 'in' operator finds."""
+        keywords = ['do', 'dosa', 'osa', 'art', 'people say', 'say']
+        automaton = KeywordAutomaton(keywords)
+        
+        for text in ["masala dosa", "start", "what people say", "do it", "", "nothing here"]:
+            found = automaton.scan(text)
+            assert set(found) == {keyword for keyword in keywords if keyword in text}, text
+        
+        assert automaton.scan("masala dosa") == {'dosa': True, 'do': False, 'osa': False}
+        assert automaton.scan("do a dosa") == {'do': True, 'dosa': True, 'osa': False}
+    
+    def test_scan_query_scores_topics(self):
+        """Test topic scores and whole-word flags from a single scan."""
+        scan = self.validator.scan_query("Where to eat dosa near the bus stand?")
+        
+        assert scan.keyword_hits['dosa'] is True
+        assert scan.keyword_hits['do'] is False  # Only inside 'dosa'
+        assert scan.topic_scores['food'] == 4  # 'eat' and 'dosa' as whole words
+        assert scan.topic_scores['transport'] == 2
+        assert 'food' in scan.topics
+        assert not scan.has_general_phrase
+    
+    def test_scan_is_shared(self):
+        """Test that the topic checks of one query reuse one scan."""
+        query = "Tell me about Madurai"
+        
+        self.validator.is_supported_topic(query)
+        self.validator.identify_topic(query)
+        self.validator.get_topic_suggestions(query)
+        
+        info = self.validator._scan_cached.cache_info()
+        assert info.misses == 1
+        assert info.hits == 2
+    
+    def test_recompile_after_keyword_change(self):
+        """Test that changed keyword tables take effect after compile_keywords."""
+        self.validator.topic_keywords['food'].append('kothu parotta')
+        self.validator.compile_keywords()
+        
+        assert self.validator.identify_topic("kothu parotta") == 'food'
+    
+    def test_suggestions_include_matched_topics(self):
+        """Test that topics matched by the scan are suggested."""
+        assert self.validator.get_topic_suggestions("eating politics") == ['food']
 
 
 if __name__ == "__main__":
@@ -0,0 +1,177 @@
+"""
+Unit tests for the retrieval index store.
+Tests sidecar persistence, content-hash invalidation and retriever integration.
+"""
+import pytest
+import sys
+import os
+import pickle
+from datetime import datetime
+from unittest.mock import patch
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import CityContext
+from rag_index_store import RetrievalIndexStore
+from rag_retriever import RAGRetriever, InvertedIndex
+
+PLANTED_CALLS = []
+
+
+def planted_payload():
+    """Record that a planted pickle was executed."""
+    PLANTED_CALLS.append(True)
+    return {}
+
+
+class PlantedPickle:
+    """Object whose unpickling calls planted_payload."""
+    
+    def __reduce__(self):
+        return (planted_payload, ())
+
+
+class TestRetrievalIndexStoreUnit:
+    """Unit tests for the retrieval index store."""
+    
+    @pytest.fixture(autouse=True)
+    def setup_files(self, tmp_path):
+        """Set up a temporary context file and store."""
+        self.context_content = """# Madurai Context
+
+## Food & Dining
+
+### Traditional Foods
+- **Jigarthanda** - Famous cold drink
+- **Idli** - Breakfast item
+
+## Transport
+
+### Local Transport
+- **Auto Rickshaw** - Meter fare starts at 25 rupees
+"""
+        self.context_path = tmp_path / "madurai_context.md"
+        self.context_path.write_text(self.context_content, encoding="utf-8")
+        self.store = RetrievalIndexStore()
+    
+    def make_context(self, content=None):
+        """Create a CityContext for the temporary context file."""
+        return CityContext(
+            city_name="madurai",
+            context_content=content if content is not None else self.context_content,
+            file_path=str(self.context_path),
+            last_loaded=datetime.now()
+        )
+    
+    def test_index_path_next_to_context_file(self):
+        """Test that sidecars live next to their context file by default."""
+        path = self.store.get_index_path(self.make_context())
+        
+        assert path == str(self.context_path.parent / "madurai_context.idx")
+    
+    def test_index_path_in_custom_directory(self, tmp_path):
+        """Test that an explicit index directory is honoured."""
+        store = RetrievalIndexStore(index_dir=str(tmp_path / "indexes"))
+        path = store.get_index_path(self.make_context())
+        
+        assert path == str(tmp_path / "indexes" / "madurai_context.idx")
+    
+    def test_load_missing_sidecar(self):
+        """Test that a missing sidecar loads as None."""
+        assert self.store.load(self.make_context()) is None
+    
+    def test_save_and_load_roundtrip(self):
+        """Test that a saved index loads back with the same postings."""
+        city_context = self.make_context()
+        retriever = RAGRetriever()
+        index = InvertedIndex(retriever._chunk_context(self.context_content, "madurai"))
+        
+        assert self.store.save(city_context, index)
+        loaded = self.store.load(city_context)
+        
+        assert isinstance(loaded, InvertedIndex)
+        assert loaded.postings == index.postings
+        assert [chunk.chunk_id for chunk in loaded.chunks] == [chunk.chunk_id for chunk in index.chunks]
+        assert [chunk.shingles for chunk in loaded.chunks] == [chunk.shingles for chunk in index.chunks]
+        assert [chunk.time_mask for chunk in loaded.chunks] == [chunk.time_mask for chunk in index.chunks]
+        assert loaded.idf == index.idf
+        assert loaded.content_hash == city_context.get_content_hash()
+    
+    def test_stale_sidecar_is_ignored(self):
+        """Test that a sidecar built from different content is not used."""
+        city_context = self.make_context()
+        retriever = RAGRetriever()
+        index = InvertedIndex(retriever._chunk_context(self.context_content, "madurai"))
+        self.store.save(city_context, index)
+        
+        changed = self.make_context(self.context_content + "\n- **Kari Dosai** - Spicy dosa\n")
+        
+        assert self.store.load(changed) is None
+    
+    def test_corrupt_sidecar_is_ignored(self):
+        """Test that an unreadable sidecar loads as None."""
+        city_context = self.make_context()
+        with open(self.store.get_index_path(city_context), 'wb') as f:
+            f.write(b"not an index")
+        
+        assert self.store.load(city_context) is None
+    
+    def test_pickled_sidecar_is_not_executed(self):
+        """Test that a planted pickle sidecar is rejected without running its code."""
+        city_context = self.make_context()
+        with open(self.store.get_index_path(city_context), 'wb') as f:
+            f.write(pickle.dumps(PlantedPickle()))
+        
+        assert self.store.load(city_context) is None
+        assert PLANTED_CALLS == []
+    
+    def test_retriever_builds_and_persists_index(self):
+        """Test that the retriever writes a sidecar on first load."""
+        city_context = self.make_context()
+        retriever = RAGRetriever(index_store=self.store)
+        
+        retriever.load_city_context(city_context)
+        
+        assert os.path.exists(self.store.get_index_path(city_context))
+        assert retriever.indexes["madurai"].content_hash == city_context.get_content_hash()
+        assert retriever.retrieve_relevant_context("auto rickshaw", "Madurai")
+    
+    def test_retriever_reuses_current_sidecar(self):
+        """Test that a fresh retriever loads the sidecar without re-chunking."""
+        city_context = self.make_context()
+        RAGRetriever(index_store=self.store).load_city_context(city_context)
+        
+        retriever = RAGRetriever(index_store=self.store)
+        with patch.object(retriever, '_chunk_context') as mock_chunk:
+            retriever.load_city_context(city_context)
+            mock_chunk.assert_not_called()
+        
+        assert retriever.retrieve_relevant_context("jigarthanda", "Madurai")
+    
+    def test_retriever_rebuilds_when_hash_changes(self):
+        """Test that changed content triggers a rebuild and a new sidecar."""
+        retriever = RAGRetriever(index_store=self.store)
+        retriever.load_city_context(self.make_context())
+        
+        changed = self.make_context(self.context_content + "\n### Street Food\n- **Kari Dosai** - Spicy dosa\n")
+        retriever.load_city_context(changed)
+        
+        assert retriever.indexes["madurai"].content_hash == changed.get_content_hash()
+        assert retriever.retrieve_relevant_context("kari dosai", "Madurai")
+        assert self.store.load(changed) is not None
+    
+    def test_retriever_skips_reload_of_same_content(self):
+        """Test that loading the same content twice keeps the current index."""
+        retriever = RAGRetriever(index_store=self.store)
+        city_context = self.make_context()
+        retriever.load_city_context(city_context)
+        index = retriever.indexes["madurai"]
+        
+        retriever.load_city_context(city_context)
+        
+        assert retriever.indexes["madurai"] is index
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,278 @@
+"""
+Unit tests for RAG Retriever.
+Tests context chunking, inverted index construction and BM25 retrieval.
+"""
+import pytest
+import sys
+import os
+from datetime import datetime, timezone
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rag_retriever import (
+    RAGRetriever, InvertedIndex, RetrievalResult, tokenize,
+    IST, PERIOD_BITS, TIME_WORDS_BIT, shingle_terms, text_shingles, hash_shingle
+)
+
+
+class TestRAGRetrieverUnit:
+    """Unit tests for RAG Retriever."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.retriever = RAGRetriever()
+        
+        self.sample_context = """# Test City Context
+
+## Food & Dining
+
+### Traditional Foods
+- **Jigarthanda** - Famous cold drink with milk and ice cream
+- **Idli** - Soft idlis served for breakfast with chutney
+
+### Popular Restaurants
+- **Murugan Idli Shop** - Famous for idlis and filter coffee, open 6 AM to 10 PM
+
+## Transport
+
+### Local Transport
+- **City Bus** - Operates throughout the city, fare starts from 5 rupees
+- **Auto Rickshaw** - Meter fare starts at 25 rupees
+"""
+        self.retriever.load_context_chunks("TestCity", self.sample_context)
+    
+    def test_tokenize(self):
+        """Test lowercase word tokenization."""
+        assert tokenize("Famous Jigarthanda, near the Temple!") == [
+            "famous", "jigarthanda", "near", "the", "temple"
+        ]
+        assert tokenize("") == []
+    
+    def test_chunks_are_pre_tokenized(self):
+        """Test that chunks carry lowercased text, term counts and token sets."""
+        for chunk in self.retriever.context_chunks["testcity"]:
+            assert chunk.content_lower == chunk.content.lower()
+            assert chunk.token_set == frozenset(tokenize(chunk.content))
+            assert sum(chunk.term_counts.values()) == len(tokenize(chunk.content))
+            assert chunk.section_tokens == tuple(tokenize(chunk.section))
+    
+    def test_chunks_carry_shingles(self):
+        """Test that chunks get word and word-pair shingles when indexed."""
+        chunk = self.retriever.context_chunks["testcity"][2]
+        
+        assert chunk.shingles == text_shingles(shingle_terms(chunk.content))
+        assert hash_shingle("jigarthanda") in chunk.shingles
+        assert hash_shingle("cold", "drink") in chunk.shingles
+        assert hash_shingle("the") not in chunk.shingles
+    
+    def test_index_built_on_load(self):
+        """Test that an inverted index is built when chunks are loaded."""
+        index = self.retriever.indexes["testcity"]
+        chunks = self.retriever.context_chunks["testcity"]
+        
+        assert isinstance(index, InvertedIndex)
+        assert index.doc_count == len(chunks)
+        assert len(index.doc_lengths) == len(chunks)
+        assert "jigarthanda" in index.postings
+        assert index.avg_doc_length > 0
+    
+    def test_postings_hold_term_frequencies(self):
+        """Test that postings record the term frequency per chunk."""
+        index = self.retriever.indexes["testcity"]
+        chunks = self.retriever.context_chunks["testcity"]
+        
+        for doc_id, tf in index.postings["fare"]:
+            assert tf == tokenize(chunks[doc_id].content).count("fare")
+    
+    def test_rare_terms_have_higher_idf(self):
+        """Test that terms in fewer chunks get a higher IDF."""
+        index = self.retriever.indexes["testcity"]
+        
+        assert index.idf["jigarthanda"] > index.idf["famous"]
+    
+    def test_only_matching_chunks_are_scored(self):
+        """Test that search only touches chunks containing query terms."""
+        index = self.retriever.indexes["testcity"]
+        chunks = self.retriever.context_chunks["testcity"]
+        
+        scores = index.search(["rickshaw"])
+        
+        assert len(scores) == 1
+        doc_id = next(iter(scores))
+        assert "Auto Rickshaw" in chunks[doc_id].content
+    
+    def test_retrieve_relevant_context(self):
+        """Test retrieval ranks the matching chunk first."""
+        results = self.retriever.retrieve_relevant_context("auto rickshaw fare", "TestCity")
+        
+        assert results
+        assert isinstance(results[0], RetrievalResult)
+        assert "Auto Rickshaw" in results[0].chunk.content
+        assert results[0].score > 0
+    
+    def test_results_sorted_by_score(self):
+        """Test that results come back best first."""
+        results = self.retriever.retrieve_relevant_context("famous idli food fare", "TestCity")
+        scores = [result.score for result in results]
+        
+        assert scores == sorted(scores, reverse=True)
+    
+    def test_retrieval_does_not_mutate_chunks(self):
+        """Test that shared chunks are immutable and untouched by retrieval."""
+        chunks = self.retriever.context_chunks["testcity"]
+        before = [hash(chunk.chunk_id + chunk.content) for chunk in chunks]
+        
+        self.retriever.retrieve_relevant_context("auto rickshaw fare", "TestCity")
+        self.retriever.retrieve_relevant_context("famous idli", "TestCity")
+        
+        assert [hash(chunk.chunk_id + chunk.content) for chunk in chunks] == before
+        with pytest.raises(AttributeError):
+            chunks[0].content = "changed"
+    
+    def test_concurrent_retrieval(self):
+        """Test that concurrent queries on one retriever get their own scores."""
+        from concurrent.futures import ThreadPoolExecutor
+        
+        queries = ["auto rickshaw fare", "famous idli breakfast"] * 50
+        expected = {
+            query: self.retriever.retrieve_relevant_context(query, "TestCity")
+            for query in set(queries)
+        }
+        
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(
+                lambda query: self.retriever.retrieve_relevant_context(query, "TestCity"),
+                queries
+            ))
+        
+        for query, result in zip(queries, results):
+            assert result == expected[query]
+    
+    def test_retrieve_respects_top_k(self):
+        """Test that no more than top_k chunks are returned."""
+        results = self.retriever.retrieve_relevant_context("famous idli food", "TestCity", top_k=1)
+        
+        assert len(results) == 1
+    
+    def test_retrieve_no_matching_terms(self):
+        """Test that a query with no indexed terms returns nothing."""
+        assert self.retriever.retrieve_relevant_context("xyzzy", "TestCity") == []
+    
+    def test_retrieve_unknown_city(self):
+        """Test retrieval for a city without loaded chunks."""
+        assert self.retriever.retrieve_relevant_context("food", "Unknown") == []
+    
+    def test_retrieve_batch_matches_single_queries(self):
+        """Test that batch retrieval ranks chunks like single query retrieval."""
+        queries = ["auto rickshaw fare", "famous idli breakfast", "xyzzy", "when does the shop open"]
+        
+        batch_results = self.retriever.retrieve_batch(queries, "TestCity", top_k=3)
+        
+        assert len(batch_results) == len(queries)
+        for query, results in zip(queries, batch_results):
+            expected = self.retriever.retrieve_relevant_context(query, "TestCity", top_k=3)
+            assert [result.chunk.chunk_id for result in results] == [
+                result.chunk.chunk_id for result in expected
+            ]
+            for result, expected_result in zip(results, expected):
+                assert result.score == pytest.approx(expected_result.score, rel=1e-4)
+    
+    def test_retrieve_batch_unknown_city(self):
+        """Test batch retrieval for a city without loaded chunks."""
+        assert self.retriever.retrieve_batch(["food", "bus"], "Unknown") == [[], []]
+    
+    def test_retrieve_batch_rebuilds_matrix_on_reload(self):
+        """Test that reloading a city discards its cached term matrix."""
+        self.retriever.retrieve_batch(["food"], "TestCity")
+        matrix = self.retriever.term_matrices["testcity"]
+        
+        self.retriever.load_context_chunks("TestCity", self.sample_context)
+        self.retriever.retrieve_batch(["food"], "TestCity")
+        assert self.retriever.term_matrices["testcity"] is not matrix
+        assert self.retriever.term_matrices["testcity"].index is self.retriever.indexes["testcity"]
+    
+    def test_chunk_time_masks(self):
+        """Test that chunk time features are computed once as a bitmask."""
+        chunks = {chunk.content.split("\n")[0]: chunk for chunk in self.retriever.context_chunks["testcity"]}
+        
+        foods = chunks["Traditional Foods"]
+        assert foods.time_mask & PERIOD_BITS["morning"]
+        assert not foods.time_mask & PERIOD_BITS["night"]
+        
+        restaurants = chunks["Popular Restaurants"]
+        assert restaurants.time_mask & TIME_WORDS_BIT
+        assert restaurants.time_mask & PERIOD_BITS["timing"]
+    
+    def test_current_period_uses_injected_clock(self):
+        """Test that the time period comes from the injected clock."""
+        retriever = RAGRetriever(clock=lambda: datetime(2024, 1, 1, 8, 0, tzinfo=IST))
+        assert retriever.get_current_period() == "morning"
+        
+        retriever.clock = lambda: datetime(2024, 1, 1, 23, 0, tzinfo=IST)
+        assert retriever.get_current_period() == "night"
+    
+    def test_current_period_in_ist(self):
+        """Test that server time in UTC is classified in IST."""
+        # 02:00 UTC is 07:30 IST
+        utc_time = datetime(2024, 1, 1, 2, 0, tzinfo=timezone.utc)
+        
+        assert self.retriever.get_current_period(utc_time) == "morning"
+        assert "07:30 AM (morning)" in self.retriever.get_time_context(utc_time)
+    
+    def test_time_boost_follows_current_period(self):
+        """Test that matching the current period raises a chunk's score."""
+        morning = RAGRetriever(clock=lambda: datetime(2024, 1, 1, 8, 0, tzinfo=IST))
+        evening = RAGRetriever(clock=lambda: datetime(2024, 1, 1, 19, 0, tzinfo=IST))
+        for retriever in (morning, evening):
+            retriever.load_context_chunks("TestCity", self.sample_context)
+        
+        morning_score = morning.retrieve_relevant_context("breakfast idli", "TestCity")[0].score
+        evening_score = evening.retrieve_relevant_context("breakfast idli", "TestCity")[0].score
+        
+        assert morning_score > evening_score
+    
+    def test_time_boost_rows_are_cached_by_period(self):
+        """Test that boost rows are computed once per query mask and period."""
+        self.retriever.retrieve_relevant_context("breakfast idli", "TestCity", period="morning")
+        self.retriever.retrieve_relevant_context("early breakfast", "TestCity", period="morning")
+        
+        keys = list(self.retriever._time_boost_rows)
+        assert keys == [(PERIOD_BITS["morning"], "morning")]
+    
+    def test_timing_query_boosts_chunks_with_hours(self):
+        """Test the timing boost for chunks that mention opening hours."""
+        query_mask = PERIOD_BITS["timing"]
+        
+        with_hours = self.retriever._get_time_sensitivity_boost(query_mask, TIME_WORDS_BIT, "morning")
+        without_hours = self.retriever._get_time_sensitivity_boost(query_mask, 0, "morning")
+        
+        assert with_hours == pytest.approx(0.4)
+        assert without_hours == 0.0
+    
+    def test_index_for_follows_the_snapshot(self):
+        """Test that a context snapshot keeps its own index across reloads."""
+        old = self.retriever.indexes["testcity"]
+        reloaded = self.sample_context + "\n## Night Market\n- **Jalebi Stall** - Hot jalebi after 9 PM\n"
+        self.retriever.load_context_chunks("TestCity", reloaded)
+        
+        assert self.retriever.index_for("TestCity", self.sample_context) is old
+        assert self.retriever.index_for("TestCity", reloaded) is self.retriever.indexes["testcity"]
+        results = self.retriever.retrieve_by_keywords("jalebi", "TestCity", index=old)
+        assert all("Jalebi" not in result.chunk.content for result in results)
+        
+        current = self.retriever.indexes["testcity"]
+        older = self.retriever.index_for("TestCity", "# Test City\n\n## Food\n- **Dosa** - Crisp\n")
+        assert any("Dosa" in chunk.content for chunk in older.chunks)
+        assert self.retriever.indexes["testcity"] is current
+    
+    def test_empty_index(self):
+        """Test that an index over no chunks is searchable."""
+        index = InvertedIndex([])
+        
+        assert index.doc_count == 0
+        assert index.search(["food"]) == {}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,161 @@
+"""
+Unit tests for the retrieval result cache.
+Tests query canonicalization, LRU/TTL behaviour and RAGRetriever integration.
+"""
+import pytest
+import sys
+import os
+from datetime import datetime
+from unittest.mock import patch
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rag_retriever import RAGRetriever, IST
+from retrieval_cache import RetrievalCache, canonicalize_query
+
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+
+class TestRetrievalCacheUnit:
+    """Unit tests for the retrieval result cache."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.sample_context = """# Madurai Context
+
+## Food & Dining
+
+### Traditional Foods
+- **Jigarthanda** - Famous cold drink in Madurai
+- **Idli** - Soft idlis for breakfast
+
+## Transport
+
+### Local Transport
+- **Auto Rickshaw** - Meter fare starts at 25 rupees
+"""
+        self.cache = RetrievalCache(max_entries=8)
+        self.retriever = RAGRetriever(
+            cache=self.cache,
+            clock=lambda: datetime(2024, 1, 1, 10, 0, tzinfo=IST)
+        )
+        self.retriever.load_context_chunks("Madurai", self.sample_context)
+    
+    def test_canonicalize_near_identical_queries(self):
+        """Test that near-identical queries share a canonical form."""
+        first = canonicalize_query("what food is madurai famous for")
+        second = canonicalize_query("Famous food in Madurai?")
+        
+        assert first == second == "famous food madurai"
+    
+    def test_canonicalize_keeps_distinct_queries_apart(self):
+        """Test that different topics keep different canonical forms."""
+        assert canonicalize_query("auto fare") != canonicalize_query("bus fare")
+    
+    def test_get_put_and_counters(self):
+        """Test basic lookups and hit/miss counting."""
+        assert self.cache.get("key") is None
+        self.cache.put("key", "value")
+        assert self.cache.get("key") == "value"
+        
+        stats = self.cache.get_stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+        assert stats['hit_rate'] == 0.5
+    
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted first."""
+        cache = RetrievalCache(max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.get_stats()['evictions'] == 1
+    
+    def test_ttl_expiry(self):
+        """Test that entries expire after the TTL."""
+        clock = FakeClock()
+        cache = RetrievalCache(ttl_seconds=10, clock=clock)
+        cache.put("key", "value")
+        
+        clock.now = 9
+        assert cache.get("key") == "value"
+        clock.now = 11
+        assert cache.get("key") is None
+        assert cache.get_stats()['entries'] == 0
+    
+    def test_build_rag_context_hits_cache_for_similar_queries(self):
+        """Test that a reworded query is served from the cache."""
+        first = self.retriever.build_rag_context("what food is madurai famous for", "Madurai")
+        
+        with patch.object(self.retriever, 'retrieve_relevant_context') as mock_retrieve:
+            second = self.retriever.build_rag_context("famous food in madurai?", "Madurai")
+            mock_retrieve.assert_not_called()
+        
+        assert first == second
+        assert self.cache.get_stats()['hits'] == 1
+    
+    def test_retrieval_uses_original_query(self):
+        """Test that the canonical query is only the key; ranking sees the original query."""
+        uncached = RAGRetriever(clock=lambda: datetime(2024, 1, 1, 10, 0, tzinfo=IST))
+        uncached.load_context_chunks("Madurai", self.sample_context)
+        period = self.retriever.get_current_period()
+        expected = uncached.retrieve_relevant_context("food for breakfast?", "Madurai", top_k=3, period=period)
+        
+        miss = self.retriever.retrieve_cached("food for breakfast?", "Madurai", 3, period)
+        hit = self.retriever.retrieve_cached("Food for breakfast", "Madurai", 3, period)
+        
+        assert uncached.retrieve_cached("food for breakfast?", "Madurai", 3, period) == expected
+        assert miss == hit == expected
+        assert self.cache.get_stats()['hits'] == 1
+    
+    def test_cache_keyed_on_period(self):
+        """Test that a different time period misses the cache."""
+        self.retriever.build_rag_context("famous food", "Madurai")
+        self.retriever.clock = lambda: datetime(2024, 1, 1, 20, 0, tzinfo=IST)
+        self.retriever.build_rag_context("famous food", "Madurai")
+        
+        assert self.cache.get_stats()['hits'] == 0
+        assert self.cache.get_stats()['entries'] == 2
+    
+    def test_cache_invalidated_when_context_changes(self):
+        """Test that reloading changed content drops the city's stale entries."""
+        self.retriever.build_rag_context("famous food", "Madurai")
+        assert self.cache.get_stats()['entries'] == 1
+        
+        self.retriever.load_context_chunks("Madurai", self.sample_context + "\n- **Kari Dosai** - Spicy\n")
+        
+        assert self.cache.get_stats()['entries'] == 0
+        context = self.retriever.build_rag_context("kari dosai", "Madurai")
+        assert "Kari Dosai" in context
+    
+    def test_same_content_reload_keeps_entries(self):
+        """Test that reloading identical content keeps cached results."""
+        self.retriever.build_rag_context("famous food", "Madurai")
+        self.retriever.load_context_chunks("Madurai", self.sample_context)
+        
+        assert self.cache.get_stats()['entries'] == 1
+    
+    def test_retrieval_stats_include_cache(self):
+        """Test that retrieval stats report cache counters."""
+        self.retriever.build_rag_context("famous food", "Madurai")
+        
+        stats = self.retriever.get_retrieval_stats("Madurai")
+        assert stats['cache']['misses'] == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
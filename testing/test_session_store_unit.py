@@ -0,0 +1,230 @@
+"""
+Unit tests for per-session state.
+Tests SessionStore expiry and capacity, and that LocalGuideSystem keeps
+sessions apart while sharing city contexts.
+"""
+import pytest
+import sys
+import os
+import asyncio
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from conversation_history import ConversationHistory
+from local_guide_system import LocalGuideSystem
+from models import AppState
+from session_store import SessionStore
+from stub_model import StubModel
+
+
+class FakeClock:
+    """Manually advanced clock."""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+
+class TestSessionStoreUnit:
+    """Unit tests for SessionStore."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.clock = FakeClock()
+        self.store = SessionStore(idle_ttl=60.0, max_sessions=3, clock=self.clock)
+    
+    def test_get_creates_and_reuses_session(self):
+        """Test that a session id always maps to the same state."""
+        state = self.store.get("a")
+        
+        assert isinstance(state, AppState)
+        assert self.store.get("a") is state
+        assert self.store.get("b") is not state
+        assert len(self.store) == 2
+    
+    def test_empty_session_id_rejected(self):
+        """Test that an empty session id is an error."""
+        with pytest.raises(ValueError):
+            self.store.get("")
+    
+    def test_idle_session_expires(self):
+        """Test that sessions unused for longer than the TTL are dropped."""
+        state = self.store.get("a")
+        self.clock.now = 61.0
+        
+        assert "a" not in self.store
+        assert self.store.get("a") is not state
+        assert self.store.get_stats()['expired'] == 1
+    
+    def test_access_extends_lifetime(self):
+        """Test that using a session resets its idle timer."""
+        state = self.store.get("a")
+        self.clock.now = 50.0
+        self.store.get("a")
+        self.clock.now = 100.0
+        
+        assert self.store.get("a") is state
+    
+    def test_evict_expired(self):
+        """Test that evict_expired drops only idle sessions."""
+        self.store.get("a")
+        self.clock.now = 40.0
+        self.store.get("b")
+        self.clock.now = 70.0
+        
+        assert self.store.evict_expired() == 1
+        assert "a" not in self.store
+        assert "b" in self.store
+    
+    def test_max_sessions_evicts_least_recently_used(self):
+        """Test that the cap evicts the session unused for longest."""
+        self.store.get("a")
+        self.store.get("b")
+        self.store.get("c")
+        self.store.get("a")
+        self.store.get("d")
+        
+        assert len(self.store) == 3
+        assert "b" not in self.store
+        assert "a" in self.store
+        assert self.store.get_stats()['evicted'] == 1
+    
+    def test_peek_does_not_create(self):
+        """Test that peek neither creates nor refreshes sessions."""
+        assert self.store.peek("a") is None
+        assert len(self.store) == 0
+    
+    def test_discard(self):
+        """Test ending a session."""
+        self.store.get("a")
+        
+        assert self.store.discard("a")
+        assert not self.store.discard("a")
+        assert len(self.store) == 0
+    
+    def test_invalid_capacity(self):
+        """Test that a store needs room for at least one session."""
+        with pytest.raises(ValueError):
+            SessionStore(max_sessions=0)
+
+
+class TestSessionIsolationUnit:
+    """Unit tests for sessions in LocalGuideSystem."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.system = LocalGuideSystem()
+        self.system.local_guide.model = StubModel(response_text="Jigarthanda is a famous cold drink.")
+        self.system.is_initialized = True
+    
+    def test_sessions_keep_their_own_city(self):
+        """Test that selecting a city in one session leaves others alone."""
+        self.system.select_city("Madurai", session_id="alice")
+        self.system.select_city("Dindigul", session_id="bob")
+        
+        assert self.system.get_current_city("alice") == "Madurai"
+        assert self.system.get_current_city("bob") == "Dindigul"
+        assert self.system.get_current_city() is None
+    
+    def test_sessions_keep_their_own_history(self):
+        """Test that conversation history is per session."""
+        self.system.select_city("Madurai", session_id="alice")
+        self.system.select_city("Madurai", session_id="bob")
+        
+        self.system.process_query("What food is famous here?", session_id="alice")
+        self.system.process_query("What food is famous here?", session_id="alice")
+        self.system.process_query("What food is famous here?", session_id="bob")
+        
+        assert len(self.system.get_conversation_history("alice")) == 2
+        assert len(self.system.get_conversation_history("bob")) == 1
+        assert self.system.get_usage_statistics("bob")['total_queries'] == 1
+    
+    def test_new_session_needs_city(self):
+        """Test that a fresh session does not inherit another session's city."""
+        self.system.select_city("Madurai", session_id="alice")
+        
+        response = self.system.process_query("What food is famous here?", session_id="carol")
+        
+        assert response.is_refusal
+        assert "No city selected" in response.refusal_reason
+    
+    def test_concurrent_sessions_async(self):
+        """Test that concurrent sessions in different cities each use their own city."""
+        self.system.select_city("Madurai", session_id="alice")
+        self.system.select_city("Dindigul", session_id="bob")
+        
+        async def run():
+            return await asyncio.gather(
+                self.system.process_query_async("What food is famous here?", session_id="alice"),
+                self.system.process_query_async("What food is famous here?", session_id="bob")
+            )
+        
+        asyncio.run(run())
+        
+        alice = self.system.get_conversation_history("alice")
+        bob = self.system.get_conversation_history("bob")
+        assert alice[0][0].city == "Madurai"
+        assert bob[0][0].city == "Dindigul"
+    
+    def test_reset_session_is_per_session(self):
+        """Test that resetting one session keeps the others."""
+        self.system.select_city("Madurai", session_id="alice")
+        self.system.select_city("Madurai", session_id="bob")
+        
+        self.system.reset_session("alice")
+        
+        assert self.system.get_current_city("alice") is None
+        assert self.system.get_current_city("bob") == "Madurai"
+    
+    def test_end_session(self):
+        """Test that an ended session starts over."""
+        self.system.select_city("Madurai", session_id="alice")
+        
+        assert self.system.end_session("alice")
+        assert self.system.get_current_city("alice") is None
+    
+    def test_system_status_reports_sessions(self):
+        """Test that the system status includes session statistics."""
+        self.system.select_city("Madurai", session_id="alice")
+        
+        status = self.system.get_system_status("alice")
+        
+        assert status['selected_city'] == "Madurai"
+        assert status['sessions']['sessions'] == 1
+    
+    
+    def test_status_counts_turns_beyond_history_capacity(self):
+        """Test that conversation_length keeps counting once the history is full."""
+        self.system.select_city("Madurai", session_id="alice")
+        self.system.get_session_state("alice").conversation_history = ConversationHistory(max_turns=2)
+        
+        for _ in range(3):
+            self.system.process_query("What food is famous here?", session_id="alice")
+        
+        status = self.system.get_system_status("alice")
+        assert status['conversation_length'] == 3
+        assert status['retained_turns'] == 2
+    
+    def test_status_lookups_do_not_touch_sessions(self):
+        """Test that read-only lookups neither create nor refresh sessions."""
+        clock = FakeClock()
+        self.system.sessions.clock = clock
+        self.system.select_city("Madurai", session_id="alice")
+        
+        assert self.system.get_system_status("ghost")['selected_city'] is None
+        assert self.system.get_current_city("ghost") is None
+        assert self.system.get_conversation_history("ghost") == []
+        assert self.system.get_usage_statistics("ghost")['total_queries'] == 0
+        assert len(self.system.sessions) == 1
+        
+        clock.now = self.system.sessions.idle_ttl - 1
+        assert self.system.get_system_status("alice")['selected_city'] == "Madurai"
+        clock.now = self.system.sessions.idle_ttl + 1
+        assert self.system.get_current_city("alice") is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
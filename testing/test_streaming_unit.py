@@ -0,0 +1,232 @@
+"""
+Unit tests for streaming responses.
+Tests the sync bridge, ResponseStream and LocalGuideSystem.process_query_stream
+against the local stub model.
+"""
+import pytest
+import sys
+import os
+import asyncio
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from local_guide_system import LocalGuideSystem
+from models import Response
+from streaming import ResponseStream, iterate_sync
+from stub_model import StubModel
+
+
+async def count_to(n):
+    """Async iterator over 0..n-1."""
+    for i in range(n):
+        await asyncio.sleep(0)
+        yield i
+
+
+async def fail_after_one():
+    """Async iterator that raises after its first item."""
+    yield 1
+    raise RuntimeError("model error")
+
+
+class FailingModel(StubModel):
+    """Stub model that fails after streaming a number of words."""
+    
+    def __init__(self, response_text, fail_after):
+        super().__init__(response_text=response_text)
+        self.fail_after = fail_after
+    
+    async def stream(self, *args, **kwargs):
+        deltas = 0
+        async for event in super().stream(*args, **kwargs):
+            if "contentBlockDelta" in event:
+                if deltas == self.fail_after:
+                    raise RuntimeError("model connection lost")
+                deltas += 1
+            yield event
+
+
+class TestStreamingUnit:
+    """Unit tests for streaming responses."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.answer = "Jigarthanda is a famous cold drink made with milk and almond gum. You can find it near Meenakshi Temple."
+        self.system = LocalGuideSystem()
+        self.system.local_guide.model = StubModel(response_text=self.answer)
+        self.system.is_initialized = True
+        self.system.select_city("Madurai")
+    
+    def test_iterate_sync_yields_in_order(self):
+        """Test that the sync bridge yields every item in order."""
+        assert list(iterate_sync(lambda: count_to(5))) == [0, 1, 2, 3, 4]
+    
+    def test_iterate_sync_propagates_errors(self):
+        """Test that errors from the async iterator reach the caller."""
+        items = iterate_sync(fail_after_one)
+        
+        assert next(items) == 1
+        with pytest.raises(RuntimeError):
+            next(items)
+    
+    def test_iterate_sync_early_stop(self):
+        """Test that the caller may stop consuming early."""
+        items = iterate_sync(lambda: count_to(1000))
+        
+        assert next(items) == 0
+        items.close()
+    
+    def test_stream_yields_chunks_as_generated(self):
+        """Test that the answer arrives in several chunks."""
+        stream = self.system.process_query_stream("What food is famous here?")
+        chunks = list(stream)
+        
+        assert len(chunks) > 1
+        assert "".join(chunks) == self.answer
+        assert stream.text == self.answer
+    
+    def test_stream_final_response(self):
+        """Test that the validated Response is available after streaming."""
+        stream = self.system.process_query_stream("What food is famous here?")
+        assert stream.response is None
+        
+        for _ in stream:
+            pass
+        
+        assert isinstance(stream.response, Response)
+        assert stream.response.text == self.answer
+        assert stream.response.validation_passed
+        assert len(self.system.app_state.conversation_history) == 1
+    
+    def test_stream_async_iteration(self):
+        """Test that the stream can be consumed asynchronously."""
+        async def consume():
+            stream = self.system.process_query_stream("What food is famous here?")
+            chunks = [chunk async for chunk in stream]
+            return chunks, stream.response
+        
+        chunks, response = asyncio.run(consume())
+        
+        assert "".join(chunks) == self.answer
+        assert response.text == self.answer
+    
+    def test_stream_rejected_query(self):
+        """Test that a rejected query streams its refusal as one chunk."""
+        stream = self.system.process_query_stream("Tell me about quantum physics")
+        chunks = list(stream)
+        
+        assert len(chunks) == 1
+        assert stream.response.is_refusal
+        assert chunks[0] == stream.response.text
+    
+    def test_stream_without_city(self):
+        """Test that streaming before city selection yields the error response."""
+        self.system.app_state.reset_city_selection()
+        stream = self.system.process_query_stream("What food is famous here?")
+        
+        assert list(stream) == [stream.response.text]
+        assert stream.response.is_refusal
+    
+    def test_stream_matches_blocking_pipeline(self):
+        """Test that streaming and process_query give the same final text."""
+        blocking = self.system.process_query("What food is famous here?")
+        stream = self.system.process_query_stream("What food is famous here?")
+        list(stream)
+        
+        assert stream.response.text == blocking.text.strip()
+    
+    def test_guard_stops_generation(self):
+        """Test that a rejected stream cancels the model and ends in a refusal."""
+        answer = ("Madurai has a famous cold drink. According to research, it came from Europe. "
+                  "Traders brought it to the south. They sold it in many towns. "
+                  "Today it is served in glasses with ice cream. Shops open in the evening and close late at night.")
+        model = StubModel(response_text=answer, delta_delay=0.005)
+        self.system.local_guide.model = model
+        
+        stream = self.system.process_query_stream("What food is famous here?")
+        chunks = list(stream)
+        
+        assert chunks == ["Madurai has a famous cold drink."]
+        assert "According to research" not in stream.text
+        assert stream.response.is_refusal
+        assert not stream.response.validation_passed
+        assert "Guard agent stopped generation" in stream.response.refusal_reason
+        assert model.deltas_sent < len(answer.split())
+        recorded = self.system.app_state.conversation_history[-1][1]
+        assert recorded.text == stream.response.text
+        assert recorded.refusal_reason == stream.response.refusal_reason
+    
+    def test_guard_releases_checked_sentences(self):
+        """Test that text is released one checked sentence at a time."""
+        stream = self.system.process_query_stream("What food is famous here?")
+        
+        assert list(stream) == [
+            "Jigarthanda is a famous cold drink made with milk and almond gum.",
+            " You can find it near Meenakshi Temple."
+        ]
+    
+    def test_late_validation_failure_replaces_streamed_text(self):
+        """Test that text released by the stream guard is replaced if the final check fails."""
+        self.system.local_guide.model = StubModel(response_text="Paris Berlin Tokyo.")
+        
+        stream = self.system.process_query_stream("What food is famous here?")
+        chunks = list(stream)
+        
+        assert "".join(chunks) == "Paris Berlin Tokyo."
+        assert stream.response.is_refusal
+        assert not stream.response.validation_passed
+        assert stream.response.text != stream.text
+        assert self.system.app_state.conversation_history[-1][1].text == stream.response.text
+    
+    def test_grounded_stream_matches_blocking_verdict(self):
+        """Test that in grounded mode streamed and blocking answers get the same verdict."""
+        self.system.guard_agent.mode = 'grounded'
+        answers = [self.answer, "Jigarthanda is a cold drink. The Eiffel Tower sparkles every hour at night."]
+        
+        for answer in answers:
+            self.system.local_guide.model = StubModel(response_text=answer)
+            blocking = self.system.process_query("What food is famous here?")
+            stream = self.system.process_query_stream("What food is famous here?")
+            list(stream)
+            
+            assert stream.response.is_refusal == blocking.is_refusal, answer
+            assert stream.response.text == blocking.text.strip(), answer
+    
+    def test_model_error_mid_stream_is_not_appended(self):
+        """Test that a model error after released text ends the stream without appending a refusal."""
+        self.system.local_guide.model = FailingModel(self.answer, fail_after=14)
+        
+        stream = self.system.process_query_stream("What food is famous here?")
+        chunks = list(stream)
+        
+        assert chunks == ["Jigarthanda is a famous cold drink made with milk and almond gum."]
+        assert stream.response.is_refusal
+        assert not stream.response.validation_passed
+        assert stream.response.text not in stream.text
+    
+    def test_model_error_before_text_streams_refusal(self):
+        """Test that a model error before any text streams the refusal as the whole answer."""
+        self.system.local_guide.model = FailingModel(self.answer, fail_after=0)
+        
+        stream = self.system.process_query_stream("What food is famous here?")
+        chunks = list(stream)
+        
+        assert len(chunks) == 1
+        assert stream.response.is_refusal
+    
+    def test_response_stream_finish(self):
+        """Test ResponseStream with a custom producer."""
+        async def producer(stream):
+            yield "a"
+            yield "b"
+            stream.finish(Response(text="ab", is_refusal=False))
+        
+        stream = ResponseStream(producer)
+        
+        assert list(stream) == ["a", "b"]
+        assert stream.response.text == "ab"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])